@@ -0,0 +1,96 @@
+"""Throughput of the hash backends
+
+Each backend available here hashes random inputs of several sizes, from the 64 bytes of a
+small leaf to whole files, and builds a native tree over leaves of the default chunk size.
+Whether the CPU has the SHA extensions used by OpenSSL for SHA-256 is reported as well.
+
+Usage:
+    python benchmarks/hashes.py [-s MEGABYTES] [-o results.json]
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+import pruvi
+from pruvi.hashing import available_backends, get_hasher, hash_bytes
+from pruvi.tree import ArrayMerkleTree
+
+SIZES = [64, 4096, 2**20]
+
+
+def cpu_flags():
+    """Get the flags of the CPU, on Linux only"""
+    try:
+        with open("/proc/cpuinfo") as f:
+            for line in f:
+                if line.startswith("flags"):
+                    return set(line.split(":", 1)[1].split())
+    except OSError:
+        pass
+    return set()
+
+
+def throughput(hash_type, size, total):
+    """Hash `total` bytes in inputs of `size` bytes and get the rate in MB/s"""
+    hasher = get_hasher(hash_type)
+    data = os.urandom(size)
+    count = max(1, total // size)
+    start = time.perf_counter()
+    for _ in range(count):
+        hasher(data).digest()
+    seconds = time.perf_counter() - start
+    return count * size / 2**20 / seconds
+
+
+def tree_rate(hash_type, leaves, chunk_size):
+    """Hash the leaves and build a native tree over them, and get the rate in leaves/s"""
+    parts = [os.urandom(chunk_size) for _ in range(leaves)]
+    start = time.perf_counter()
+    tree = ArrayMerkleTree(hash_type=hash_type)
+    tree.extend([hash_bytes(part, hash_type) for part in parts])
+    return leaves / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput of the pruvi hash backends")
+    parser.add_argument("-s", "--size", type=float, default=64, help="MB hashed for each input size")
+    parser.add_argument("-l", "--leaves", type=int, default=2**14, help="leaves of the tree")
+    parser.add_argument("-b", "--bytes", type=int, default=4096, help="size of the leaves")
+    parser.add_argument("-o", "--output", help="JSON file with the results (default: stdout)")
+    args = parser.parse_args()
+
+    total = int(args.size * 2**20)
+    flags = cpu_flags()
+    results = {
+        "pruvi_version": pruvi.__version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": int(time.time()),
+        "sha_ni": "sha_ni" in flags,
+        "config": {"bytes_per_size": total, "leaves": args.leaves, "chunk_size": args.bytes},
+        "results": []
+    }
+    print(f"SHA extensions (SHA-NI): {'yes' if results['sha_ni'] else 'no'}", file=sys.stderr)
+
+    for hash_type in available_backends():
+        result = {
+            "hash_type": hash_type,
+            "mb_s": {str(size): throughput(hash_type, size, total) for size in SIZES + [total]},
+            "tree_leaves_s": tree_rate(hash_type, args.leaves, args.bytes)
+        }
+        results["results"].append(result)
+        rates = ", ".join(f"{size} B {rate:.0f} MB/s" for size, rate in result["mb_s"].items())
+        print(f"{hash_type:<9} {rates}, tree {result['tree_leaves_s']:.0f} leaves/s", file=sys.stderr)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
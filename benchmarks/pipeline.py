@@ -0,0 +1,194 @@
+"""Throughput of each stage of the split → tree → export → validate pipeline
+
+Synthetic binary, text, PDF and WAV inputs of the requested size are generated in a
+temporary folder and each one is processed in a fresh process, so that the peak resident
+memory reported belongs to that input only. The results are written as JSON to track
+regressions across versions.
+
+Usage:
+    python benchmarks/pipeline.py [-k binary text pdf wav] [-s MEGABYTES] [-o results.json]
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import random
+import resource
+import sys
+import tempfile
+import time
+import wave
+
+import pruvi
+
+WORDS = [
+    "merkle", "proof", "tree", "leaf", "root", "hash", "part", "document", "contract",
+    "clause", "signature", "party", "agreement", "audit", "path", "digest"
+]
+
+
+def make_binary(file_path, size):
+    with open(file_path, "wb") as f:
+        f.write(os.urandom(size))
+
+
+def make_text(file_path, size):
+    rng = random.Random(0)
+    written = 0
+    with open(file_path, "w") as f:
+        while written < size:
+            line = " ".join(rng.choice(WORDS) for _ in range(rng.randint(4, 16))) + "\n"
+            if rng.random() < 0.1:
+                line += "\n"
+            f.write(line)
+            written += len(line)
+
+
+def make_pdf(file_path, size):
+    from PyPDF2 import PdfFileWriter
+
+    # A blank page takes roughly 100 bytes once split
+    writer = PdfFileWriter()
+    for i in range(max(1, size // 4096)):
+        writer.addBlankPage(612, 792)
+    with open(file_path, "wb") as f:
+        writer.write(f)
+
+
+def make_wav(file_path, size):
+    with wave.open(file_path, "wb") as w:
+        w.setnchannels(2)
+        w.setsampwidth(2)
+        w.setframerate(44100)
+        w.writeframes(os.urandom(size - size % 4))
+
+
+GENERATORS = {
+    "binary": (".bin", make_binary),
+    "text": (".txt", make_text),
+    "pdf": (".pdf", make_pdf),
+    "wav": (".wav", make_wav),
+}
+
+
+def get_splitter(kind, file_path, engine, chunk_size):
+    """Get a splitter and the arguments to split the input"""
+    if kind == "binary":
+        from pruvi.splitters.binary_file import BinaryFileSplitter
+        return BinaryFileSplitter(file_path=file_path, engine=engine), {"size": chunk_size}
+    if kind == "text":
+        from pruvi.splitters.text_file import TextFileSplitter
+        return TextFileSplitter(file_path=file_path, engine=engine), {"method": "lines"}
+    if kind == "pdf":
+        from pruvi.splitters.pdf_file import PDFFileSplitter
+        return PDFFileSplitter(file_path=file_path, engine=engine), {}
+    from pruvi.splitters.audio_file import AudioFileSplitter
+    return AudioFileSplitter(file_path=file_path, engine=engine), {"seconds": 1}
+
+
+def peak_rss():
+    """Peak resident memory of the process in MiB"""
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB and macOS bytes
+    return rss / 2**20 if sys.platform == "darwin" else rss / 2**10
+
+
+def run(kind, folder, size, engine, chunk_size, workers):
+    """Generate an input and time each stage of its processing"""
+    from pruvi.batch import find_pairs
+
+    ext, generate = GENERATORS[kind]
+    file_path = os.path.join(folder, f"input{ext}")
+    generate(file_path, size)
+    size = os.path.getsize(file_path)
+    output_folder = os.path.join(folder, "export")
+
+    splitter, options = get_splitter(kind, file_path, engine, chunk_size)
+    stages = {}
+
+    def timed(name, function):
+        start = time.perf_counter()
+        function()
+        stages[name] = {"seconds": time.perf_counter() - start}
+
+    timed("split", lambda: splitter.split_document(**options))
+    leaves = len(splitter.get_parts())
+    timed("tree", lambda: splitter.create_tree(workers=workers))
+    timed("proofs", lambda: [proof for proof in splitter.proofs])
+    timed("export", lambda: splitter.export(output_folder))
+
+    pairs = find_pairs(output_folder)
+    root = splitter.tree.rootHash.decode()
+    verified = []
+    timed("validate", lambda: verified.extend(splitter.verify_files(pairs, root, workers=workers)))
+
+    for stage in stages.values():
+        seconds = stage["seconds"]
+        stage["mb_s"] = size / 2**20 / seconds if seconds else None
+        stage["leaves_s"] = leaves / seconds if seconds else None
+
+    return {
+        "kind": kind,
+        "size_bytes": size,
+        "leaves": leaves,
+        "verified": all(r for _, _, r in verified),
+        "stages": stages,
+        "peak_rss_mb": peak_rss()
+    }
+
+
+def run_isolated(kind, size, engine, chunk_size, workers):
+    """Run a benchmark in a fresh process to measure its own peak memory"""
+    with tempfile.TemporaryDirectory() as folder:
+        ctx = multiprocessing.get_context("spawn")
+        with ctx.Pool(1) as pool:
+            return pool.apply(run, (kind, folder, size, engine, chunk_size, workers))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput of the pruvi pipeline")
+    parser.add_argument(
+        "-k", "--kinds", nargs="+", choices=sorted(GENERATORS), default=sorted(GENERATORS),
+        help="kinds of input to benchmark"
+    )
+    parser.add_argument("-s", "--size", type=float, default=16, help="size of each input in MB")
+    parser.add_argument("-b", "--bytes", type=int, default=4096, help="chunk size of binary inputs")
+    parser.add_argument("-e", "--engine", choices=["pymerkle", "native", "disk"], default="native")
+    parser.add_argument("-w", "--workers", type=int, default=1, help="workers used to hash and verify")
+    parser.add_argument("-o", "--output", help="JSON file with the results (default: stdout)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    results = {
+        "pruvi_version": pruvi.__version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": int(time.time()),
+        "config": {
+            "size_bytes": int(args.size * 2**20),
+            "chunk_size": args.bytes,
+            "engine": args.engine,
+            "workers": args.workers
+        },
+        "results": []
+    }
+
+    for kind in args.kinds:
+        result = run_isolated(kind, int(args.size * 2**20), args.engine, args.bytes, args.workers)
+        results["results"].append(result)
+        summary = ", ".join(f"{name} {s['mb_s']:.1f} MB/s" for name, s in result["stages"].items())
+        print(f"{kind}: {result['leaves']} leaves, {summary}, {result['peak_rss_mb']:.0f} MiB peak",
+              file=sys.stderr)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
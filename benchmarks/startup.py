@@ -0,0 +1,91 @@
+"""Startup time of the pruvi command line
+
+Each command is launched several times in a fresh interpreter and the median wall time is
+reported, together with the pruvi and third-party modules loaded the slowest according to
+`python -X importtime`.
+
+Usage:
+    python benchmarks/startup.py [-n RUNS]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+
+def make_proof(folder):
+    """Split a small file to get a data file, its proof and a Merkle root to validate"""
+    data_file = os.path.join(folder, "data.bin")
+    with open(data_file, "wb") as f:
+        f.write(os.urandom(4096))
+
+    from pruvi.splitters.binary_file import BinaryFileSplitter
+
+    splitter = BinaryFileSplitter(file_path=data_file, engine="native")
+    splitter.split_document(size=1024)
+    splitter.create_tree()
+    splitter.export(folder)
+
+    return (
+        os.path.join(folder, "parts", "part-1.bin"),
+        os.path.join(folder, "parts", "part-1-proof.json"),
+        splitter.tree.rootHash.decode()
+    )
+
+
+def time_command(args, runs):
+    """Get the median wall time of a command in seconds"""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(args, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def slowest_imports(args, count=5):
+    """Get the modules with the highest cumulative import time of a command"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime"] + args[1:],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True
+    )
+    imports = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit() and not name.startswith("  "):
+            imports.append((int(cumulative), name.strip()))
+    return sorted(imports, reverse=True)[:count]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Startup time of the pruvi command line")
+    parser.add_argument("-n", "--runs", type=int, default=10, help="runs per command")
+    args = parser.parse_args()
+
+    launcher = [sys.executable, "-m", "pruvi.launcher"]
+    with tempfile.TemporaryDirectory() as folder:
+        data_file, proof_file, root = make_proof(folder)
+        commands = {
+            "python (baseline)": [sys.executable, "-c", "pass"],
+            "pruvi --version": launcher + ["--version"],
+            "pruvi validate": launcher + [
+                "-q", "validate", "-m", root, "-d", data_file, "-p", proof_file
+            ],
+        }
+
+        for name, command in commands.items():
+            print(f"{name:<20} {1000 * time_command(command, args.runs):8.1f} ms")
+            if command[1] == "-m":
+                for cumulative, module in slowest_imports(command):
+                    print(f"    {module:<36} {cumulative / 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+import json
+import os
+import shutil
+
+from pruvi.container import ContainerReader
+from pruvi.hashing import get_hasher
+from pruvi.pack import PackReader
+from pruvi.proofs import generate_multiproof
+from pruvi.tree import ArrayMerkleTree
+
+
+def find_pairs(export_folder):
+    """Find the data files and proofs of an export
+
+    Args:
+        export_folder (str): An export folder or the folder with its parts.
+
+    Returns:
+        list. Tuples with the path to a data file and the path to its proof.
+    """
+    parts_folder = os.path.join(export_folder, "parts")
+    if not os.path.isdir(parts_folder):
+        parts_folder = export_folder
+
+    data_files = {}
+    proof_files = []
+    for name in os.listdir(parts_folder):
+        if name.endswith("-proof.json"):
+            proof_files.append(name)
+        else:
+            data_files[os.path.splitext(name)[0]] = name
+
+    pairs = []
+    for name in proof_files:
+        stem = name[:-len("-proof.json")]
+        if stem in data_files:
+            pairs.append((
+                os.path.join(parts_folder, data_files[stem]),
+                os.path.join(parts_folder, name)
+            ))
+
+    def part_number(pair):
+        stem = os.path.splitext(os.path.basename(pair[0]))[0]
+        number = stem.rsplit("-", 1)[-1]
+        return (int(number) if number.isdigit() else 0, stem)
+
+    return sorted(pairs, key=part_number)
+
+
+def read_manifest(manifest_file):
+    """Read a manifest of data files and proofs
+
+    The manifest is a JSON list of objects with the "data_file" and "proof_file" keys.
+    Relative paths are resolved from the folder of the manifest.
+
+    Args:
+        manifest_file (str): Path to the manifest.
+
+    Returns:
+        list. Tuples with the path to a data file and the path to its proof.
+    """
+    with open(manifest_file) as f:
+        entries = json.load(f)
+
+    folder = os.path.dirname(os.path.abspath(manifest_file))
+    return [
+        (
+            os.path.join(folder, entry["data_file"]),
+            os.path.join(folder, entry["proof_file"])
+        )
+        for entry in entries
+    ]
+
+
+def parse_numbers(specs):
+    """Parse a list of part numbers and ranges such as "3", "10-20"
+
+    Args:
+        specs (list): Strings with a number or an inclusive range of numbers.
+
+    Returns:
+        list. Sorted part numbers, without duplicates.
+
+    Raises:
+        ValueError: if a number or range is not valid.
+    """
+    numbers = set()
+    for spec in specs:
+        first, _, last = spec.partition("-")
+        first = int(first)
+        last = int(last) if last else first
+        if first < 1 or last < first:
+            raise ValueError(f"'{spec}' is not a valid part number or range.")
+        numbers.update(range(first, last + 1))
+    return sorted(numbers)
+
+
+def disclose(export_folder, numbers, output_folder="./"):
+    """Copy some parts of an export together with a single multi-proof for all of them
+
+    The levels of the tree are read from tree.bin or rebuilt from the leaves in tree.json,
+    and the parts from the pack or from the part files.
+
+    Args:
+        export_folder (str): Folder of an export.
+        numbers (list): Numbers of the parts, starting at 1.
+        output_folder (str): The folder where the parts and the multi-proof are written.
+
+    Returns:
+        tuple. The paths to the parts and to the multi-proof.
+
+    Raises:
+        IndexError: if there is no such part.
+        ValueError: if the tree of the export does not include all its parts.
+    """
+    container_file = os.path.join(export_folder, "tree.bin")
+    if os.path.exists(container_file):
+        with ContainerReader(container_file) as container:
+            levels = [bytes(level) for level in container.get_levels()]
+            hash_type = container.hash_type
+            provider = container.header.get("provider")
+    else:
+        tree = ArrayMerkleTree.load(os.path.join(export_folder, "tree.json"))
+        levels = tree.levels
+        hash_type = tree.hash_type
+        provider = None
+
+    with open(os.path.join(export_folder, "tree-state.json")) as f:
+        length = json.load(f)["length"]
+    if len(levels[0]) // get_hasher(hash_type)().digest_size != length:
+        raise ValueError("The tree of the export does not include the parts appended to it.")
+
+    proof = generate_multiproof(levels, [n - 1 for n in numbers], hash_type, provider)
+
+    if not os.path.exists(output_folder):
+        os.makedirs(output_folder)
+
+    parts_folder = os.path.join(export_folder, "parts")
+    data_files = []
+    if os.path.exists(os.path.join(parts_folder, "parts.idx")):
+        with PackReader(parts_folder) as pack:
+            for n in numbers:
+                data_files.append(os.path.join(output_folder, f"part-{n}{pack.extension}"))
+                with open(data_files[-1], "wb") as f:
+                    f.write(pack.get_part(n - 1))
+    else:
+        files = {
+            os.path.splitext(os.path.basename(data_file))[0]: data_file
+            for data_file, _ in find_pairs(export_folder)
+        }
+        for n in numbers:
+            source = files[f"part-{n}"]
+            data_files.append(os.path.join(output_folder, os.path.basename(source)))
+            shutil.copyfile(source, data_files[-1])
+
+    proof_file = os.path.join(output_folder, "multiproof.json")
+    with open(proof_file, "w") as f:
+        f.write(json.dumps(proof, indent=2))
+
+    return data_files, proof_file
+
+
+def read_disclosure(proof_file):
+    """Find the parts disclosed with a multi-proof
+
+    The parts are expected next to the multi-proof, named after their numbers.
+
+    Args:
+        proof_file (str): Path to the multi-proof.
+
+    Returns:
+        list. Paths to the parts, in the order of the leaves of the multi-proof.
+
+    Raises:
+        KeyError: if a part is missing.
+    """
+    with open(proof_file) as f:
+        indices = json.load(f)["body"]["indices"]
+
+    folder = os.path.dirname(os.path.abspath(proof_file))
+    files = {}
+    for name in os.listdir(folder):
+        stem = os.path.splitext(name)[0]
+        if stem.startswith("part-"):
+            files[stem] = os.path.join(folder, name)
+    return [files[f"part-{i + 1}"] for i in indices]
@@ -0,0 +1,220 @@
+import binascii
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+from pruvi.hashing import get_hasher, hash_bytes
+
+UNCACHED_HASH_TYPES = frozenset(["sha256", "sha512", "blake2b", "blake2s", "blake3"])
+"""Hash types about as fast as the fingerprint (sha256 with the SHA extensions hashes about
+930 MB/s, sha512 460 MB/s and blake2b 600 MB/s where sha3_512 hashes 130 MB/s), so looking
+their parts up in the cache would cost as much as hashing them"""
+
+
+def fingerprint(part):
+    """Get a fast fingerprint of a part
+
+    BLAKE2b is several times faster than SHA-3, and its full 512-bit digest is as
+    collision resistant as a sha3_512 leaf, so a fingerprint can stand for the contents of
+    a part.
+
+    Args:
+        part (bytes): Any bytes-like object.
+
+    Returns:
+        bytes.
+    """
+    return hashlib.blake2b(part).digest()
+
+
+class LeafCache(object):
+    """Cache of leaf digests, per part and per file
+
+    The digest of each part is kept under the fingerprint of the part, so parts that did
+    not change between two versions of a document are not hashed again. The digests of
+    all the parts of a file and the resulting root are also kept under the identity of the
+    file (path, size, modification time and inode), the way it was split and the hash
+    type, so splitting an unchanged file again in the same way needs no hashing at all.
+
+    Both are stored in a SQLite database, so they are looked up one at a time instead of
+    being loaded whole, and the least recently used entries are evicted when the cache
+    exceeds `max_size` bytes. New part digests are written when the cache is flushed, which
+    happens every `flush_size` parts so that they do not pile up in memory.
+
+    The parts of the hash types in UNCACHED_HASH_TYPES are hashed straight away.
+
+    Attributes:
+        file_path (str): Path to the database.
+        max_size (int): Maximum number of bytes of fingerprints and digests stored.
+        flush_size (int): Number of new or used part digests kept in memory before they are
+            written.
+        hits (int): Number of digests found in the cache.
+        misses (int): Number of digests computed.
+    """
+    def __init__(self, file_path=":memory:", max_size=2**28, flush_size=2**16):
+        """Constructor
+
+        Args:
+            file_path (str): Path to the database. It is created if needed. Default: an
+                in-memory database.
+            max_size (int): Maximum number of bytes of fingerprints and digests stored.
+                Default: 256 MiB.
+            flush_size (int): Number of new or used part digests kept in memory before they
+                are written. Default: 65536.
+        """
+        self.file_path = file_path
+        self.max_size = max_size
+        self.flush_size = flush_size
+        self.hits = 0
+        self.misses = 0
+        self._new = {}
+        self._used = set()
+        self._db = sqlite3.connect(file_path)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS parts ("
+            "hash_type TEXT, fingerprint BLOB, digest BLOB, last_used REAL, "
+            "PRIMARY KEY (hash_type, fingerprint))"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            "key TEXT PRIMARY KEY, hash_type TEXT, root TEXT, digests BLOB, last_used REAL)"
+        )
+        self._db.commit()
+
+    def __len__(self):
+        """Number of part digests in the cache"""
+        (count,) = self._db.execute("SELECT COUNT(*) FROM parts").fetchone()
+        return count + len(self._new)
+
+    def digest(self, part, hash_type="sha3_512"):
+        """Get the digest of a part, hashing it only if it is not in the cache
+
+        Args:
+            part (bytes): Any bytes-like object.
+            hash_type (str): The hash type to be used.
+
+        Returns:
+            str. Hex digest.
+        """
+        if hash_type in UNCACHED_HASH_TYPES:
+            return hash_bytes(part, hash_type)
+
+        if len(self._new) + len(self._used) >= self.flush_size:
+            self.flush()
+
+        key = (hash_type, fingerprint(part))
+        if key in self._new:
+            self.hits += 1
+            return self._new[key]
+
+        row = self._db.execute(
+            "SELECT digest FROM parts WHERE hash_type = ? AND fingerprint = ?", key
+        ).fetchone()
+        if row is not None:
+            self.hits += 1
+            self._used.add(key)
+            return binascii.hexlify(row[0]).decode()
+
+        self.misses += 1
+        self._new[key] = hash_bytes(part, hash_type)
+        return self._new[key]
+
+    @staticmethod
+    def file_key(file_path, method, hash_type="sha3_512"):
+        """Build the key of a file split in a given way
+
+        Args:
+            file_path (str): The file split.
+            method (str): Description of the splitting method and its parameters.
+            hash_type (str): The hash type of the leaves.
+
+        Returns:
+            str.
+        """
+        st = os.stat(file_path)
+        return json.dumps([
+            os.path.abspath(file_path),
+            st.st_size,
+            st.st_mtime_ns,
+            st.st_ino,
+            method,
+            hash_type
+        ])
+
+    def get_file(self, key):
+        """Get the leaf digests stored for a file
+
+        Args:
+            key (str): A key built with LeafCache.file_key.
+
+        Returns:
+            tuple. The hex digests of the leaves and the root, or None if not found.
+        """
+        row = self._db.execute(
+            "SELECT hash_type, root, digests FROM files WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+
+        self._db.execute("UPDATE files SET last_used = ? WHERE key = ?", (time.time(), key))
+        self._db.commit()
+
+        hash_type, root, digests = row
+        h = binascii.hexlify(digests).decode()
+        step = 2 * get_hasher(hash_type)().digest_size
+        return [h[i:i + step] for i in range(0, len(h), step)], root
+
+    def put_file(self, key, hash_type, digests, root):
+        """Store the leaf digests of a file
+
+        Args:
+            key (str): A key built with LeafCache.file_key.
+            hash_type (str): The hash type of the leaves.
+            digests (list): Hex digests of the leaves.
+            root (str): Hex digest of the root.
+        """
+        self._db.execute(
+            "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?)",
+            (key, hash_type, root, binascii.unhexlify("".join(digests)), time.time())
+        )
+        self.flush()
+
+    def flush(self):
+        """Write the new part digests and evict the least recently used entries"""
+        now = time.time()
+        self._db.executemany(
+            "INSERT OR REPLACE INTO parts VALUES (?, ?, ?, ?)",
+            ((hash_type, key, binascii.unhexlify(digest), now) for (hash_type, key), digest in self._new.items())
+        )
+        self._db.executemany(
+            "UPDATE parts SET last_used = ? WHERE hash_type = ? AND fingerprint = ?",
+            ((now, hash_type, key) for hash_type, key in self._used)
+        )
+        self._new = {}
+        self._used = set()
+        # Parts and files share the same size limit
+        evicted = (
+            "SELECT kind, id FROM (SELECT kind, id, SUM(size) "
+            "OVER (ORDER BY last_used DESC, kind, id DESC) AS total FROM ("
+            "SELECT 0 AS kind, rowid AS id, LENGTH(fingerprint) + LENGTH(digest) AS size, last_used FROM parts "
+            "UNION ALL "
+            "SELECT 1, rowid, LENGTH(digests), last_used FROM files)) WHERE total > ?"
+        )
+        self._db.execute(f"CREATE TEMP TABLE evicted AS {evicted}", (self.max_size,))
+        self._db.execute("DELETE FROM parts WHERE rowid IN (SELECT id FROM evicted WHERE kind = 0)")
+        self._db.execute("DELETE FROM files WHERE rowid IN (SELECT id FROM evicted WHERE kind = 1)")
+        self._db.execute("DROP TABLE evicted")
+        self._db.commit()
+
+    def close(self):
+        """Flush the cache and close the database"""
+        self.flush()
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
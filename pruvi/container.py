@@ -0,0 +1,206 @@
+import array
+import binascii
+import json
+import mmap
+import struct
+import sys
+
+from pruvi.hashing import get_hasher
+from pruvi.proofs import audit_steps, serialize_proof, signed_path
+
+MAGIC = b"PRUVI\x01"
+"""Signature and version of the binary container"""
+
+_HEADER = struct.Struct("<6sI")
+_RECORD = struct.Struct("<IH")
+_ENTRY = struct.Struct("<b")
+
+
+def write_container(file_path, levels, hash_type="sha3_512", provider=None, metadata=None):
+    """Write a tree and all its proofs to a binary container
+
+    The layout of the container is the following:
+
+    - The magic bytes and the size of a JSON header with the hash type, the size of the
+      digests, the number of leaves, the offset and length of each level and the offsets
+      of the proof index and of the proof records.
+    - Each level as a buffer of raw fixed-width digests, from the leaves to the root.
+    - The proof index: one little-endian uint64 offset per leaf.
+    - The proof records: the proof index as an uint32, the number of elements of the path
+      as an uint16 and, for each element, its sign as an int8 and its raw digest.
+
+    Args:
+        file_path (str): Output file.
+        levels (list): Buffers of raw digests, from the leaves to the root.
+        hash_type (str): The hash type used by the tree.
+        provider (str): Identifier of the tree.
+        metadata (dict): Additional information to be stored in the header. Default: None.
+    """
+    width = get_hasher(hash_type)().digest_size
+    length = len(levels[0]) // width
+
+    header = {
+        "hash_type": hash_type,
+        "digest_size": width,
+        "length": length,
+        "provider": provider,
+        "levels": [],
+        "proofs_index_offset": 0,
+        "proofs_offset": 0
+    }
+    header.update(metadata or {})
+
+    # The offsets depend on the size of the header, so it is serialized until it is stable
+    size = None
+    while 1:
+        raw_header = json.dumps(header).encode()
+        if len(raw_header) == size:
+            break
+        size = len(raw_header)
+        offset = _HEADER.size + size
+        header["levels"] = []
+        for level in levels:
+            header["levels"].append([offset, len(level) // width])
+            offset += len(level)
+        header["proofs_index_offset"] = offset
+        header["proofs_offset"] = offset + 8 * length
+
+    counts = [len(level) // width for level in levels]
+    offsets = array.array("Q")
+    with open(file_path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, len(raw_header)))
+        f.write(raw_header)
+        for level in levels:
+            # Levels may be views of level files, which are copied in chunks
+            for start in range(0, len(level), 2**24):
+                f.write(level[start:start + 2**24])
+
+        f.seek(header["proofs_offset"])
+        position = header["proofs_offset"]
+        for i in range(length):
+            steps = audit_steps(levels, i, width, counts=counts)
+            leaf = binascii.hexlify(levels[0][i * width:(i + 1) * width]).decode()
+            proof_index, proof_path = signed_path(leaf, steps)
+
+            record = [_RECORD.pack(proof_index, len(proof_path))]
+            for sign, digest in proof_path:
+                record.append(_ENTRY.pack(sign))
+                record.append(binascii.unhexlify(digest))
+            record = b"".join(record)
+
+            offsets.append(position)
+            f.write(record)
+            position += len(record)
+
+        if sys.byteorder != "little":
+            offsets.byteswap()
+        f.seek(header["proofs_index_offset"])
+        f.write(offsets.tobytes())
+
+
+class ContainerReader(object):
+    """Reader of a binary container
+
+    The container is memory-mapped, so a single proof or level can be read without
+    parsing the whole file.
+
+    Attributes:
+        header (dict): The header of the container.
+        hash_type (str): The hash type used by the tree.
+        length (int): Number of leaves of the tree.
+    """
+    def __init__(self, file_path):
+        """Constructor
+
+        Args:
+            file_path (str): Path to the container.
+
+        Raises:
+            ValueError: if the file is not a pruvi container.
+        """
+        with open(file_path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, size = _HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise ValueError(f"'{file_path}' is not a pruvi container.")
+
+        self.header = json.loads(self._mmap[_HEADER.size:_HEADER.size + size])
+        self.hash_type = self.header["hash_type"]
+        self.length = self.header["length"]
+        self._width = self.header["digest_size"]
+
+    def close(self):
+        """Close the container"""
+        self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    @property
+    def rootHash(self):
+        """Root of the tree as an hex digest
+
+        Returns:
+            bytes.
+        """
+        offset, count = self.header["levels"][-1]
+        return binascii.hexlify(self._mmap[offset:offset + self._width])
+
+    def get_levels(self):
+        """Get the levels of the tree without copying them
+
+        Returns:
+            list. Read-only views of the buffers of raw digests, from the leaves to the root.
+        """
+        view = memoryview(self._mmap)
+        return [
+            view[offset:offset + count * self._width]
+            for offset, count in self.header["levels"]
+        ]
+
+    def get_leaf(self, index):
+        """Get the hex digest of a leaf
+
+        Args:
+            index (int): Zero-based index of the leaf.
+
+        Returns:
+            str.
+        """
+        if not 0 <= index < self.length:
+            raise IndexError("leaf index out of range")
+        offset = self.header["levels"][0][0] + index * self._width
+        return binascii.hexlify(self._mmap[offset:offset + self._width]).decode()
+
+    def get_proof(self, index):
+        """Read the proof of a leaf
+
+        Args:
+            index (int): Zero-based index of the leaf.
+
+        Returns:
+            dict. The serialized proof.
+
+        Raises:
+            IndexError: if there is no such leaf.
+        """
+        if not 0 <= index < self.length:
+            raise IndexError("proof index out of range")
+
+        (offset,) = struct.unpack_from("<Q", self._mmap, self.header["proofs_index_offset"] + 8 * index)
+        proof_index, count = _RECORD.unpack_from(self._mmap, offset)
+        offset += _RECORD.size
+
+        proof_path = []
+        for _ in range(count):
+            (sign,) = _ENTRY.unpack_from(self._mmap, offset)
+            offset += _ENTRY.size
+            digest = binascii.hexlify(self._mmap[offset:offset + self._width]).decode()
+            offset += self._width
+            proof_path.append([sign, digest])
+
+        return serialize_proof(proof_index, proof_path, self.hash_type, self.header.get("provider"))
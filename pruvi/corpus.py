@@ -0,0 +1,383 @@
+import binascii
+import concurrent.futures
+import json
+import logging
+import os
+import shutil
+import struct
+import time
+
+from pruvi.exceptions import EmptyTreeException
+from pruvi.hashing import get_hasher
+from pruvi.metrics import Metrics
+from pruvi.proofs import audit_steps, build_levels, serialize_proof, signed_path
+from pruvi.tree import ArrayMerkleTree
+
+KINDS = {
+    ".wav": "audio",
+    ".pdf": "pdf",
+    ".txt": "text",
+    ".md": "text",
+    ".csv": "text",
+    ".log": "text",
+}
+"""Splitter used for each file extension. Any other file is split as binary data
+
+The audio splitter only reads WAV files, so compressed audio is split as binary data.
+"""
+
+DEFAULT_OPTIONS = {
+    "audio": {"seconds": 1},
+    "binary": {"size": 4096},
+    "pdf": {},
+    "text": {"method": "lines"},
+}
+"""Arguments given to the split_document method of each splitter"""
+
+
+def get_kind(file_path):
+    """Get the kind of splitter of a file from its extension
+
+    Args:
+        file_path (str): Path to the file.
+
+    Returns:
+        str. One of the following: "audio", "binary", "pdf", "text".
+    """
+    return KINDS.get(os.path.splitext(file_path)[-1].lower(), "binary")
+
+
+def get_splitter(kind, file_path, hash_type="sha3_512"):
+    """Get a splitter of the given kind for a file
+
+    The splitter modules are imported here so that PyPDF2 and pydub are only loaded when
+    the corpus contains files that need them.
+
+    Args:
+        kind (str): One of the following: "audio", "binary", "pdf", "text".
+        file_path (str): Path to the file.
+        hash_type (str): The hash type to be used.
+
+    Returns:
+        pruvi.splitters.file.FileSplitter.
+    """
+    if kind == "audio":
+        from pruvi.splitters.audio_file import AudioFileSplitter as Splitter
+    elif kind == "pdf":
+        from pruvi.splitters.pdf_file import PDFFileSplitter as Splitter
+    elif kind == "text":
+        from pruvi.splitters.text_file import TextFileSplitter as Splitter
+    else:
+        from pruvi.splitters.binary_file import BinaryFileSplitter as Splitter
+    return Splitter(file_path=file_path, hash_type=hash_type, engine="native")
+
+
+def _cannot_decode(kind, error):
+    """Tell whether an error of a splitter means that it cannot decode a file
+
+    Args:
+        kind (str): Kind of splitter.
+        error (Exception): The error raised by the splitter.
+
+    Returns:
+        bool. False for any other error, such as a file that cannot be read.
+    """
+    if kind == "audio":
+        from pydub import AudioSegment
+        from pydub.exceptions import CouldntDecodeError
+        from pydub.utils import get_prober_name
+        # Audio that is not PCM data is decoded by ffmpeg, which may not be installed
+        if isinstance(error, FileNotFoundError):
+            return error.filename in (AudioSegment.converter, get_prober_name())
+        errors = (CouldntDecodeError, EOFError, ValueError, struct.error)
+    elif kind == "pdf":
+        from PyPDF2.utils import PdfReadError
+        errors = (PdfReadError, EOFError, ValueError, struct.error)
+    elif kind == "text":
+        errors = UnicodeDecodeError
+    else:
+        return False
+    return isinstance(error, errors)
+
+
+def _split_file(file_path, kind, options, parts_folder, hash_type):
+    """Stream the parts of a file to its folder and get their digests
+
+    Files that the splitter of their kind cannot decode, such as damaged PDF documents,
+    are split as binary data instead. Other errors, such as a file that cannot be read,
+    are raised.
+
+    Args:
+        file_path (str): Path to the file.
+        kind (str): Kind of splitter.
+        options (dict): Arguments of the split_document method of each splitter.
+        parts_folder (str): The folder where the parts are written.
+        hash_type (str): The hash type to be used.
+
+    Returns:
+        tuple. The kind of splitter used, the hex digests of the parts and the error that
+        made the binary splitter be used, if any.
+    """
+    error = None
+    splitter = get_splitter(kind, file_path, hash_type)
+    try:
+        splitter.split_document(output_folder=parts_folder, **options.get(kind, {}))
+    except Exception as e:
+        if not _cannot_decode(kind, e):
+            raise
+        error = f"{type(e).__name__}: {e}"
+        shutil.rmtree(parts_folder, ignore_errors=True)
+        kind = "binary"
+        splitter = get_splitter(kind, file_path, hash_type)
+        splitter.split_document(output_folder=parts_folder, **options.get(kind, {}))
+    return kind, splitter.get_digests(), error
+
+
+def _write_proofs(parts_folder, digests, corpus_steps, hash_type="sha3_512", provider=None,
+                  now=None):
+    """Write the proofs of the parts of a file up to the root of the corpus
+
+    The audit path of a part in the tree of its file ends at the root of the file, which
+    is a leaf of the corpus tree, so the audit path of that leaf is grafted on top of it.
+
+    Args:
+        parts_folder (str): The folder where the parts were written.
+        digests (list): Hex digests of the parts of the file.
+        corpus_steps (list): Audit path of the root of the file in the corpus tree.
+        hash_type (str): The hash type used by the trees.
+        provider (str): Identifier of the corpus tree.
+        now (float): Creation time of the proofs.
+
+    Returns:
+        int. Number of proofs written.
+    """
+    levels = build_levels(digests, hash_type)
+    width = get_hasher(hash_type)().digest_size
+    hex_levels = [binascii.hexlify(level).decode() for level in levels]
+    counts = [len(level) // width for level in levels]
+
+    for i, leaf in enumerate(digests):
+        steps = audit_steps(levels, i, width, hex_levels=hex_levels, counts=counts)
+        proof_index, proof_path = signed_path(leaf, steps + corpus_steps)
+        proof = serialize_proof(proof_index, proof_path, hash_type, provider, now=now)
+        with open(os.path.join(parts_folder, f"part-{i+1}-proof.json"), "w") as f:
+            f.write(json.dumps(proof, indent=2))
+    return len(digests)
+
+
+class CorpusSplitter(object):
+    """Splitter of all the files of a directory tree under a single Merkle root
+
+    Each file is split by the splitter of its kind and gets its own tree. The roots of the
+    files, in the order of their relative paths, are the leaves of the corpus tree, so the
+    proof of any part goes through the root of its file up to the root of the corpus.
+
+    Attributes:
+        folder (str): The root folder of the corpus.
+        hash_type (str): The hash type to be used.
+        options (dict): Arguments of the split_document method of each splitter.
+        metrics (pruvi.metrics.Metrics): Timers and counters of the run.
+        files (list): Dicts with the relative path, the kind of splitter, the number of
+            parts and the root of each file split.
+        tree (pruvi.tree.ArrayMerkleTree): The corpus tree.
+    """
+    def __init__(self, folder, hash_type="sha3_512", options=None, metrics=None):
+        """Constructor
+
+        Args:
+            folder (str): The root folder of the corpus.
+            hash_type (str): The hash type to be used.
+            options (dict): Arguments of the split_document method of each splitter, by
+                kind. Default: pruvi.corpus.DEFAULT_OPTIONS.
+            metrics (pruvi.metrics.Metrics): Timers and counters of the run. Default: a
+                new one.
+        """
+        self.folder = folder
+        self.hash_type = hash_type
+        self.options = dict(DEFAULT_OPTIONS, **(options or {}))
+        self.metrics = metrics if metrics is not None else Metrics()
+        self.files = []
+        self.tree = None
+        self._digests = []
+
+    def list_files(self, exclude=None):
+        """List the files of the corpus in a stable order
+
+        Args:
+            exclude (str): A folder to leave out, such as the output folder.
+
+        Returns:
+            list. Paths relative to the root folder of the corpus.
+        """
+        excluded = os.path.abspath(exclude) if exclude else None
+        files = []
+        for root, dirnames, filenames in os.walk(self.folder):
+            dirnames[:] = sorted(
+                d for d in dirnames if os.path.abspath(os.path.join(root, d)) != excluded
+            )
+            for name in filenames:
+                file_path = os.path.join(root, name)
+                if os.path.isfile(file_path):
+                    files.append(os.path.relpath(file_path, self.folder))
+        return sorted(files, key=lambda path: path.split(os.sep))
+
+    def split_corpus(self, output_folder, workers=1, executor="process"):
+        """Split every file of the corpus, writing its parts as they are produced
+
+        The parts of each file are written at `files/<relative path>/` in the output
+        folder. Files without any part are left out of the corpus.
+
+        Args:
+            output_folder (str): Output folder.
+            workers (int): Number of files split in parallel. Default: 1.
+            executor (str): Kind of pool used to split the files. One of the following:
+                "thread", "process". Default: "process".
+        """
+        paths = self.list_files(exclude=output_folder)
+        logging.info(f"Splitting {len(paths)} files with {max(1, workers)} {executor} workers...")
+
+        jobs = [
+            (
+                os.path.join(self.folder, path),
+                get_kind(path),
+                self.options,
+                os.path.join(output_folder, "files", path),
+                self.hash_type
+            )
+            for path in paths
+        ]
+
+        self.files = []
+        self._digests = []
+        with self.metrics.stage("split"):
+            if workers <= 1 or not jobs:
+                self._collect(paths, jobs, (_split_file(*job) for job in jobs))
+            else:
+                if executor == "process":
+                    pool = concurrent.futures.ProcessPoolExecutor(max_workers=workers)
+                else:
+                    pool = concurrent.futures.ThreadPoolExecutor(max_workers=workers)
+                with pool:
+                    results = pool.map(
+                        _split_file,
+                        *zip(*jobs),
+                        chunksize=max(1, min(64, len(jobs) // (workers * 4)))
+                    )
+                    self._collect(paths, jobs, results)
+
+    def _collect(self, paths, jobs, results):
+        """Record the result of each file as it is split"""
+        for path, job, (kind, digests, error) in zip(paths, jobs, results):
+            if error:
+                logging.warning(f"'{path}' was split as binary data: {error}")
+            if not digests:
+                logging.warning(f"'{path}' has no parts and is left out of the corpus.")
+                shutil.rmtree(job[3], ignore_errors=True)
+                continue
+
+            root = binascii.hexlify(build_levels(digests, self.hash_type)[-1]).decode()
+            self.files.append({
+                "path": path,
+                "kind": kind,
+                "parts": len(digests),
+                "root": root
+            })
+            self._digests.append(digests)
+            self.metrics.add("split", items=1, nbytes=os.path.getsize(job[0]))
+            self.metrics.report("split", len(paths))
+
+    def create_tree(self):
+        """Create the corpus tree from the roots of the files
+
+        Raises:
+            pruvi.exceptions.EmptyTreeException: if no file was split.
+        """
+        if not self.files:
+            raise EmptyTreeException
+
+        with self.metrics.stage("tree"):
+            self.tree = ArrayMerkleTree(hash_type=self.hash_type)
+            self.tree.extend([f["root"] for f in self.files])
+            self.metrics.add("tree", items=len(self.files))
+
+    def export(self, output_folder, workers=1, executor="process"):
+        """Export the proofs of every part, the corpus tree and its index
+
+        Besides the proof of each part next to it, the output folder gets:
+
+        - `tree.json`: the corpus tree, whose leaves are the roots of the files.
+        - `corpus.json`: the root of the corpus and the path, kind, number of parts and
+          root of each file, in the order of the leaves.
+        - `manifest.json`: every part and its proof, to be checked with
+          `pruvi validate --manifest`.
+
+        Args:
+            output_folder (str): Output folder.
+            workers (int): Number of files whose proofs are written in parallel. Default: 1.
+            executor (str): Kind of pool used to write the proofs. One of the following:
+                "thread", "process". Default: "process".
+        """
+        levels = self.tree.levels
+        width = get_hasher(self.hash_type)().digest_size
+        hex_levels = [binascii.hexlify(level).decode() for level in levels]
+        counts = [len(level) // width for level in levels]
+        now = time.time()
+
+        jobs = [
+            (
+                os.path.join(output_folder, "files", f["path"]),
+                digests,
+                audit_steps(levels, i, width, hex_levels=hex_levels, counts=counts),
+                self.hash_type,
+                self.tree.uuid,
+                now
+            )
+            for i, (f, digests) in enumerate(zip(self.files, self._digests))
+        ]
+
+        logging.info(f"Writing the proofs of {sum(f['parts'] for f in self.files)} parts...")
+        with self.metrics.stage("proofs"):
+            if workers <= 1 or not jobs:
+                written = [_write_proofs(*job) for job in jobs]
+            else:
+                if executor == "process":
+                    pool = concurrent.futures.ProcessPoolExecutor(max_workers=workers)
+                else:
+                    pool = concurrent.futures.ThreadPoolExecutor(max_workers=workers)
+                with pool:
+                    written = list(pool.map(
+                        _write_proofs,
+                        *zip(*jobs),
+                        chunksize=max(1, min(64, len(jobs) // (workers * 4)))
+                    ))
+            self.metrics.add("proofs", items=sum(written))
+
+        tree_file = os.path.join(output_folder, "tree.json")
+        logging.info(f"Creating corpus tree file at '{tree_file}'...")
+        self.tree.export(tree_file)
+
+        corpus_file = os.path.join(output_folder, "corpus.json")
+        logging.info(f"Creating corpus index at '{corpus_file}'...")
+        with open(corpus_file, "w") as f:
+            json.dump({
+                "merkle_root": self.tree.rootHash.decode(),
+                "hash_type": self.hash_type,
+                "files": self.files
+            }, f, indent=2)
+
+        manifest_file = os.path.join(output_folder, "manifest.json")
+        logging.info(f"Creating manifest at '{manifest_file}'...")
+        with open(manifest_file, "w") as f:
+            f.write("[")
+            first = True
+            for entry in self.files:
+                ext = os.path.splitext(entry["path"])[-1]
+                folder = os.path.join("files", entry["path"])
+                for i in range(1, entry["parts"] + 1):
+                    f.write("\n  " if first else ",\n  ")
+                    first = False
+                    f.write(json.dumps({
+                        "data_file": os.path.join(folder, f"part-{i}{ext}"),
+                        "proof_file": os.path.join(folder, f"part-{i}-proof.json")
+                    }))
+            f.write("\n]\n")
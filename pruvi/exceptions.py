@@ -1,2 +1,6 @@
 class NoPartsException(Exception):
     """No parts found within the splitter"""
+
+
+class EmptyTreeException(Exception):
+    """The tree has no leaves"""
@@ -1,4 +1,73 @@
+import concurrent.futures
+import functools
 import hashlib
+import importlib.util
+import os
+
+_BACKENDS = {}
+
+
+def register_backend(name, factory):
+    """Register a hash backend
+
+    A backend is a callable that takes an optional bytes-like object and returns a hash
+    object with the `update`, `digest` and `hexdigest` methods and the `digest_size`
+    attribute of the hashlib ones. The name is the hash type recorded in the exports.
+
+    Args:
+        name (str): Name of the hash type.
+        factory (callable): Constructor of hash objects.
+    """
+    _BACKENDS[name] = factory
+
+
+def get_hasher(hash_type="sha3_512"):
+    """Get the constructor of hash objects of a hash type
+
+    Registered backends are looked up first and any other hashlib algorithm is
+    accepted as well.
+
+    Args:
+        hash_type (str): Name of the hash type.
+
+    Returns:
+        callable.
+
+    Raises:
+        AttributeError: if the hash type is not available.
+    """
+    try:
+        return _BACKENDS[hash_type]
+    except KeyError:
+        return getattr(hashlib, hash_type)
+
+
+def available_backends():
+    """Get the names of the registered backends that can be used here
+
+    Returns:
+        list.
+    """
+    return [
+        name for name in _BACKENDS
+        if name != "blake3" or importlib.util.find_spec("blake3") is not None
+    ]
+
+
+def _blake3(data=b""):
+    """Create a BLAKE3 hash object which uses several threads for large inputs
+
+    The optional `blake3` package is only imported when the backend is used.
+    """
+    import blake3
+
+    return blake3.blake3(data, max_threads=blake3.blake3.AUTO)
+
+
+# OpenSSL picks the SHA extensions of the CPU (SHA-NI) for SHA-256 when they are present
+for _name in ["sha3_512", "sha256", "sha512", "blake2b", "blake2s"]:
+    register_backend(_name, getattr(hashlib, _name))
+register_backend("blake3", _blake3)
 
 
 def hash_bytes(data, hash_type="sha3_512"):
@@ -13,6 +82,86 @@ def hash_bytes(data, hash_type="sha3_512"):
     Raises:
         AttributeError.
     """
-    m = getattr(hashlib, hash_type)()
+    m = get_hasher(hash_type)()
     m.update(data)
     return m.hexdigest()
+
+
+def hash_file(source, hash_type="sha3_512", block_size=2**20):
+    """Hash a file or a stream of blocks without loading it whole in memory
+
+    Files are read with `readinto` into a single reused buffer, so the memory used is the
+    same whatever the size of the file.
+
+    Args:
+        source (str or iterable): Path to a file or iterable of bytes-like blocks.
+        hash_type (str): The hash type to be used.
+        block_size (int): Size of the blocks read from the file.
+
+    Returns:
+        str. Hex digest.
+
+    Raises:
+        AttributeError.
+    """
+    m = get_hasher(hash_type)()
+
+    if isinstance(source, (str, bytes, os.PathLike)):
+        buffer = bytearray(block_size)
+        view = memoryview(buffer)
+        with open(source, "rb", buffering=0) as f:
+            while 1:
+                n = f.readinto(buffer)
+                if not n:
+                    break
+                m.update(view[:n])
+    else:
+        for block in source:
+            m.update(block)
+
+    return m.hexdigest()
+
+
+def _hash_copy(data, hash_type="sha3_512"):
+    """Hash a picklable copy of the data in a worker process"""
+    return hash_bytes(data, hash_type)
+
+
+def hash_parts(parts, hash_type="sha3_512", workers=1, executor="thread"):
+    """Hash a list of parts, optionally in parallel
+
+    hashlib releases the GIL while hashing large buffers, so a thread pool scales with
+    the number of cores for big parts. A process pool is better suited for many small
+    parts, at the cost of copying them to the workers.
+
+    Args:
+        parts (list): List of bytes-like objects to hash.
+        hash_type (str): The hash type to be used.
+        workers (int): Number of workers. If 1, the parts are hashed serially.
+        executor (str): Kind of pool to use. One of the following: "thread", "process".
+
+    Returns:
+        list. Hex digests, in the same order as the parts.
+
+    Raises:
+        ValueError: if the executor is not valid.
+    """
+    if workers <= 1:
+        return [hash_bytes(p, hash_type) for p in parts]
+
+    if executor == "thread":
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(functools.partial(hash_bytes, hash_type=hash_type), parts))
+    elif executor == "process":
+        chunksize = max(1, len(parts) // (workers * 4))
+        # multiprocessing is only loaded when a process pool is used
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+            return list(
+                pool.map(
+                    functools.partial(_hash_copy, hash_type=hash_type),
+                    (p if isinstance(p, bytes) else bytes(p) for p in parts),
+                    chunksize=chunksize
+                )
+            )
+    else:
+        raise ValueError(f"'{executor}' is not a valid executor.")
@@ -0,0 +1,295 @@
+import binascii
+import json
+import uuid
+
+from pruvi.exceptions import EmptyTreeException
+from pruvi.hashing import get_hasher
+from pruvi.proofs import serialize_proof, signed_path
+
+
+def _split(size):
+    """Get the size of the left subtree of a tree with the given number of leaves"""
+    return 1 << ((size - 1).bit_length() - 1)
+
+
+def frontier_from_levels(levels, width):
+    """Get the roots of the maximal perfect subtrees of a tree
+
+    Args:
+        levels (list): Buffers of raw digests, from the leaves to the root.
+        width (int): Size in bytes of a digest.
+
+    Returns:
+        list. Raw digests of the perfect subtrees, from the left to the right.
+    """
+    length = len(levels[0]) // width if levels else 0
+    frontier = []
+    start = 0
+    for height in range(length.bit_length() - 1, -1, -1):
+        if length & (1 << height):
+            j = start >> height
+            frontier.append(bytes(levels[height][j * width:(j + 1) * width]))
+            start += 1 << height
+    return frontier
+
+
+def frontier_from_digests(digests, hash_type="sha3_512"):
+    """Get the roots of the maximal perfect subtrees of the tree of some leaves
+
+    The leaves are consumed one at a time and only the frontier is kept, so the memory
+    used is O(log n) whatever the number of leaves.
+
+    Args:
+        digests (iterable): Hex digests of the leaves.
+        hash_type (str): The hash type to be used.
+
+    Returns:
+        tuple. The number of leaves and their frontier, as raw digests from the left to
+            the right.
+    """
+    hasher = get_hasher(hash_type)
+    stack = []
+    length = 0
+    for digest in digests:
+        node = binascii.unhexlify(digest)
+        height = 0
+        while stack and stack[-1][0] == height:
+            node = hasher(binascii.hexlify(stack.pop()[1]) + binascii.hexlify(node)).digest()
+            height += 1
+        stack.append((height, node))
+        length += 1
+    return length, [node for _, node in stack]
+
+
+class AppendOnlyTree(object):
+    """Merkle tree that can grow without keeping its previous leaves
+
+    Only the roots of the maximal perfect subtrees of the tree (its frontier) are kept,
+    which is enough to append new leaves, to compute the new root, to prove the new leaves
+    and to prove that the previous tree is a prefix of the new one. The shape and hashing
+    rules are the same as in pruvi.tree.ArrayMerkleTree.
+
+    Attributes:
+        uuid (str): Identifier of the tree.
+        hash_type (str): The hash type to be used.
+        length (int): Number of leaves of the tree.
+        frontier (list): Raw digests of the maximal perfect subtrees, from the left.
+    """
+    def __init__(self, hash_type="sha3_512", length=0, frontier=[]):
+        """Constructor
+
+        Args:
+            hash_type (str): The hash type to be used.
+            length (int): Number of leaves of the tree.
+            frontier (list): Raw digests of the maximal perfect subtrees, from the left.
+        """
+        self.uuid = str(uuid.uuid1())
+        self.hash_type = hash_type
+        self.length = length
+        self.frontier = list(frontier)
+        self._hasher = get_hasher(hash_type)
+        self._width = self._hasher().digest_size
+
+    def _hash(self, left, right):
+        """Hash two raw digests the same way pymerkle does"""
+        return self._hasher(binascii.hexlify(left) + binascii.hexlify(right)).digest()
+
+    def _ranges(self, length):
+        """Get the leaf ranges covered by the frontier of a tree with that length"""
+        ranges = []
+        start = 0
+        for height in range(length.bit_length() - 1, -1, -1):
+            if length & (1 << height):
+                ranges.append((start, start + (1 << height)))
+                start += 1 << height
+        return ranges
+
+    @property
+    def rootHash(self):
+        """Root of the tree as an hex digest
+
+        Returns:
+            bytes.
+
+        Raises:
+            pruvi.exceptions.EmptyTreeException.
+        """
+        if not self.frontier:
+            raise EmptyTreeException
+        root = self.frontier[-1]
+        for node in reversed(self.frontier[:-1]):
+            root = self._hash(node, root)
+        return binascii.hexlify(root)
+
+    def extend(self, digests):
+        """Append several leaves to the tree
+
+        The cost is O(log n) hashes per new leaf. Besides updating the tree, the proofs of
+        the new leaves and the consistency proof between the previous and the new tree are
+        computed from the nodes visited.
+
+        Args:
+            digests (list): Hex digests of the new leaves.
+
+        Returns:
+            tuple. The serialized proofs of the new leaves and the consistency proof (None
+                if the tree was empty).
+        """
+        old_length = self.length
+        new_length = old_length + len(digests)
+        leaves = [binascii.unhexlify(d) for d in digests]
+        known = dict(zip(self._ranges(old_length), self.frontier))
+        memo = {}
+
+        def node(lo, hi):
+            if (lo, hi) in known:
+                return known[(lo, hi)]
+            if hi - lo == 1:
+                return leaves[lo - old_length]
+            if (lo, hi) not in memo:
+                k = _split(hi - lo)
+                memo[(lo, hi)] = self._hash(node(lo, lo + k), node(lo + k, hi))
+            return memo[(lo, hi)]
+
+        def path(index, lo, hi):
+            steps = []
+            while hi - lo > 1:
+                k = _split(hi - lo)
+                if index < lo + k:
+                    steps.append((binascii.hexlify(node(lo + k, hi)).decode(), False))
+                    hi = lo + k
+                else:
+                    steps.append((binascii.hexlify(node(lo, lo + k)).decode(), True))
+                    lo = lo + k
+            return steps[::-1]
+
+        def subproof(m, lo, hi, complete):
+            if m == hi - lo:
+                return [] if complete else [node(lo, hi)]
+            k = _split(hi - lo)
+            if m <= k:
+                return subproof(m, lo, lo + k, complete) + [node(lo + k, hi)]
+            return subproof(m - k, lo + k, hi, False) + [node(lo, lo + k)]
+
+        proofs = []
+        for i, digest in enumerate(digests):
+            proof_index, proof_path = signed_path(digest, path(old_length + i, 0, new_length))
+            proofs.append(serialize_proof(proof_index, proof_path, self.hash_type, self.uuid))
+
+        consistency = None
+        if old_length:
+            consistency = {
+                "hash_type": self.hash_type,
+                "old_length": old_length,
+                "new_length": new_length,
+                "old_root": self.rootHash.decode(),
+                "path": [
+                    binascii.hexlify(n).decode()
+                    for n in subproof(old_length, 0, new_length, True)
+                ]
+            }
+
+        self.frontier = [node(lo, hi) for lo, hi in self._ranges(new_length)]
+        self.length = new_length
+
+        if consistency:
+            consistency["new_root"] = self.rootHash.decode()
+        return proofs, consistency
+
+    def serialize(self):
+        """Serialize the state of the tree
+
+        Returns:
+            dict.
+        """
+        return {
+            "hash_type": self.hash_type,
+            "length": self.length,
+            "merkle_root": self.rootHash.decode() if self.frontier else None,
+            "frontier": [binascii.hexlify(n).decode() for n in self.frontier]
+        }
+
+    def export(self, file_path):
+        """Export the state of the tree
+
+        Args:
+            file_path (str): Output file.
+        """
+        with open(file_path, "w") as f:
+            json.dump(self.serialize(), f, indent=2)
+
+    @classmethod
+    def load(cls, file_path):
+        """Load the state of a tree
+
+        Args:
+            file_path (str): Path to the state file.
+
+        Returns:
+            pruvi.incremental.AppendOnlyTree.
+        """
+        with open(file_path) as f:
+            data = json.load(f)
+        return cls(
+            hash_type=data["hash_type"],
+            length=data["length"],
+            frontier=[binascii.unhexlify(n) for n in data["frontier"]]
+        )
+
+
+def verify_consistency(proof, old_root=None, new_root=None):
+    """Verify that a tree is a prefix of a bigger one
+
+    This follows the verification algorithm of RFC 9162 with the hashing rules of pruvi.
+
+    Args:
+        proof (dict): A consistency proof as created by AppendOnlyTree.extend.
+        old_root (str): The hex digest of the previous root. Default: the one in the proof.
+        new_root (str): The hex digest of the new root. Default: the one in the proof.
+
+    Returns:
+        bool.
+    """
+    hasher = get_hasher(proof["hash_type"])
+    old_root = old_root or proof["old_root"]
+    new_root = new_root or proof["new_root"]
+    first = proof["old_length"]
+    second = proof["new_length"]
+    path = list(proof["path"])
+
+    def h(left, right):
+        return hasher((left + right).encode()).hexdigest()
+
+    if first == second:
+        return not path and old_root == new_root
+    if first <= 0 or first > second:
+        return False
+
+    if first & (first - 1) == 0:
+        path.insert(0, old_root)
+    if not path:
+        return False
+
+    fn = first - 1
+    sn = second - 1
+    while fn & 1:
+        fn >>= 1
+        sn >>= 1
+
+    fr = sr = path[0]
+    for c in path[1:]:
+        if sn == 0:
+            return False
+        if fn & 1 or fn == sn:
+            fr = h(c, fr)
+            sr = h(c, sr)
+            if not fn & 1:
+                while not (fn & 1 or fn == 0):
+                    fn >>= 1
+                    sn >>= 1
+        else:
+            sr = h(sr, c)
+        fn >>= 1
+        sn >>= 1
+
+    return sn == 0 and fr == old_root and sr == new_root
@@ -2,14 +2,31 @@ import argparse
 import json
 import logging
 import os
+import shutil
 import sys
 
 import pruvi
-from pruvi.splitters.base import BaseSplitter
-from pruvi.splitters.audio_file import AudioFileSplitter
-from pruvi.splitters.binary_file import BinaryFileSplitter
-from pruvi.splitters.pdf_file import PDFFileSplitter
-from pruvi.splitters.text_file import TextFileSplitter
+
+# The modules needed by each subcommand are imported when it is run, so that commands
+# such as `pruvi validate` or `pruvi --version` do not load PyPDF2, pydub or pymerkle.
+
+
+def print_banner():
+    """Print the banner of the application"""
+    with open(
+        os.path.join(
+            os.path.dirname(pruvi.__file__),
+            ".banner.txt"
+        )
+    ) as iF:
+        banner = iF.read()
+
+    print(banner)
+    print("""
+                            Coded with ♥ by @febrezo
+
+        """)
+
 
 def main():
     """Main parser"""
@@ -19,20 +36,6 @@ def main():
         Returns:
             argparse.ArgumentParser.
         """
-        with open(
-            os.path.join(
-                os.path.dirname(pruvi.__file__),
-                ".banner.txt"
-            )
-        ) as iF:
-            banner = iF.read()
-
-        print(banner)
-        print("""
-                            Coded with ♥ by @febrezo
-
-        """)
-
         parser = argparse.ArgumentParser(
             description="Pruvi | A tool for generating partial proofs of big documents",
             epilog="For each subcommand, add '--help' for additional parameters.",
@@ -62,6 +65,12 @@ def main():
             choices=["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"],
             help="The log level to be set."
         )
+        about_parser.add_argument(
+            '-q', '--quiet',
+            action='store_true',
+            default=False,
+            help="does not print the banner."
+        )
 
         # Add subparsers
         # --------------
@@ -86,6 +95,139 @@ def main():
             default="./",
             help="The default output folder."
         )
+        generate_subparser.add_argument(
+            '-w', '--workers',
+            metavar='<WORKERS>',
+            action='store',
+            type=int,
+            default=1,
+            help="Number of workers used to render and hash the parts."
+        )
+        generate_subparser.add_argument(
+            '--executor',
+            metavar='<EXECUTOR>',
+            action='store',
+            choices=["thread", "process"],
+            default="thread",
+            help="Kind of pool used to hash the parts: thread or process."
+        )
+        generate_subparser.add_argument(
+            '--engine',
+            metavar='<ENGINE>',
+            action='store',
+            choices=["pymerkle", "native", "disk"],
+            default="pymerkle",
+            help="Merkle Tree implementation: pymerkle, native or disk. The disk engine keeps "
+                 "the digests and the levels of the tree in temporary files. The native engine is "
+                 "used instead of pymerkle for the hash types pymerkle does not support."
+        )
+        generate_subparser.add_argument(
+            '--memory-budget',
+            metavar='<MEGABYTES>',
+            action='store',
+            type=int,
+            default=64,
+            help="Approximate memory used by the disk engine to build the tree."
+        )
+        generate_subparser.add_argument(
+            '--hash',
+            metavar='<HASH_TYPE>',
+            action='store',
+            default="sha3_512",
+            help="Hash function of the tree: sha3_512, sha256, sha512, blake2b, blake2s or blake3 "
+                 "(if installed). Faster choices need --engine native when pymerkle does not "
+                 "support them."
+        )
+        generate_subparser.add_argument(
+            '--append',
+            action='store_true',
+            default=False,
+            help="Append the parts of the file that follow the ones of the export in the output "
+                 "folder. The file must start with the parts already exported."
+        )
+        generate_subparser.add_argument(
+            '--format',
+            metavar='<FORMAT>',
+            action='store',
+            choices=["json", "binary"],
+            default="json",
+            help="Format of the tree and proofs files: json or binary (tree.bin)."
+        )
+        generate_subparser.add_argument(
+            '--packed',
+            action='store_true',
+            default=False,
+            help="Write the parts in a single indexed pack and the proofs in tree.bin."
+        )
+        generate_subparser.add_argument(
+            '--metrics',
+            metavar='<METRICS_FILE>',
+            action='store',
+            help="A file where the timings and counters of each stage are written."
+        )
+        generate_subparser.add_argument(
+            '--metrics-format',
+            metavar='<FORMAT>',
+            action='store',
+            choices=["json", "prometheus"],
+            default="json",
+            help="Format of the metrics file: json or prometheus (textfile collector)."
+        )
+        generate_subparser.add_argument(
+            '--progress',
+            metavar='<SECONDS>',
+            action='store',
+            type=float,
+            default=5,
+            help="Seconds between progress messages. 0 disables them."
+        )
+        generate_subparser.add_argument(
+            '--pipeline',
+            metavar='<QUEUE_SIZE>',
+            action='store',
+            type=int,
+            default=0,
+            help="Stream the parts reading, hashing and writing them at the same time, with "
+                 "up to this many batches of parts waiting between two stages. It implies --stream."
+        )
+        generate_subparser.add_argument(
+            '--shard-size',
+            metavar='<PARTS>',
+            action='store',
+            type=int,
+            default=0,
+            help="Build the tree in shards of this many parts (rounded up to a power of two), "
+                 "--workers processes at a time, and merge them."
+        )
+        generate_subparser.add_argument(
+            '--shard-index',
+            metavar='<INDEX>',
+            action='store',
+            type=int,
+            help="Only build this shard (from 0) in the output folder, e.g. on another machine "
+                 "sharing it. Run with --merge once every shard is built."
+        )
+        generate_subparser.add_argument(
+            '--merge',
+            action='store_true',
+            default=False,
+            help="Merge the shards built in the output folder and export the tree and proofs."
+        )
+        generate_subparser.add_argument(
+            '--cache',
+            metavar='<CACHE_DB>',
+            action='store',
+            help="A SQLite database where the digests of the parts and of whole files are cached "
+                 "between runs."
+        )
+        generate_subparser.add_argument(
+            '--cache-size',
+            metavar='<MEGABYTES>',
+            action='store',
+            type=int,
+            default=256,
+            help="Maximum size of the digests kept in the cache database."
+        )
 
         # Add parsers for from files
         # --------------------------
@@ -115,6 +257,18 @@ def main():
             required=True,
             help="The seconds in which the audio will be splitted."
         )
+        audio_subparser.add_argument(
+            '--stream',
+            action='store_true',
+            default=False,
+            help="Write each segment as it is read keeping only its digest in memory."
+        )
+        audio_subparser.add_argument(
+            '--mmap',
+            action='store_true',
+            default=False,
+            help="Map WAV files in memory and slice their frames without reading them."
+        )
 
         # Binary subparser
         binary_subparser = from_subparsers.add_parser(
@@ -136,6 +290,59 @@ def main():
             required=True,
             help="Number of bytes to use to split."
         )
+        binary_subparser.add_argument(
+            '--stream',
+            action='store_true',
+            default=False,
+            help="Write each part as it is read keeping only its digest in memory."
+        )
+        binary_subparser.add_argument(
+            '--mmap',
+            action='store_true',
+            default=False,
+            help="Map the file in memory and split it without copying the chunks."
+        )
+
+        # Content-defined chunking subparser
+        cdc_subparser = from_subparsers.add_parser(
+            'cdc',
+            help='get proofs from the content-defined chunks of a file',
+            conflict_handler='resolve'
+        )
+        cdc_subparser.add_argument(
+            '-f', '--file',
+            metavar='<SOURCE_FILE>',
+            required=True,
+            help="the path to the given file to split."
+        )
+        cdc_subparser.add_argument(
+            '--avg-size',
+            metavar='<BYTE_NUMBER>',
+            action='store',
+            type=int,
+            default=8192,
+            help="Expected size of the chunks. It should be a power of two."
+        )
+        cdc_subparser.add_argument(
+            '--min-size',
+            metavar='<BYTE_NUMBER>',
+            action='store',
+            type=int,
+            help="Minimum size of the chunks. Default: a quarter of the expected size."
+        )
+        cdc_subparser.add_argument(
+            '--max-size',
+            metavar='<BYTE_NUMBER>',
+            action='store',
+            type=int,
+            help="Maximum size of the chunks. Default: eight times the expected size."
+        )
+        cdc_subparser.add_argument(
+            '--stream',
+            action='store_true',
+            default=False,
+            help="Write each chunk as it is found keeping only its digest in memory."
+        )
 
         # PDF subparser
         pdf_subparser = from_subparsers.add_parser(
@@ -149,6 +356,12 @@ def main():
             required=True,
             help="the path to the given file to split."
         )
+        pdf_subparser.add_argument(
+            '--stream',
+            action='store_true',
+            default=False,
+            help="Write each page as it is rendered keeping only its digest in memory."
+        )
 
         # Text file subparser
         text_file_subparser = from_subparsers.add_parser(
@@ -170,6 +383,87 @@ def main():
             default="lines",
             help="Method to split the file."
         )
+        text_file_subparser.add_argument(
+            '--stream',
+            action='store_true',
+            default=False,
+            help="Write each part as it is read keeping only its digest in memory."
+        )
+
+        # Subparser for splitting a whole directory
+        # -----------------------------------------
+        corpus_subparser = subparsers.add_parser(
+            'corpus',
+            help='Split every file of a directory under a single Merkle root.',
+        )
+        corpus_subparser.add_argument(
+            '-d', '--directory',
+            metavar='<DIRECTORY>',
+            required=True,
+            help="the path to the directory to split."
+        )
+        corpus_subparser.add_argument(
+            '-o', '--output-folder',
+            metavar='<OUTPUT_FOLDER>',
+            action='store',
+            default="./",
+            help="The default output folder."
+        )
+        corpus_subparser.add_argument(
+            '-w', '--workers',
+            metavar='<WORKERS>',
+            action='store',
+            type=int,
+            default=1,
+            help="Number of files split in parallel."
+        )
+        corpus_subparser.add_argument(
+            '--executor',
+            metavar='<EXECUTOR>',
+            action='store',
+            choices=["thread", "process"],
+            default="process",
+            help="Kind of pool used to split the files: thread or process."
+        )
+        corpus_subparser.add_argument(
+            '--hash',
+            metavar='<HASH_TYPE>',
+            action='store',
+            default="sha3_512",
+            help="Hash function of the trees."
+        )
+        corpus_subparser.add_argument(
+            '-b', '--bytes',
+            metavar='<BYTE_NUMBER>',
+            action='store',
+            type=int,
+            default=4096,
+            help="Number of bytes used to split binary files."
+        )
+        corpus_subparser.add_argument(
+            '-s', '--seconds',
+            metavar='<SECONDS>',
+            action='store',
+            type=int,
+            default=1,
+            help="The seconds in which audio files will be splitted."
+        )
+        corpus_subparser.add_argument(
+            '-m', '--method',
+            metavar='<METHOD>',
+            action='store',
+            choices=["lines", "paragraphs", "words"],
+            default="lines",
+            help="Method to split text files."
+        )
+        corpus_subparser.add_argument(
+            '--progress',
+            metavar='<SECONDS>',
+            action='store',
+            type=float,
+            default=5,
+            help="Seconds between progress messages. 0 disables them."
+        )
 
         # Subparser for validating proofs
         # -------------------------------
@@ -185,13 +479,11 @@ def main():
         template_main_subparser.add_argument(
             '-p', '--proof-file',
             metavar='<PROOF_FILE>',
-            required=True,
             help="the path to a Merkle proof."
         )
         template_main_subparser.add_argument(
             '-d', '--data-file',
             metavar='<DATA_FILE>',
-            required=True,
             help="the path to a data file."
         )
         template_main_subparser.add_argument(
@@ -201,48 +493,446 @@ def main():
             help="the Merkle root that allegedly contains that file."
         )
 
+        batch_subparser = validate_subparser.add_argument_group(
+            'Validate several proofs at once',
+            'Verify if a set of files and their proofs are linked to a given Merkle root hash.'
+        )
+        batch_subparser.add_argument(
+            '-e', '--export-folder',
+            metavar='<EXPORT_FOLDER>',
+            help="the path to an export folder whose parts will be verified."
+        )
+        batch_subparser.add_argument(
+            '--manifest',
+            metavar='<MANIFEST_FILE>',
+            help="the path to a JSON list of objects with 'data_file' and 'proof_file' keys."
+        )
+        batch_subparser.add_argument(
+            '--multiproof',
+            metavar='<MULTIPROOF_FILE>',
+            help="the path to a multi-proof written by 'pruvi disclose', next to its parts."
+        )
+        batch_subparser.add_argument(
+            '-w', '--workers',
+            metavar='<WORKERS>',
+            action='store',
+            type=int,
+            default=1,
+            help="Number of files verified in parallel."
+        )
+
+        # Subparser for extracting parts
+        # ------------------------------
+        extract_subparser = subparsers.add_parser(
+            'extract',
+            help='Extract a part and its proof from a packed export.',
+        )
+        extract_subparser.add_argument(
+            '-e', '--export-folder',
+            metavar='<EXPORT_FOLDER>',
+            required=True,
+            help="the path to an export created with --packed."
+        )
+        extract_subparser.add_argument(
+            '-n', '--part',
+            metavar='<PART_NUMBER>',
+            action='store',
+            type=int,
+            required=True,
+            help="the number of the part to extract, starting at 1."
+        )
+        extract_subparser.add_argument(
+            '-o', '--output-folder',
+            metavar='<OUTPUT_FOLDER>',
+            action='store',
+            default="./",
+            help="The folder where the part and its proof will be written."
+        )
+
+        # Subparser for disclosing parts
+        # ------------------------------
+        disclose_subparser = subparsers.add_parser(
+            'disclose',
+            help='Copy some parts of an export with a single multi-proof for all of them.',
+        )
+        disclose_subparser.add_argument(
+            '-e', '--export-folder',
+            metavar='<EXPORT_FOLDER>',
+            required=True,
+            help="the path to an export."
+        )
+        disclose_subparser.add_argument(
+            '-n', '--parts',
+            metavar='<PART_NUMBERS>',
+            nargs='+',
+            required=True,
+            help="the numbers of the parts to disclose, starting at 1, or ranges such as 10-20."
+        )
+        disclose_subparser.add_argument(
+            '-o', '--output-folder',
+            metavar='<OUTPUT_FOLDER>',
+            action='store',
+            default="./",
+            help="The folder where the parts and the multi-proof will be written."
+        )
+
+        # Subparser for serving verifications
+        # -----------------------------------
+        serve_subparser = subparsers.add_parser(
+            'serve',
+            help='Answer verification and extraction requests over a socket.',
+        )
+        serve_subparser.add_argument(
+            '-e', '--export-folder',
+            metavar='<EXPORT_FOLDER>',
+            action='append',
+            required=True,
+            help="the path to an export to serve. It can be repeated."
+        )
+        serve_subparser.add_argument(
+            '-s', '--socket',
+            metavar='<SOCKET_PATH>',
+            help="the path of the Unix socket to listen on."
+        )
+        serve_subparser.add_argument(
+            '--host',
+            metavar='<HOST>',
+            default="127.0.0.1",
+            help="The address to listen on when using --port."
+        )
+        serve_subparser.add_argument(
+            '--port',
+            metavar='<PORT>',
+            type=int,
+            help="the TCP port to listen on."
+        )
+        serve_subparser.add_argument(
+            '-w', '--workers',
+            metavar='<WORKERS>',
+            action='store',
+            type=int,
+            default=4,
+            help="Number of requests handled in parallel."
+        )
+
         return parser
 
     parser = get_parser()
 
     args = parser.parse_args()
 
+    if not args.quiet:
+        print_banner()
+
     logging.basicConfig(
         format='Pruvi [%(levelname)s] > %(message)s',
         level=logging.getLevelName(args.log_level)
     )
 
     if args.subcommand == "split":
+        from pruvi.cache import UNCACHED_HASH_TYPES, LeafCache
+        from pruvi.hashing import available_backends
+        from pruvi.metrics import Metrics
+
         logging.info(f"Launch splitter process for '{args.from_file}' files...")
 
+        if args.append and args.packed:
+            parser.error("--packed exports cannot be appended to.")
+
+        sharded = args.shard_size > 0 or args.shard_index is not None or args.merge
+        if sharded and (args.append or args.packed):
+            parser.error("Sharded exports cannot be packed or appended to.")
+        if args.shard_index is not None and args.shard_size <= 0:
+            parser.error("--shard-index needs --shard-size.")
+        shard_size = 1 << max(0, args.shard_size - 1).bit_length()
+        if args.shard_size > 0 and shard_size != args.shard_size:
+            logging.info(f"Shard size rounded up to {shard_size} parts.")
+        if args.hash not in available_backends():
+            parser.error(f"--hash must be one of: {', '.join(available_backends())}.")
+        if args.engine == "pymerkle" and not args.append and not sharded:
+            # Checked before splitting, since the tree is only built once every part is hashed
+            from pymerkle import MerkleTree
+            from pymerkle.exceptions import UnsupportedHashType
+
+            try:
+                MerkleTree(hash_type=args.hash, security=False, raw_bytes=True)
+            except UnsupportedHashType:
+                logging.warning(f"pymerkle does not support '{args.hash}'. Using the native engine.")
+                args.engine = "native"
+
+        metrics = Metrics(progress_interval=args.progress)
+
+        cache = None
+        part_cache = None
+        if args.cache:
+            cache = LeafCache(args.cache, max_size=args.cache_size * 2**20)
+            if args.hash in UNCACHED_HASH_TYPES:
+                logging.info(f"The digests of the parts are not cached: {args.hash} hashes about as fast as the cache is looked up.")
+            else:
+                part_cache = cache
+
+        file_key = None
+        known_digests = None
+        if cache is not None and not args.append and not sharded and args.from_file:
+            file_key = LeafCache.file_key(
+                args.file,
+                json.dumps({
+                    k: v for k, v in sorted(vars(args).items())
+                    if k in ("from_file", "bytes", "seconds", "method", "avg_size", "min_size", "max_size")
+                }),
+                hash_type=args.hash
+            )
+            cached = cache.get_file(file_key)
+            if cached:
+                known_digests, merkle_root = cached
+                logging.info(f"Digests of {len(known_digests)} parts of a tree with root '{merkle_root}' found in the cache.")
+
+        stream_options = {}
+        if getattr(args, "stream", False) or args.pipeline > 0:
+            stream_options = {
+                "output_folder": os.path.join(args.output_folder, "parts"),
+                "packed": args.packed,
+                "digests": known_digests,
+                "queue_size": args.pipeline
+            }
+
         if args.from_file == "audio":
-            splitter = AudioFileSplitter(file_path=args.file)
-            splitter.split_document(seconds=args.seconds)
+            from pruvi.splitters.audio_file import AudioFileSplitter
+
+            splitter = AudioFileSplitter(
+                file_path=args.file,
+                hash_type=args.hash,
+                engine=args.engine,
+                cache=part_cache,
+                metrics=metrics,
+                memory_budget=args.memory_budget * 2**20
+            )
+            options = {"seconds": args.seconds, "mmap": args.mmap}
         elif args.from_file == "binary":
-            splitter = BinaryFileSplitter(file_path=args.file)
-            splitter.split_document(size=args.bytes)
+            from pruvi.splitters.binary_file import BinaryFileSplitter
+
+            splitter = BinaryFileSplitter(
+                file_path=args.file,
+                hash_type=args.hash,
+                engine=args.engine,
+                cache=part_cache,
+                metrics=metrics,
+                memory_budget=args.memory_budget * 2**20
+            )
+            options = {"size": args.bytes, "mmap": args.mmap}
+        elif args.from_file == "cdc":
+            from pruvi.splitters.cdc_file import CDCFileSplitter
+
+            splitter = CDCFileSplitter(
+                file_path=args.file,
+                hash_type=args.hash,
+                engine=args.engine,
+                cache=part_cache,
+                metrics=metrics,
+                memory_budget=args.memory_budget * 2**20
+            )
+            options = {
+                "avg_size": args.avg_size,
+                "min_size": args.min_size,
+                "max_size": args.max_size
+            }
         elif args.from_file == "pdf":
-            splitter = PDFFileSplitter(file_path=args.file)
-            splitter.split_document()
+            from pruvi.splitters.pdf_file import PDFFileSplitter
+
+            splitter = PDFFileSplitter(
+                file_path=args.file,
+                hash_type=args.hash,
+                engine=args.engine,
+                cache=part_cache,
+                metrics=metrics,
+                memory_budget=args.memory_budget * 2**20
+            )
+            options = {"workers": args.workers}
         elif args.from_file == "text":
-            splitter = TextFileSplitter(file_path=args.file)
-            splitter.split_document(method=args.method)
+            from pruvi.splitters.text_file import TextFileSplitter
+
+            splitter = TextFileSplitter(
+                file_path=args.file,
+                hash_type=args.hash,
+                engine=args.engine,
+                cache=part_cache,
+                metrics=metrics,
+                memory_budget=args.memory_budget * 2**20
+            )
+            options = {"method": args.method}
         else:
             logging.error("No valid file type provided.")
             parser.print_help()
             sys.exit(1)
 
-        logging.info("Creating tree...")
-        splitter.create_tree()
+        if args.shard_index is not None:
+            from pruvi.shards import build_shard
 
-        logging.info(f"Tree created. Merkle root hash: '{splitter.tree.rootHash.decode()}'")
+            logging.info(f"Building shard {args.shard_index} of {shard_size} parts...")
+            shard = build_shard(
+                type(splitter),
+                args.file,
+                args.shard_index,
+                shard_size,
+                args.output_folder,
+                hash_type=args.hash,
+                options=options
+            )
+            logging.info(f"Shard built with {shard['length']} parts. Root hash: '{shard['root']}'")
+        elif sharded:
+            if args.merge:
+                logging.info("Merging the shards...")
+                splitter.merge_shards(args.output_folder)
+            else:
+                logging.info(f"Splitting in shards of {shard_size} parts with {args.workers} processes...")
+                splitter.split_sharded(args.output_folder, shard_size, workers=args.workers, **options)
+
+            logging.info(f"Tree merged. Merkle root hash: '{splitter.tree.rootHash.decode()}'")
+
+            logging.info("Exporting proofs...")
+            splitter.export(args.output_folder, format=args.format)
+            splitter.tree.close()
+            shutil.rmtree(os.path.join(args.output_folder, "shards"))
+        elif args.append:
+            logging.info("Appending to the previous tree...")
+            try:
+                splitter.append_document(
+                    args.output_folder,
+                    workers=args.workers,
+                    executor=args.executor,
+                    stream=bool(stream_options),
+                    queue_size=args.pipeline,
+                    **options
+                )
+            except ValueError as e:
+                logging.error(str(e))
+                sys.exit(1)
+
+            logging.info(f"Tree updated. Merkle root hash: '{splitter.tree.rootHash.decode()}'")
+        else:
+            splitter.split_document(**options, **stream_options)
+
+            logging.info("Creating tree...")
+            splitter.create_tree(
+                workers=args.workers,
+                executor=args.executor,
+                digests=None if stream_options else known_digests
+            )
+
+            logging.info(f"Tree created. Merkle root hash: '{splitter.tree.rootHash.decode()}'")
+
+            logging.info("Exporting proofs...")
+            splitter.export(args.output_folder, format=args.format, packed=args.packed)
+
+        if file_key is not None and known_digests is None:
+            cache.put_file(
+                file_key,
+                splitter.hash_type,
+                splitter.get_digests(),
+                splitter.tree.rootHash.decode()
+            )
+
+        metrics.log_summary()
+        if args.metrics:
+            logging.info(f"Writing metrics at '{args.metrics}'...")
+            metrics.export(args.metrics, format=args.metrics_format)
+
+        if cache is not None:
+            logging.info(f"Leaf cache: {cache.hits} hits, {cache.misses} misses.")
+            cache.close()
+    elif args.subcommand == "corpus":
+        from pruvi.corpus import CorpusSplitter
+        from pruvi.hashing import available_backends
+        from pruvi.metrics import Metrics
+
+        if args.hash not in available_backends():
+            parser.error(f"--hash must be one of: {', '.join(available_backends())}.")
+
+        logging.info(f"Launch corpus splitter process for '{args.directory}'...")
+        metrics = Metrics(progress_interval=args.progress)
+        corpus = CorpusSplitter(
+            args.directory,
+            hash_type=args.hash,
+            options={
+                "audio": {"seconds": args.seconds},
+                "binary": {"size": args.bytes},
+                "text": {"method": args.method}
+            },
+            metrics=metrics
+        )
+        corpus.split_corpus(args.output_folder, workers=args.workers, executor=args.executor)
+
+        logging.info(f"Creating the tree of {len(corpus.files)} files...")
+        corpus.create_tree()
+        logging.info(f"Tree created. Merkle root hash: '{corpus.tree.rootHash.decode()}'")
 
         logging.info("Exporting proofs...")
-        splitter.export(args.output_folder)
+        corpus.export(args.output_folder, workers=args.workers, executor=args.executor)
+        metrics.log_summary()
     elif args.subcommand == "validate":
-        logging.info(f"Launch verification process for '{args.data_file}'...")
+        from pruvi.batch import find_pairs, read_disclosure, read_manifest
+        from pruvi.splitters.base import BaseSplitter
+
         splitter = BaseSplitter()
-        splitter.verify_file(args.data_file, args.proof_file, args.merkle_root)
+
+        if args.multiproof:
+            data_files = read_disclosure(args.multiproof)
+            logging.info(f"Launch verification process for {len(data_files)} files...")
+            if not splitter.verify_multiproof(data_files, args.multiproof, args.merkle_root, workers=args.workers):
+                sys.exit(1)
+        elif args.export_folder or args.manifest:
+            if args.export_folder:
+                pairs = find_pairs(args.export_folder)
+            else:
+                pairs = read_manifest(args.manifest)
+
+            logging.info(f"Launch verification process for {len(pairs)} files...")
+            results = splitter.verify_files(pairs, args.merkle_root, workers=args.workers)
+            if not all(r for _, _, r in results):
+                sys.exit(1)
+        elif args.data_file and args.proof_file:
+            logging.info(f"Launch verification process for '{args.data_file}'...")
+            splitter.verify_file(args.data_file, args.proof_file, args.merkle_root)
+        else:
+            parser.error("validate needs either --data-file and --proof-file, --export-folder, --manifest or --multiproof.")
+    elif args.subcommand == "extract":
+        from pruvi.pack import extract
+
+        logging.info(f"Extracting part {args.part} from '{args.export_folder}'...")
+        try:
+            data_file, proof_file = extract(args.export_folder, args.part, args.output_folder)
+        except IndexError:
+            logging.error(f"The export has no part {args.part}.")
+            sys.exit(1)
+        logging.info(f"Part written to '{data_file}' and its proof to '{proof_file}'.")
+    elif args.subcommand == "disclose":
+        from pruvi.batch import disclose, parse_numbers
+
+        try:
+            numbers = parse_numbers(args.parts)
+        except ValueError as e:
+            parser.error(str(e))
+
+        logging.info(f"Disclosing {len(numbers)} parts of '{args.export_folder}'...")
+        try:
+            data_files, proof_file = disclose(args.export_folder, numbers, args.output_folder)
+        except (IndexError, KeyError):
+            logging.error("The export does not have all those parts.")
+            sys.exit(1)
+        logging.info(f"{len(data_files)} parts written to '{args.output_folder}' with the multi-proof '{proof_file}'.")
+    elif args.subcommand == "serve":
+        import asyncio
+
+        from pruvi.server import VerificationServer
+
+        if not args.socket and args.port is None:
+            parser.error("serve needs either --socket or --port.")
+
+        server = VerificationServer(args.export_folder, workers=args.workers)
+        try:
+            asyncio.run(server.serve_forever(socket_path=args.socket, host=args.host, port=args.port))
+        except KeyboardInterrupt:
+            logging.info("Server stopped.")
     else:
         logging.error(f"'{args.subcommand}' is not a valid subcommand.")
         parser.print_help()
@@ -0,0 +1,192 @@
+import collections
+import contextlib
+import json
+import logging
+import time
+
+STAGES = ["read", "split", "hash", "tree", "proofs", "write"]
+"""Stages of the split pipeline, in the order they are reported"""
+
+
+class Metrics(object):
+    """Timers, counters and progress of a run
+
+    Each stage accumulates the seconds spent in it, the number of items processed and
+    their size in bytes. Stages may be nested: for instance, the time spent reading a
+    file is also part of the time spent splitting it.
+
+    Attributes:
+        progress_interval (float): Minimum number of seconds between two progress
+            messages of the same stage. 0 disables them.
+    """
+    def __init__(self, progress_interval=5.0):
+        """Constructor
+
+        Args:
+            progress_interval (float): Minimum number of seconds between two progress
+                messages of the same stage. 0 disables them. Default: 5.
+        """
+        self.progress_interval = progress_interval
+        self._stages = collections.OrderedDict(
+            (name, {"seconds": 0.0, "items": 0, "bytes": 0}) for name in STAGES
+        )
+        self._started = {}
+        self._reported = {}
+
+    def _get(self, name):
+        if name not in self._stages:
+            self._stages[name] = {"seconds": 0.0, "items": 0, "bytes": 0}
+        return self._stages[name]
+
+    def add(self, name, items=0, nbytes=0, seconds=0.0):
+        """Add to the counters of a stage
+
+        Args:
+            name (str): Name of the stage.
+            items (int): Number of items processed.
+            nbytes (int): Number of bytes processed.
+            seconds (float): Time spent.
+        """
+        stage = self._get(name)
+        stage["items"] += items
+        stage["bytes"] += nbytes
+        stage["seconds"] += seconds
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        """Time a block of code as part of a stage
+
+        Args:
+            name (str): Name of the stage.
+        """
+        self._started.setdefault(name, time.monotonic())
+        start = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self._get(name)["seconds"] += time.perf_counter() - start
+
+    def track(self, name, iterable, total=None):
+        """Time and count the items produced by an iterable
+
+        Only the time spent producing each item is accounted to the stage, not the time
+        spent by the caller handling it.
+
+        Args:
+            name (str): Name of the stage.
+            iterable (iterable): Iterable of bytes-like objects.
+            total (int): Expected number of items, used to estimate the remaining time.
+
+        Yields:
+            The items of the iterable.
+        """
+        stage = self._get(name)
+        self._started.setdefault(name, time.monotonic())
+        iterator = iter(iterable)
+        while 1:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                stage["seconds"] += time.perf_counter() - start
+                return
+            stage["seconds"] += time.perf_counter() - start
+            stage["items"] += 1
+            stage["bytes"] += memoryview(item).nbytes
+            self.report(name, total)
+            yield item
+
+    def report(self, name, total=None):
+        """Log the progress of a stage if it was not logged recently
+
+        Args:
+            name (str): Name of the stage.
+            total (int): Expected number of items, used to estimate the remaining time.
+        """
+        if not self.progress_interval:
+            return
+        now = time.monotonic()
+        started = self._started.setdefault(name, now)
+        if now - self._reported.get(name, started) < self.progress_interval:
+            return
+        self._reported[name] = now
+
+        stage = self._stages[name]
+        elapsed = now - started
+        rate = stage["items"] / elapsed if elapsed else 0
+        message = f"{name}: {stage['items']}"
+        if total:
+            message += f"/{total} items ({100 * stage['items'] / total:.1f}%)"
+        else:
+            message += " items"
+        message += f", {rate:.0f} items/s, {stage['bytes'] / 2**20 / elapsed:.2f} MB/s"
+        if total and rate:
+            message += f", ETA {(total - stage['items']) / rate:.0f}s"
+        logging.info(message)
+
+    def serialize(self):
+        """Serialize the metrics, with the rates of each stage
+
+        Returns:
+            dict.
+        """
+        stages = collections.OrderedDict()
+        for name, stage in self._stages.items():
+            if not (stage["seconds"] or stage["items"]):
+                continue
+            seconds = stage["seconds"]
+            stages[name] = dict(
+                stage,
+                items_per_second=stage["items"] / seconds if seconds else None,
+                mb_per_second=stage["bytes"] / 2**20 / seconds if seconds else None
+            )
+        return {"stages": stages}
+
+    def to_prometheus(self):
+        """Render the metrics in the Prometheus text format
+
+        Returns:
+            str.
+        """
+        stages = self.serialize()["stages"]
+        lines = []
+        for metric, key, description in [
+            ("pruvi_stage_seconds", "seconds", "Time spent in each stage of the split pipeline."),
+            ("pruvi_stage_items", "items", "Items processed in each stage of the split pipeline."),
+            ("pruvi_stage_bytes", "bytes", "Bytes processed in each stage of the split pipeline."),
+        ]:
+            lines.append(f"# HELP {metric} {description}")
+            lines.append(f"# TYPE {metric} gauge")
+            for name, stage in stages.items():
+                lines.append(f'{metric}{{stage="{name}"}} {stage[key]}')
+        return "\n".join(lines) + "\n"
+
+    def log_summary(self):
+        """Log the time and rates of each stage"""
+        for name, stage in self.serialize()["stages"].items():
+            message = f"{name}: {stage['seconds']:.3f}s"
+            if stage["items"] and stage["items_per_second"]:
+                message += f", {stage['items']} items ({stage['items_per_second']:.0f} items/s)"
+            if stage["bytes"] and stage["mb_per_second"]:
+                message += f", {stage['mb_per_second']:.2f} MB/s"
+            logging.info(message)
+
+    def export(self, file_path, format="json"):
+        """Export the metrics
+
+        Args:
+            file_path (str): Output file.
+            format (str): One of the following: "json", "prometheus". Default: "json".
+
+        Raises:
+            ValueError: if the format is not valid.
+        """
+        if format == "json":
+            content = json.dumps(self.serialize(), indent=2)
+        elif format == "prometheus":
+            content = self.to_prometheus()
+        else:
+            raise ValueError(f"'{format}' is not a valid metrics format.")
+
+        with open(file_path, "w") as f:
+            f.write(content)
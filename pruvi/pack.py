@@ -0,0 +1,193 @@
+import array
+import json
+import mmap
+import os
+import struct
+import sys
+
+from pruvi.container import ContainerReader
+
+MAGIC = b"PRUVX\x01"
+"""Signature and version of the index of a pack"""
+
+_HEADER = struct.Struct("<6sI")
+
+
+class PackWriter(object):
+    """Writer of packed parts
+
+    All the parts are concatenated in a single `parts.pack` file and their offsets are
+    stored in a `parts.idx` file, so that millions of parts do not become millions of
+    files.
+
+    Attributes:
+        folder (str): The folder where the pack is written.
+        extension (str): The extension of the original file.
+    """
+    def __init__(self, folder, extension=""):
+        """Constructor
+
+        Args:
+            folder (str): The folder where the pack is written.
+            extension (str): The extension of the original file.
+        """
+        if not os.path.exists(folder):
+            os.makedirs(folder)
+
+        self.folder = folder
+        self.extension = extension
+        self._offsets = array.array("Q", [0])
+        self._data = open(os.path.join(folder, "parts.pack"), "wb")
+
+    def add(self, part):
+        """Append a part to the pack
+
+        Args:
+            part (bytes): Any bytes-like object.
+        """
+        self._data.write(part)
+        self._offsets.append(self._offsets[-1] + memoryview(part).nbytes)
+
+    def close(self):
+        """Close the pack and write its index"""
+        self._data.close()
+
+        header = json.dumps({
+            "extension": self.extension,
+            "length": len(self._offsets) - 1
+        }).encode()
+
+        offsets = array.array("Q", self._offsets)
+        if sys.byteorder != "little":
+            offsets.byteswap()
+
+        with open(os.path.join(self.folder, "parts.idx"), "wb") as f:
+            f.write(_HEADER.pack(MAGIC, len(header)))
+            f.write(header)
+            f.write(offsets.tobytes())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class PackReader(object):
+    """Reader of packed parts
+
+    The index and the pack are memory-mapped, so getting a part only reads its two index
+    entries and its bytes, whatever the number of parts.
+
+    Attributes:
+        extension (str): The extension of the original file.
+        length (int): Number of parts.
+    """
+    def __init__(self, folder):
+        """Constructor
+
+        Args:
+            folder (str): The folder where the pack was written.
+
+        Raises:
+            ValueError: if the index is not a pruvi pack index.
+        """
+        with open(os.path.join(folder, "parts.idx"), "rb") as f:
+            self._index = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, size = _HEADER.unpack_from(self._index, 0)
+        if magic != MAGIC:
+            self._index.close()
+            raise ValueError(f"'{folder}' does not contain a pruvi pack.")
+
+        header = json.loads(self._index[_HEADER.size:_HEADER.size + size])
+        self.extension = header["extension"]
+        self.length = header["length"]
+        self._offsets = _HEADER.size + size
+
+        with open(os.path.join(folder, "parts.pack"), "rb") as f:
+            if os.fstat(f.fileno()).st_size:
+                self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                self._data = b""
+
+    def close(self):
+        """Close the index and the pack"""
+        self._index.close()
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def max_part_size(self):
+        """Get the size of the largest part
+
+        The index is scanned in chunks, so that memory use does not grow with the number of
+        parts.
+
+        Returns:
+            int. Size in bytes, or 0 if there is no part.
+        """
+        largest = 0
+        step = 2**16
+        for first in range(0, self.length, step):
+            count = min(step, self.length - first)
+            offsets = array.array("Q")
+            offsets.frombytes(self._index[self._offsets + 8 * first:self._offsets + 8 * (first + count + 1)])
+            if sys.byteorder != "little":
+                offsets.byteswap()
+            largest = max(largest, max(offsets[i + 1] - offsets[i] for i in range(count)))
+        return largest
+
+    def get_part(self, index):
+        """Get a part without copying it
+
+        Args:
+            index (int): Zero-based index of the part.
+
+        Returns:
+            memoryview.
+
+        Raises:
+            IndexError: if there is no such part.
+        """
+        if not 0 <= index < self.length:
+            raise IndexError("part index out of range")
+        start, end = struct.unpack_from("<QQ", self._index, self._offsets + 8 * index)
+        return memoryview(self._data)[start:end]
+
+
+def extract(export_folder, number, output_folder="./"):
+    """Extract a single part and its proof from a packed export
+
+    Only the index entries of the part and the proof record are read, whatever the number
+    of parts in the export.
+
+    Args:
+        export_folder (str): Folder of a packed export.
+        number (int): Number of the part, starting at 1.
+        output_folder (str): The folder where the part and its proof will be written.
+
+    Returns:
+        tuple. The paths to the part and to its proof.
+    """
+    with ContainerReader(os.path.join(export_folder, "tree.bin")) as container:
+        proof = container.get_proof(number - 1)
+
+    if not os.path.exists(output_folder):
+        os.makedirs(output_folder)
+
+    with PackReader(os.path.join(export_folder, "parts")) as pack:
+        output_file = os.path.join(output_folder, f"part-{number}{pack.extension}")
+        with open(output_file, "wb") as f:
+            f.write(pack.get_part(number - 1))
+
+    output_file_proof = os.path.join(output_folder, f"part-{number}-proof.json")
+    with open(output_file_proof, "w") as f:
+        f.write(json.dumps(proof, indent=2))
+
+    return output_file, output_file_proof
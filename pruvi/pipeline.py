@@ -0,0 +1,144 @@
+import queue
+import threading
+
+_DONE = object()
+
+
+def iter_batches(parts, max_items=256, max_bytes=2**20):
+    """Group consecutive parts in lists
+
+    Passing batches instead of single parts between threads keeps the cost of the queues
+    negligible for small parts such as the lines of a text file.
+
+    Args:
+        parts (iterable): Iterable of bytes-like objects.
+        max_items (int): Maximum number of parts in a batch. Default: 256.
+        max_bytes (int): A batch is closed as soon as it holds this many bytes. Default: 1 MiB.
+
+    Yields:
+        list.
+    """
+    batch = []
+    size = 0
+    for part in parts:
+        batch.append(part)
+        size += memoryview(part).nbytes
+        if len(batch) >= max_items or size >= max_bytes:
+            yield batch
+            batch = []
+            size = 0
+    if batch:
+        yield batch
+
+
+class Pipeline(object):
+    """Reader, hasher and writer stages connected by bounded queues
+
+    A reader thread pulls the parts from their iterable and hands them to the hasher, which
+    runs in the calling thread, and to a writer thread. Hashing, reading and writing then
+    overlap, since hashlib and file I/O release the GIL, while the bounded queues cap the
+    number of parts held in memory at once. The first error raised by any stage stops the
+    others and is raised again by `run`.
+
+    Attributes:
+        queue_size (int): Maximum number of batches waiting in each queue.
+    """
+    def __init__(self, queue_size=8):
+        """Constructor
+
+        Args:
+            queue_size (int): Maximum number of batches waiting in each queue. Default: 8.
+        """
+        self.queue_size = max(1, queue_size)
+        self._stop = threading.Event()
+        self._errors = []
+
+    def _put(self, q, item):
+        """Put an item in a queue unless the pipeline was stopped"""
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _get(self, q):
+        """Get an item from a queue, or _DONE if the pipeline was stopped"""
+        while not self._stop.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        return _DONE
+
+    def _fail(self, error):
+        self._errors.append(error)
+        self._stop.set()
+
+    def _read(self, batches, queues):
+        try:
+            for batch in batches:
+                for q in queues:
+                    if not self._put(q, batch):
+                        return
+        except BaseException as e:
+            self._fail(e)
+        finally:
+            for q in queues:
+                self._put(q, _DONE)
+
+    def _write(self, q, write_part):
+        try:
+            while 1:
+                batch = self._get(q)
+                if batch is _DONE:
+                    return
+                for part in batch:
+                    write_part(part)
+        except BaseException as e:
+            self._fail(e)
+
+    def run(self, parts, hash_part, write_part, digests=None):
+        """Hash and write every part
+
+        Args:
+            parts (iterable): Iterable of bytes-like objects.
+            hash_part (callable): Function returning the digest of a part. It is called in
+                the order of the parts.
+            write_part (callable): Function writing a part. It is called in the order of
+                the parts, from another thread.
+            digests (list): Collection of the digests with an `extend` method, such as a
+                pruvi.tree.DiskMerkleTree. Default: a new list.
+
+        Returns:
+            list. The digests of the parts, in order.
+        """
+        hash_queue = queue.Queue(self.queue_size)
+        write_queue = queue.Queue(self.queue_size)
+        reader = threading.Thread(
+            target=self._read,
+            args=(iter_batches(parts), [hash_queue, write_queue]),
+            daemon=True
+        )
+        writer = threading.Thread(target=self._write, args=(write_queue, write_part), daemon=True)
+        reader.start()
+        writer.start()
+
+        if digests is None:
+            digests = []
+        try:
+            while 1:
+                batch = self._get(hash_queue)
+                if batch is _DONE:
+                    break
+                digests.extend(hash_part(part) for part in batch)
+        except BaseException as e:
+            self._fail(e)
+        finally:
+            reader.join()
+            writer.join()
+
+        if self._errors:
+            raise self._errors[0]
+        return digests
@@ -0,0 +1,504 @@
+import binascii
+import collections.abc
+import time
+import uuid
+
+from pruvi.hashing import get_hasher
+
+
+def build_levels(digests, hash_type="sha3_512"):
+    """Build every level of a Merkle tree from its leaf digests
+
+    Each level is stored as a single buffer of fixed-width raw digests. The tree has the
+    same shape and hashing rules as the one built by pymerkle (no security prefixes, raw
+    bytes): an interior node is the digest of the concatenated hex digests of its
+    children and the last node of a level with an odd length is promoted as it is.
+
+    Args:
+        digests (list): Hex digests of the leaves.
+        hash_type (str): The hash type to be used.
+
+    Returns:
+        list. Buffers of raw digests, from the leaves to the root.
+    """
+    levels = [b"".join(binascii.unhexlify(d) for d in digests)]
+    while len(levels[-1]) > get_hasher(hash_type)().digest_size:
+        levels.append(hash_level(levels[-1], hash_type))
+    return levels
+
+
+def hash_level(level, hash_type="sha3_512"):
+    """Compute the parent level of a level
+
+    Since two siblings are contiguous in the level buffer, the hex string fed to the
+    hash function for a pair is a plain slice of the hexlified level.
+
+    Args:
+        level (bytes): Buffer of raw digests.
+        hash_type (str): The hash type to be used.
+
+    Returns:
+        bytes. Buffer of raw digests of the parent level.
+    """
+    hasher = get_hasher(hash_type)
+    width = hasher().digest_size
+    count = len(level) // width
+    pairs = memoryview(binascii.hexlify(level))
+    step = 4 * width
+
+    parents = [hasher(pairs[i:i + step]).digest() for i in range(0, (count // 2) * step, step)]
+    if count % 2:
+        parents.append(bytes(level[-width:]))
+    return b"".join(parents)
+
+
+def audit_steps(levels, index, width, hex_levels=None, counts=None):
+    """Get the audit path of a leaf, from the bottom to the top
+
+    Args:
+        levels (list): Buffers of raw digests, from the leaves to the root.
+        index (int): Zero-based index of the leaf.
+        width (int): Size in bytes of a digest.
+        hex_levels (list): The levels already hexlified, to share them between calls.
+        counts (list): The number of nodes of each level, to share them between calls.
+
+    Returns:
+        list. Tuples of the hex digest of the sibling and whether it is on the left.
+    """
+    if counts is None:
+        counts = [len(level) // width for level in levels]
+
+    steps = []
+    j = index
+    step = 2 * width
+    for k in range(len(levels) - 1):
+        if j % 2:
+            sibling = j - 1
+        elif j + 1 < counts[k]:
+            sibling = j + 1
+        else:
+            j //= 2
+            continue
+
+        if hex_levels:
+            digest = hex_levels[k][step * sibling:step * (sibling + 1)]
+        else:
+            digest = binascii.hexlify(levels[k][sibling * width:(sibling + 1) * width]).decode()
+        steps.append((digest, sibling < j))
+        j //= 2
+    return steps
+
+
+def signed_path(leaf, steps):
+    """Convert an audit path into a pymerkle-like signed path
+
+    In a signed path, +1 means that the element is paired with its right neighbour and -1
+    with its left one. Siblings on the left are prepended and siblings on the right are
+    appended, each of them signed with the side of the node resulting from the pairing.
+
+    Args:
+        leaf (str): Hex digest of the leaf.
+        steps (list): Tuples of the hex digest of the sibling and whether it is on the
+            left, from the bottom to the top.
+
+    Returns:
+        tuple. The proof index and the list of signed hashes.
+    """
+    left = []
+    right = []
+    # The side of the node resulting from a pairing is given by the next sibling, while
+    # pymerkle signs the siblings of the root after their own side
+    sides = [not on_left for _, on_left in steps[1:]] + [steps[-1][1]] if steps else []
+    for (digest, on_left), parent_on_left in zip(steps, sides):
+        sign = +1 if parent_on_left else -1
+        if on_left:
+            left.append([sign, digest])
+        else:
+            right.append([sign, digest])
+
+    leaf_sign = -1 if steps and steps[0][1] else +1
+    return len(left), left[::-1] + [[leaf_sign, leaf]] + right
+
+
+def resolve_path(proof_index, proof_path, hash_type="sha3_512"):
+    """Compute the root resulting from a signed path
+
+    This follows the same parenthetization rules as pymerkle: an element signed with +1
+    is paired with its right neighbour and one signed with -1 with its left one, starting
+    at the proof index.
+
+    Args:
+        proof_index (int): Position in the path where the resolution starts.
+        proof_path (list): List of signed hex digests.
+        hash_type (str): The hash type used by the tree.
+
+    Returns:
+        bytes. The resulting hex digest.
+
+    Raises:
+        AttributeError: if the hash type is not valid.
+        IndexError: if the path is not well formed.
+    """
+    hasher = get_hasher(hash_type)
+    path = [(sign, digest.encode() if isinstance(digest, str) else digest) for sign, digest in proof_path]
+    if not path:
+        raise IndexError("empty proof path")
+
+    i = proof_index
+    while len(path) > 1:
+        if path[i][0] == +1:
+            sign = +1 if i == 0 else path[i + 1][0]
+            digest = hasher(path[i][1] + path[i + 1][1]).hexdigest().encode()
+            path[i] = (sign, digest)
+            del path[i + 1]
+        else:
+            sign = path[i - 1][0]
+            digest = hasher(path[i - 1][1] + path[i][1]).hexdigest().encode()
+            path[i] = (sign, digest)
+            del path[i - 1]
+            i -= 1
+    return path[0][1]
+
+
+def validate_proof(data, target):
+    """Validate a serialized proof against a root
+
+    Args:
+        data (dict): A serialized Merkle proof.
+        target (bytes): The hex digest of the root.
+
+    Returns:
+        bool.
+    """
+    if isinstance(target, str):
+        target = target.encode()
+
+    try:
+        root = resolve_path(
+            data["body"]["proof_index"],
+            data["body"]["proof_path"],
+            data["header"]["hash_type"]
+        )
+    except (AttributeError, IndexError, KeyError, TypeError):
+        return False
+    return root == target
+
+
+def serialize_proof(proof_index, proof_path, hash_type="sha3_512", provider=None, commitment=None,
+                    proof_uuid=None, now=None):
+    """Serialize a proof with the same layout as a pymerkle proof
+
+    Args:
+        proof_index (int): Position in the path where the validation starts.
+        proof_path (list): List of signed hex digests.
+        hash_type (str): The hash type used by the tree.
+        provider (str): Identifier of the tree that provided the proof.
+        commitment (str): Root of the tree, if it has to be included.
+        proof_uuid (str): Identifier of the proof. A new one is created if not provided.
+        now (float): Creation time of the proof. Default: the current time.
+
+    Returns:
+        dict.
+    """
+    if now is None:
+        now = time.time()
+    return {
+        "header": {
+            "uuid": proof_uuid or str(uuid.uuid1()),
+            "timestamp": int(now),
+            "creation_moment": time.ctime(now),
+            "provider": provider,
+            "hash_type": hash_type,
+            "encoding": "utf_8",
+            "raw_bytes": True,
+            "security": False,
+            "commitment": commitment,
+            "status": None
+        },
+        "body": {
+            "proof_index": proof_index,
+            "proof_path": proof_path
+        }
+    }
+
+
+def _level_counts(length):
+    """Number of nodes of each level of a tree with `length` leaves"""
+    counts = [length]
+    while counts[-1] > 1:
+        counts.append((counts[-1] + 1) // 2)
+    return counts
+
+
+def multiproof_nodes(levels, indices, width):
+    """Get the sibling digests needed to rebuild the root from a set of leaves
+
+    Going up from the leaves, the sibling of each known node is added unless it is known
+    too, since it is either one of the leaves or computed from them. The siblings are
+    listed level by level, from left to right, which is the order in which
+    `resolve_multiproof` consumes them.
+
+    Args:
+        levels (list): Buffers of raw digests, from the leaves to the root.
+        indices (list): Sorted zero-based indices of the leaves.
+        width (int): Size in bytes of a digest.
+
+    Returns:
+        list. Hex digests.
+    """
+    counts = [len(level) // width for level in levels]
+    nodes = []
+    known = list(indices)
+    for k in range(len(levels) - 1):
+        known_set = set(known)
+        for j in known:
+            sibling = j - 1 if j % 2 else j + 1
+            if sibling < counts[k] and sibling not in known_set:
+                nodes.append(
+                    binascii.hexlify(levels[k][sibling * width:(sibling + 1) * width]).decode()
+                )
+        known = sorted(set(j // 2 for j in known))
+    return nodes
+
+
+def resolve_multiproof(length, indices, leaves, nodes, hash_type="sha3_512"):
+    """Compute the root resulting from a set of leaves and their multi-proof nodes
+
+    Every node is hashed once, so the cost depends on the number of leaves disclosed and
+    not on the number of leaves times the height of the tree.
+
+    Args:
+        length (int): Number of leaves of the tree.
+        indices (list): Sorted zero-based indices of the leaves.
+        leaves (list): Hex digests of the leaves, in the order of the indices.
+        nodes (list): Hex digests of the siblings, as given by `multiproof_nodes`.
+        hash_type (str): The hash type used by the tree.
+
+    Returns:
+        bytes. The resulting hex digest.
+
+    Raises:
+        AttributeError: if the hash type is not valid.
+        IndexError: if the multi-proof is not well formed.
+    """
+    hasher = get_hasher(hash_type)
+    if not indices or len(indices) != len(leaves):
+        raise IndexError("the multi-proof has no leaves or not one per index")
+    if any(b <= a for a, b in zip(indices, indices[1:])) or not 0 <= indices[0] <= indices[-1] < length:
+        raise IndexError("the leaf indices are not sorted or out of range")
+
+    known = {j: digest.encode() if isinstance(digest, str) else digest for j, digest in zip(indices, leaves)}
+    siblings = iter(nodes)
+    for count in _level_counts(length)[:-1]:
+        parents = {}
+        for j in sorted(known):
+            if j // 2 in parents:
+                continue
+            sibling = j - 1 if j % 2 else j + 1
+            if sibling >= count:
+                # The last node of a level with an odd length is promoted as it is
+                parents[j // 2] = known[j]
+                continue
+            if sibling in known:
+                other = known[sibling]
+            else:
+                try:
+                    other = next(siblings)
+                except StopIteration:
+                    raise IndexError("the multi-proof lacks some nodes")
+                other = other.encode() if isinstance(other, str) else other
+            left, right = (other, known[j]) if j % 2 else (known[j], other)
+            parents[j // 2] = hasher(left + right).hexdigest().encode()
+        known = parents
+
+    if next(siblings, None) is not None:
+        raise IndexError("the multi-proof has unused nodes")
+    return known[0]
+
+
+def generate_multiproof(levels, indices, hash_type="sha3_512", provider=None, now=None):
+    """Generate a single proof for several leaves of a tree
+
+    Args:
+        levels (list): Buffers of raw digests, from the leaves to the root.
+        indices (list): Zero-based indices of the leaves.
+        hash_type (str): The hash type used by the tree.
+        provider (str): Identifier of the tree that provided the proof.
+        now (float): Creation time of the proof. Default: the current time.
+
+    Returns:
+        dict.
+
+    Raises:
+        IndexError: if a leaf is out of range.
+    """
+    width = get_hasher(hash_type)().digest_size
+    length = len(levels[0]) // width
+    indices = sorted(set(indices))
+    if not indices or not 0 <= indices[0] <= indices[-1] < length:
+        raise IndexError("leaf index out of range")
+
+    leaves = [binascii.hexlify(levels[0][j * width:(j + 1) * width]).decode() for j in indices]
+    proof = serialize_proof(None, None, hash_type, provider, now=now)
+    proof["body"] = {
+        "length": length,
+        "indices": indices,
+        "leaves": leaves,
+        "nodes": multiproof_nodes(levels, indices, width)
+    }
+    return proof
+
+
+def validate_multiproof(data, target):
+    """Validate a serialized multi-proof against a root
+
+    Args:
+        data (dict): A serialized multi-proof.
+        target (bytes): The hex digest of the root.
+
+    Returns:
+        bool.
+    """
+    if isinstance(target, str):
+        target = target.encode()
+
+    try:
+        root = resolve_multiproof(
+            data["body"]["length"],
+            data["body"]["indices"],
+            data["body"]["leaves"],
+            data["body"]["nodes"],
+            data["header"]["hash_type"]
+        )
+    except (AttributeError, IndexError, KeyError, TypeError):
+        return False
+    return root == target
+
+
+class ProofList(collections.abc.Sequence):
+    """Lazy sequence with the audit proofs of all the leaves of a tree
+
+    The levels are hexlified a single time and shared by all the proofs, which are built
+    on access instead of walking the tree and building a new proof object for every leaf.
+    This keeps the memory used proportional to the size of the tree and not to the size of
+    all its proofs. Levels stored on disk are not hexlified, and only the nodes of each
+    proof are read.
+
+    Attributes:
+        levels (list): Buffers of raw digests, from the leaves to the root.
+        hash_type (str): The hash type used by the tree.
+        provider (str): Identifier of the tree that provided the proofs.
+    """
+    def __init__(self, levels, hash_type="sha3_512", provider=None, cache=True):
+        """Constructor
+
+        Args:
+            levels (list): Buffers of raw digests, from the leaves to the root, or views
+                of level files such as pruvi.tree.LevelFile.
+            hash_type (str): The hash type used by the tree.
+            provider (str): Identifier of the tree that provided the proofs.
+            cache (bool): Whether to hexlify the levels once for all the proofs. It
+                should be disabled for levels that do not fit in memory. Default: True.
+        """
+        self.levels = levels
+        self.hash_type = hash_type
+        self.provider = provider
+        self._width = get_hasher(hash_type)().digest_size
+        self._hex_levels = [binascii.hexlify(level).decode() for level in levels] if cache else None
+        self._counts = [len(level) // self._width for level in levels]
+        self._now = time.time()
+        self._uuid = uuid.uuid1().int
+
+    def __len__(self):
+        return self._counts[0] if self.levels else 0
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("proof index out of range")
+
+        if self._hex_levels:
+            step = 2 * self._width
+            leaf = self._hex_levels[0][step * index:step * (index + 1)]
+        else:
+            leaf = binascii.hexlify(self.levels[0][self._width * index:self._width * (index + 1)]).decode()
+        proof_index, proof_path = signed_path(
+            leaf,
+            audit_steps(
+                self.levels,
+                index,
+                self._width,
+                hex_levels=self._hex_levels,
+                counts=self._counts
+            )
+        )
+        return serialize_proof(
+            proof_index,
+            proof_path,
+            self.hash_type,
+            self.provider,
+            proof_uuid=str(uuid.UUID(int=(self._uuid + index) % 2 ** 128)),
+            now=self._now
+        )
+
+
+class AuditProofList(collections.abc.Sequence):
+    """Lazy sequence with the audit proofs of a pymerkle tree
+
+    Each proof is asked to the tree on access, so the tree is the only structure kept in
+    memory and no proof is built before it is written. The proofs are built from the audit
+    path of each leaf index, since `MerkleTree.auditProof` looks the leaf up by its digest
+    and would give the proof of the first of several identical parts.
+
+    Attributes:
+        tree (pymerkle.MerkleTree): The tree that provides the proofs.
+    """
+    def __init__(self, tree):
+        """Constructor
+
+        Args:
+            tree (pymerkle.MerkleTree): The tree that provides the proofs.
+        """
+        self.tree = tree
+
+    def __len__(self):
+        return self.tree.length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("proof index out of range")
+        from pymerkle.core.prover import Proof
+
+        proof_index, proof_path = self.tree.audit_path(index)
+        return Proof(
+            provider=self.tree.uuid,
+            hash_type=self.tree.hash_type,
+            encoding=self.tree.encoding,
+            security=self.tree.security,
+            raw_bytes=self.tree.raw_bytes,
+            commitment=None,
+            proof_index=proof_index,
+            proof_path=proof_path
+        ).serialize()
+
+
+def generate_proofs(levels, hash_type="sha3_512", provider=None, cache=True):
+    """Generate the audit proofs of all the leaves at once
+
+    Args:
+        levels (list): Buffers of raw digests, from the leaves to the root.
+        hash_type (str): The hash type used by the tree.
+        provider (str): Identifier of the tree that provided the proofs.
+        cache (bool): Whether to hexlify the levels once for all the proofs. Default: True.
+
+    Returns:
+        pruvi.proofs.ProofList. Serialized proofs, one per leaf.
+    """
+    return ProofList(levels, hash_type=hash_type, provider=provider, cache=cache)
@@ -0,0 +1,347 @@
+import asyncio
+import base64
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from pruvi.container import ContainerReader
+from pruvi.hashing import hash_bytes
+from pruvi.incremental import verify_consistency
+from pruvi.pack import PackReader
+from pruvi.proofs import validate_proof
+
+
+class ExportIndex(object):
+    """In-memory index of an export
+
+    The roots and the proofs of the export are loaded once, so that each request only
+    costs the hashing of the data and the resolution of a proof.
+
+    Attributes:
+        name (str): Name of the export, used to address it in the requests.
+        hash_type (str): The hash type used by the tree.
+        length (int): Number of parts of the export.
+        merkle_root (str): The current root of the tree.
+        roots (set): The current root and the previous ones linked to it by a chain of
+            valid consistency proofs.
+        max_part_size (int): Size in bytes of the largest part of the export.
+    """
+    def __init__(self, export_folder, name=None):
+        """Constructor
+
+        Args:
+            export_folder (str): Folder of an export.
+            name (str): Name of the export. Default: the name of the folder.
+        """
+        self.name = name or os.path.basename(os.path.normpath(export_folder))
+
+        with open(os.path.join(export_folder, "tree-state.json")) as f:
+            state = json.load(f)
+        self.hash_type = state["hash_type"]
+        self.length = state["length"]
+        self.merkle_root = state["merkle_root"]
+
+        proofs = []
+        for name in os.listdir(export_folder):
+            if name.startswith("consistency-") and name.endswith(".json"):
+                with open(os.path.join(export_folder, name)) as f:
+                    proofs.append(json.load(f))
+
+        # A previous root is only trusted if its proof leads to a root already trusted, so
+        # the proofs are followed from the newest one down to the oldest
+        lengths = {self.merkle_root: self.length}
+        for proof in sorted(proofs, key=lambda proof: proof["new_length"], reverse=True):
+            if lengths.get(proof["new_root"]) == proof["new_length"] and \
+                    proof["hash_type"] == self.hash_type and verify_consistency(proof):
+                lengths.setdefault(proof["old_root"], proof["old_length"])
+        self.roots = set(lengths)
+
+        self._container = None
+        self._proofs = []
+        if os.path.exists(os.path.join(export_folder, "tree.bin")):
+            self._container = ContainerReader(os.path.join(export_folder, "tree.bin"))
+        elif os.path.exists(os.path.join(export_folder, "all_proofs.json")):
+            with open(os.path.join(export_folder, "all_proofs.json")) as f:
+                self._proofs = json.load(f)["proofs"]
+
+        self._parts_folder = os.path.join(export_folder, "parts")
+        self._pack = None
+        self._part_files = {}
+        self.max_part_size = 0
+        if os.path.exists(os.path.join(self._parts_folder, "parts.idx")):
+            self._pack = PackReader(self._parts_folder)
+            self.max_part_size = self._pack.max_part_size()
+        elif os.path.isdir(self._parts_folder):
+            for name in os.listdir(self._parts_folder):
+                stem, ext = os.path.splitext(name)
+                number = stem.rsplit("-", 1)[-1]
+                if stem.startswith("part-") and number.isdigit() and not name.endswith("-proof.json"):
+                    self._part_files[int(number)] = name
+                    self.max_part_size = max(
+                        self.max_part_size,
+                        os.path.getsize(os.path.join(self._parts_folder, name))
+                    )
+
+    def close(self):
+        """Release the mapped files of the export"""
+        if self._container:
+            self._container.close()
+        if self._pack:
+            self._pack.close()
+
+    def get_proof(self, number):
+        """Get the proof of a part
+
+        Args:
+            number (int): Number of the part, starting at 1.
+
+        Returns:
+            dict.
+
+        Raises:
+            IndexError: if there is no such part.
+        """
+        if not 1 <= number <= self.length:
+            raise IndexError("part number out of range")
+        if self._container:
+            return self._container.get_proof(number - 1)
+        if number <= len(self._proofs):
+            return self._proofs[number - 1]
+        # Parts appended after the export only have their own proof file
+        with open(os.path.join(self._parts_folder, f"part-{number}-proof.json")) as f:
+            return json.load(f)
+
+    def get_part(self, number):
+        """Get the data of a part
+
+        Args:
+            number (int): Number of the part, starting at 1.
+
+        Returns:
+            bytes.
+
+        Raises:
+            IndexError: if there is no such part.
+        """
+        if not 1 <= number <= self.length:
+            raise IndexError("part number out of range")
+        if self._pack:
+            return bytes(self._pack.get_part(number - 1))
+        with open(os.path.join(self._parts_folder, self._part_files[number]), "rb") as f:
+            return f.read()
+
+    def verify(self, data, proof):
+        """Verify some data against a proof and the roots of the export
+
+        Args:
+            data (bytes): The data to verify.
+            proof (dict): A serialized Merkle proof.
+
+        Returns:
+            str. The root the data was verified against or None.
+        """
+        try:
+            proof_index = proof["body"]["proof_index"]
+            proof_digest = proof["body"]["proof_path"][proof_index][1]
+        except (IndexError, KeyError, TypeError):
+            return None
+        if proof_digest != hash_bytes(data, self.hash_type):
+            return None
+
+        for root in self.roots:
+            if validate_proof(proof, root):
+                return root
+        return None
+
+
+class VerificationServer(object):
+    """Server answering verification and extraction requests over a socket
+
+    The protocol is one JSON object per line in each direction. Every request has an `op`
+    and may have an `id` that is sent back in the response:
+
+    - `{"op": "roots"}` returns the roots of each export.
+    - `{"op": "verify", "tree": name, "data": base64, "part": n}` verifies the data
+      against the proof of the part n of the export. A `proof` can be sent instead of
+      `part`.
+    - `{"op": "extract", "tree": name, "part": n}` returns the data of the part and its
+      proof.
+
+    Requests are run in a pool of threads, and at most `max_pending` of them are accepted
+    at once so that a burst of requests cannot exhaust the memory of the server. A request
+    line may hold the largest part of the exports in base64 and a proof; a longer line
+    is discarded and gets an error.
+
+    Attributes:
+        exports (dict): The indices of the exports by name.
+    """
+    def __init__(self, export_folders, workers=4, max_pending=64):
+        """Constructor
+
+        Args:
+            export_folders (list): Folders of the exports to serve.
+            workers (int): Number of threads handling the requests. Default: 4.
+            max_pending (int): Maximum number of requests being handled at once. Default: 64.
+        """
+        self.exports = {}
+        for folder in export_folders:
+            index = ExportIndex(folder)
+            self.exports[index.name] = index
+            logging.info(f"Serving '{index.name}' with root '{index.merkle_root}'.")
+
+        max_part_size = max([index.max_part_size for index in self.exports.values()], default=0)
+        # Base64 data, plus room for a proof and the other fields of the request
+        self._line_limit = max(2**16, 4 * (max_part_size + 2) // 3 + 2**16)
+
+        self._pool = ThreadPoolExecutor(max_workers=max(1, workers))
+        self._max_pending = max_pending
+        self._pending = None
+
+    def handle(self, request):
+        """Handle a request
+
+        Args:
+            request (dict): A decoded request.
+
+        Returns:
+            dict. The response.
+        """
+        response = {"id": request.get("id")}
+        op = request.get("op")
+        try:
+            if op == "roots":
+                response["roots"] = {
+                    name: index.merkle_root for name, index in self.exports.items()
+                }
+                return response
+
+            if not isinstance(request["tree"], str):
+                raise TypeError("'tree' must be a string.")
+            index = self.exports[request["tree"]]
+            if op == "verify":
+                if not isinstance(request["data"], str):
+                    raise TypeError("'data' must be a base64 string.")
+                data = base64.b64decode(request["data"])
+                proof = request.get("proof") or index.get_proof(int(request["part"]))
+                root = index.verify(data, proof)
+                response["verified"] = root is not None
+                response["merkle_root"] = root
+            elif op == "extract":
+                number = int(request["part"])
+                response["data"] = base64.b64encode(index.get_part(number)).decode()
+                response["proof"] = index.get_proof(number)
+            else:
+                response["error"] = f"'{op}' is not a valid operation."
+        except KeyError as e:
+            response["error"] = f"Missing or unknown {e}."
+        except (IndexError, OSError, TypeError, ValueError) as e:
+            response["error"] = str(e)
+        return response
+
+    async def _handle_line(self, line):
+        """Decode a request, handle it in the pool and encode the response"""
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("The request is not an object.")
+        except ValueError as e:
+            return {"id": None, "error": f"Invalid request: {e}"}
+
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(self._pool, self.handle, request)
+        except Exception:
+            # An unexpected failure of a request must not end the connection
+            logging.exception("Could not handle a request.")
+            return {"id": request.get("id"), "error": "Internal error."}
+
+    async def _skip_line(self, reader, consumed):
+        """Discard the rest of a line longer than the limit of the reader"""
+        try:
+            while 1:
+                await reader.readexactly(consumed)
+                try:
+                    await reader.readuntil(b"\n")
+                    return
+                except asyncio.LimitOverrunError as e:
+                    consumed = e.consumed
+        except asyncio.IncompleteReadError:
+            pass
+
+    async def _serve_client(self, reader, writer):
+        """Answer the requests of a connection in order"""
+        try:
+            while 1:
+                try:
+                    line = await reader.readuntil(b"\n")
+                except asyncio.IncompleteReadError as e:
+                    line = e.partial
+                except asyncio.LimitOverrunError as e:
+                    await self._skip_line(reader, e.consumed)
+                    line = None
+                if not line and line is not None:
+                    break
+                if line is None:
+                    response = {"id": None, "error": f"The request is longer than {self._line_limit} bytes."}
+                else:
+                    async with self._pending:
+                        response = await self._handle_line(line)
+                writer.write(json.dumps(response).encode() + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, socket_path=None, host="127.0.0.1", port=None):
+        """Start listening on a Unix socket or on a TCP port
+
+        Args:
+            socket_path (str): Path to the Unix socket.
+            host (str): The address to listen on when using TCP. Default: "127.0.0.1".
+            port (int): The TCP port.
+
+        Returns:
+            asyncio.AbstractServer.
+        """
+        self._pending = asyncio.Semaphore(self._max_pending)
+        if socket_path:
+            server = await asyncio.start_unix_server(
+                self._serve_client,
+                path=socket_path,
+                limit=self._line_limit
+            )
+            logging.info(f"Listening on '{socket_path}'...")
+        else:
+            server = await asyncio.start_server(
+                self._serve_client,
+                host=host,
+                port=port,
+                limit=self._line_limit
+            )
+            logging.info(f"Listening on {host}:{port}...")
+        return server
+
+    async def serve_forever(self, socket_path=None, host="127.0.0.1", port=None):
+        """Serve the requests until the task is cancelled
+
+        Args:
+            socket_path (str): Path to the Unix socket.
+            host (str): The address to listen on when using TCP. Default: "127.0.0.1".
+            port (int): The TCP port.
+        """
+        server = await self.start(socket_path=socket_path, host=host, port=port)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.close()
+            if socket_path and os.path.exists(socket_path):
+                os.remove(socket_path)
+
+    def close(self):
+        """Stop the pool and release the exports"""
+        self._pool.shutdown(wait=False)
+        for index in self.exports.values():
+            index.close()
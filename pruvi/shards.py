@@ -0,0 +1,219 @@
+import binascii
+import concurrent.futures
+import json
+import logging
+import os
+import shutil
+
+from pruvi.exceptions import EmptyTreeException
+from pruvi.hashing import get_hasher
+from pruvi.proofs import build_levels
+from pruvi.tree import DiskMerkleTree
+
+
+def shard_folder(output_folder, index):
+    """Get the folder of a shard of an export
+
+    Args:
+        output_folder (str): Output folder of the export.
+        index (int): Zero-based index of the shard.
+
+    Returns:
+        str.
+    """
+    return os.path.join(output_folder, "shards", f"shard-{index}")
+
+
+def build_shard(splitter_class, file_path, index, shard_size, output_folder, hash_type="sha3_512",
+                options=None):
+    """Split, hash and write the parts of a shard and build its subtree
+
+    A shard is the range of `shard_size` parts starting at `index * shard_size`. Its parts
+    are written to the parts folder of the export with their final numbers, and the level
+    files of its subtree and a `shard.json` summary to its own folder. Only the file and
+    the output folder are shared, so shards can be built in other processes or on other
+    machines with access to the same file system.
+
+    Args:
+        splitter_class (type): A subclass of pruvi.splitters.file.FileSplitter.
+        file_path (str): The file to split.
+        index (int): Zero-based index of the shard.
+        shard_size (int): Number of parts of each shard. It must be a power of two.
+        output_folder (str): Output folder of the export.
+        hash_type (str): The hash type to be used.
+        options (dict): Arguments of the iter_parts method of the splitter. Default: no arguments.
+
+    Returns:
+        dict. The index, first part, number of parts and root of the shard. A shard past
+        the end of the file has no parts and no root.
+    """
+    splitter = splitter_class(file_path=file_path, hash_type=hash_type, engine="native")
+    start = index * shard_size
+    parts_folder = os.path.join(output_folder, "parts")
+    # Shards running at the same time share the parts folder
+    os.makedirs(parts_folder, exist_ok=True)
+    splitter.stream_parts(
+        splitter.iter_range(start, start + shard_size, **(options or {})),
+        parts_folder,
+        first_part=start + 1
+    )
+    digests = splitter.get_digests()
+
+    folder = shard_folder(output_folder, index)
+    if os.path.exists(folder):
+        shutil.rmtree(folder)
+    os.makedirs(folder)
+
+    info = {"index": index, "start": start, "length": len(digests), "root": None, "hash_type": hash_type}
+    if digests:
+        tree = DiskMerkleTree(folder, hash_type=hash_type)
+        tree.extend(digests)
+        tree.build()
+        info["root"] = tree.rootHash.decode()
+        tree.close()
+
+    with open(os.path.join(folder, "shard.json"), "w") as f:
+        json.dump(info, f, indent=2)
+    return info
+
+
+def build_shards(splitter_class, file_path, shard_size, output_folder, hash_type="sha3_512",
+                 options=None, workers=1, backend="process"):
+    """Build all the shards of a file in a pool
+
+    The number of parts is not known in advance, so shards are submitted in order, keeping
+    every worker busy, until one of them comes back with less than `shard_size` parts.
+
+    Args:
+        splitter_class (type): A subclass of pruvi.splitters.file.FileSplitter.
+        file_path (str): The file to split.
+        shard_size (int): Number of parts of each shard. It must be a power of two.
+        output_folder (str): Output folder of the export.
+        hash_type (str): The hash type to be used.
+        options (dict): Arguments of the iter_parts method of the splitter. Default: no arguments.
+        workers (int): Number of shards built at once. Default: 1.
+        backend (str): Kind of pool. One of the following: "process", "thread".
+            Default: "process".
+
+    Returns:
+        list. The summaries of the shards with parts, in order.
+    """
+    # Shards left by a previous run would be merged with the new ones
+    shutil.rmtree(os.path.join(output_folder, "shards"), ignore_errors=True)
+
+    if backend == "process":
+        pool = concurrent.futures.ProcessPoolExecutor(max_workers=max(1, workers))
+    else:
+        pool = concurrent.futures.ThreadPoolExecutor(max_workers=max(1, workers))
+
+    shards = {}
+    pending = {}
+    last = None
+    index = 0
+    with pool:
+        while 1:
+            while len(pending) < max(1, workers) and (last is None or index <= last):
+                future = pool.submit(
+                    build_shard,
+                    splitter_class,
+                    file_path,
+                    index,
+                    shard_size,
+                    output_folder,
+                    hash_type=hash_type,
+                    options=options
+                )
+                pending[future] = index
+                index += 1
+            if not pending:
+                break
+
+            done, _ = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                i = pending.pop(future)
+                shards[i] = future.result()
+                logging.info(f"Shard {i}: {shards[i]['length']} parts, root '{shards[i]['root']}'.")
+                if shards[i]["length"] < shard_size and (last is None or i < last):
+                    last = i
+
+    for i in sorted(shards):
+        if i > last or not shards[i]["length"]:
+            # Shards past the end of the file
+            shutil.rmtree(shard_folder(output_folder, i), ignore_errors=True)
+    return [shards[i] for i in sorted(shards) if i <= last and shards[i]["length"]]
+
+
+def merge_shards(output_folder, memory_budget=2**26):
+    """Combine the shards of an export into the tree a single build would give
+
+    Shards are aligned on a power of two, so the root of a full shard is a node of the
+    global tree and each of its levels is a slice of the global level of the same height.
+    A last shard with fewer parts has the same shape as the end of the global tree, since
+    the nodes promoted at the end of each level are the same. The global levels up to the
+    height of the shards are then the concatenation of the levels of the shards, and the
+    levels above are built from the roots of the shards.
+
+    Args:
+        output_folder (str): Output folder of the export, with a `shards` folder.
+        memory_budget (int): Approximate maximum number of bytes used. Default: 64 MiB.
+
+    Returns:
+        pruvi.tree.DiskMerkleTree. The global tree, stored in a temporary folder.
+
+    Raises:
+        pruvi.exceptions.EmptyTreeException: if there is no shard with parts.
+        ValueError: if the shards are not contiguous, aligned or of the same hash type.
+    """
+    shards = []
+    shards_folder = os.path.join(output_folder, "shards")
+    for name in os.listdir(shards_folder) if os.path.isdir(shards_folder) else []:
+        summary = os.path.join(shards_folder, name, "shard.json")
+        if os.path.exists(summary):
+            with open(summary) as f:
+                info = json.load(f)
+            if info["length"]:
+                info["folder"] = os.path.join(shards_folder, name)
+                shards.append(info)
+    if not shards:
+        raise EmptyTreeException
+
+    shards.sort(key=lambda info: info["index"])
+    hash_type = shards[0]["hash_type"]
+    shard_size = shards[0]["length"] if len(shards) > 1 else 1 << (shards[0]["length"] - 1).bit_length()
+    height = shard_size.bit_length() - 1
+    for i, info in enumerate(shards):
+        if info["hash_type"] != hash_type:
+            raise ValueError(f"Shard {info['index']} uses '{info['hash_type']}' instead of '{hash_type}'.")
+        if info["index"] != i or info["start"] != i * shard_size:
+            raise ValueError(f"Shard {i} is missing.")
+        if shard_size & (shard_size - 1) or info["length"] > shard_size or \
+                (i < len(shards) - 1 and info["length"] != shard_size):
+            raise ValueError(f"Shard {info['index']} is not aligned on a power of two.")
+
+    width = get_hasher(hash_type)().digest_size
+    length = sum(info["length"] for info in shards)
+    roots = [info["root"] for info in shards]
+    top = build_levels(roots, hash_type)
+
+    tree = DiskMerkleTree(hash_type=hash_type, memory_budget=memory_budget)
+    k = 0
+    count = length
+    while 1:
+        with open(tree._level_path(k), "wb") as g:
+            if k < height:
+                for info in shards:
+                    # The subtree of a short last shard stops at its root, which is promoted
+                    j = min(k, (info["length"] - 1).bit_length())
+                    with open(os.path.join(info["folder"], f"level-{j}.bin"), "rb") as f:
+                        shutil.copyfileobj(f, g, max(width, memory_budget // 8))
+            else:
+                g.write(top[k - height])
+        if count == 1:
+            break
+        k += 1
+        count = (count + 1) // 2
+
+    tree.open_levels()
+    if tree.rootHash.decode() != binascii.hexlify(top[-1]).decode():
+        raise ValueError("The merged tree does not match the roots of the shards.")
+    return tree
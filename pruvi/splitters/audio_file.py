@@ -1,24 +1,90 @@
+import io
+import struct
+
 from pruvi.splitters.file import FileSplitter
 
+WAVE_FORMAT_PCM = 0x0001
+
+
+def _read_wav_header(f):
+    """Locate the PCM frames of a WAV file
+
+    As pydub does, the frames are the size declared in the data chunk, cut at the end of
+    the file, and the data chunk is only looked for in the first ten chunks, so that chunks
+    after it such as LIST metadata are left out.
+
+    Args:
+        f (file): A WAV file opened in binary mode.
+
+    Returns:
+        tuple. The number of channels, the sample width, the frame rate, the offset and the
+            size of the frames, or None if the file is not a plain PCM WAV file.
+    """
+    riff = f.read(12)
+    if len(riff) < 12 or riff[:4] != b"RIFF" or riff[8:] != b"WAVE":
+        return None
+
+    fmt = None
+    for _ in range(10):
+        chunk = f.read(8)
+        if len(chunk) < 8:
+            return None
+        name, size = struct.unpack("<4sL", chunk)
+        if name == b"data":
+            break
+        if name == b"fmt " and fmt is None:
+            if size < 16:
+                return None
+            fmt = struct.unpack("<HHLLHH", f.read(16))
+            f.seek(size - 16, 1)
+        else:
+            f.seek(size, 1)
+    else:
+        return None
+
+    if fmt is None:
+        return None
+    audio_format, channels, frame_rate, _, _, bits_per_sample = fmt
+    # pydub widens 24-bit samples, so those files are left to it
+    if audio_format != WAVE_FORMAT_PCM or bits_per_sample not in (8, 16, 32):
+        return None
+
+    offset = f.tell()
+    f.seek(0, 2)
+    return channels, bits_per_sample // 8, frame_rate, offset, min(size, f.tell() - offset)
+
+
+def _wav_header(channels, sample_width, frame_rate, data_size):
+    """Build the header written by the wave module for a PCM WAV file"""
+    return b"RIFF" + struct.pack(
+        "<L4s4sLHHLLHH4sL",
+        36 + data_size, b"WAVE", b"fmt ", 16,
+        WAVE_FORMAT_PCM, channels, frame_rate,
+        channels * frame_rate * sample_width,
+        channels * sample_width,
+        sample_width * 8, b"data", data_size
+    )
+
 
 class AudioFileSplitter(FileSplitter):
     """Audio File Splitter object
     """
-    def split_document(self, **kwargs):
-        """Split an audio file
+    def _iter_pydub_parts(self, **kwargs):
+        """Iterate over the segments of an audio file decoded by pydub
 
         Kwargs:
             seconds (int): Number of seconds in which to split the contents. Default: 1.
             format (str): Format of the output file. Default: "wav".
+
+        Yields:
+            bytes.
         """
         # Dirty hotfix to prevent pydub from printing information at the startup
         # This information will only be printed when the split_document is provided
         from pydub import AudioSegment
-        self._parts = []
         audio = AudioSegment.from_wav(self.file_path)
 
         current_second = 0
-        i = 0
         last_part = False
 
         while 1:
@@ -27,16 +93,115 @@ class AudioFileSplitter(FileSplitter):
                 end_second = len(audio)
                 last_part = True
 
-            new_part = audio[current_second:end_second]
-
-            part_file = self._get_file_path(i)
-            new_part.export(part_file, format=kwargs.get("format", "wav"))
-
-            with open(part_file, "rb") as f:
-                self._parts.append(f.read())
+            buffer = io.BytesIO()
+            audio[current_second:end_second].export(buffer, format=kwargs.get("format", "wav"))
+            yield buffer.getvalue()
 
             if last_part:
                 break
             else:
                 current_second = end_second
-                i += 1
+
+    def iter_parts(self, **kwargs):
+        """Iterate over the segments of an audio file
+
+        PCM WAV files are sliced straight from the file without decoding them: each segment
+        is a new header followed by the frames that pydub would have selected, so the parts
+        are byte-identical to the ones exported by pydub. Other inputs and output formats
+        are handled by pydub.
+
+        Kwargs:
+            seconds (int): Number of seconds in which to split the contents. Default: 1.
+            format (str): Format of the output file. Default: "wav".
+            mmap (bool): Whether to map the file in memory instead of reading each segment.
+                Default: False.
+
+        Yields:
+            bytes.
+        """
+        info = None
+        if kwargs.get("format", "wav") == "wav":
+            with open(self.file_path, "rb") as f:
+                info = _read_wav_header(f)
+
+        if info is None:
+            yield from self._iter_pydub_parts(**kwargs)
+            return
+
+        channels, sample_width, frame_rate, offset, size = info
+        frame_width = channels * sample_width
+        frame_count = size // frame_width
+        # Same arithmetic as pydub to select the same frames
+        length = round(1000 * (float(frame_count) / frame_rate))
+        silence = b"\x80" if sample_width == 1 else b"\x00"
+
+        if kwargs.get("mmap"):
+            view = self._map_file()
+
+            def read(start, end):
+                return view[offset + start:offset + end]
+        else:
+            f = open(self.file_path, "rb")
+
+            def read(start, end):
+                with self.metrics.stage("read"):
+                    f.seek(offset + start)
+                    frames = f.read(end - start)
+                self.metrics.add("read", items=1, nbytes=len(frames))
+                return frames
+
+        try:
+            current_second = 0
+            last_part = False
+
+            while 1:
+                end_second = current_second + kwargs.get("seconds", 1) * 1000
+                if end_second > length:
+                    end_second = length
+                    last_part = True
+
+                start = int(current_second * (frame_rate / 1000.0))
+                end = int(end_second * (frame_rate / 1000.0))
+                available = max(0, min(end, frame_count) - start)
+                frames = read(start * frame_width, (start + available) * frame_width)
+                missing = (end - start - available) * frame_width
+
+                header = _wav_header(channels, sample_width, frame_rate, (end - start) * frame_width)
+                yield header + frames + silence * missing
+
+                if last_part:
+                    break
+                else:
+                    current_second = end_second
+        finally:
+            if not kwargs.get("mmap"):
+                f.close()
+
+    def split_document(self, **kwargs):
+        """Split an audio file
+
+        Kwargs:
+            seconds (int): Number of seconds in which to split the contents. Default: 1.
+            format (str): Format of the output file. Default: "wav".
+            mmap (bool): Whether to map the file in memory. Default: False.
+            output_folder (str): If provided, the parts are streamed to this folder as they are
+                read and only their digests are kept in memory.
+            first_part (int): Number of the first part streamed. Default: 1.
+            packed (bool): Whether to stream the parts to a single pack. Default: False.
+            digests (list): Known digests of the streamed parts, which are not hashed again.
+            queue_size (int): If positive, the streamed parts are read, hashed and written by
+                overlapping stages connected by queues of this many batches. Default: 0.
+        """
+        self._parts = []
+
+        if kwargs.get("output_folder"):
+            self.stream_parts(
+                self.iter_parts(**kwargs),
+                kwargs["output_folder"],
+                first_part=kwargs.get("first_part", 1),
+                packed=kwargs.get("packed", False),
+                digests=kwargs.get("digests"),
+                queue_size=kwargs.get("queue_size", 0)
+            )
+        else:
+            self._parts = list(self.metrics.track("split", self.iter_parts(**kwargs)))
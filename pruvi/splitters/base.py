@@ -1,50 +1,139 @@
+import binascii
+import contextlib
+import itertools
 import json
 import logging
+import mmap
 import os
 import tempfile
+import textwrap
+import time
+from concurrent.futures import ThreadPoolExecutor
 
-from pymerkle import MerkleTree
-from pymerkle.proof import Proof
-from pymerkle import validateProof
-
+from pruvi.container import write_container
 from pruvi.exceptions import NoPartsException
-from pruvi.hashing import hash_bytes
+from pruvi.hashing import available_backends, hash_bytes, hash_file, hash_parts
+from pruvi.incremental import AppendOnlyTree, frontier_from_levels
+from pruvi.metrics import Metrics
+from pruvi.pack import PackWriter
+from pruvi.pipeline import Pipeline
+from pruvi.proofs import AuditProofList, build_levels, generate_proofs, validate_multiproof, validate_proof
+from pruvi.shards import merge_shards
+from pruvi.tree import ArrayMerkleTree, DiskMerkleTree
 
 class BaseSplitter(object):
     """Base Splitter object
 
     Attributes:
         _parts (list): List of elements to proof.
+        _digests (list): Leaf digests of the parts already streamed to disk.
+        _parts_folder (str): Folder where the streamed parts were written.
+        _levels (list): Buffers of raw digests of the tree, from the leaves to the root.
         hash_type (str): The hash type to be used.
+        engine (str): The Merkle Tree implementation to be used.
+        memory_budget (int): Approximate maximum number of bytes used by the disk engine.
         tree: The Merkle Tree created.
         proofs (list): List of proofs.
     """
-    def __init__(self, parts=[], hash_type="sha3_512"):
+    def __init__(self, parts=[], hash_type="sha3_512", engine="pymerkle", cache=None, metrics=None,
+                 memory_budget=2**26):
         """Constructor
 
         Args:
             parts (list): List of elements to proof.
             hash_type (str): The hash type to be used.
+            engine (str): The Merkle Tree implementation to be used. One of the following:
+                "pymerkle", "native", "disk". The disk engine keeps the leaf digests and the
+                levels of the tree in temporary files. Default: "pymerkle".
+            cache (pruvi.cache.LeafCache): Cache of leaf digests. Default: None.
+            metrics (pruvi.metrics.Metrics): Timers and counters of the stages of the
+                pipeline. Subclasses account their own work to it. Default: a new one.
+            memory_budget (int): Approximate maximum number of bytes used by the disk engine
+                to build the tree. Default: 64 MiB.
         """
         self._parts = []
+        self._digests = []
+        self._parts_folder = None
+        self._levels = []
         self.set_parts(parts)
         self.hash_type = hash_type
+        self.engine = engine
+        self.cache = cache
+        self.metrics = metrics if metrics is not None else Metrics()
+        self.memory_budget = memory_budget
         self.tree = None
         self.proofs = []
 
+    def _new_digests(self):
+        """Get an empty collection for the leaf digests
+
+        With the disk engine, the digests are written to the leaf file of the tree as they
+        are collected, so they are never all in memory at once.
+
+        Returns:
+            list or pruvi.tree.DiskMerkleTree.
+        """
+        if self.engine == "disk":
+            return DiskMerkleTree(hash_type=self.hash_type, memory_budget=self.memory_budget)
+        return []
+
+    def _hash_part(self, part):
+        """Hash a part, going through the leaf cache if there is one
+
+        Args:
+            part (bytes): Any bytes-like object.
+
+        Returns:
+            str. Hex digest.
+        """
+        if self.cache is not None:
+            return self.cache.digest(part, self.hash_type)
+        return hash_bytes(part, self.hash_type)
+
+    def _hash_parts(self, workers=1, executor="thread"):
+        """Hash all the parts, going through the leaf cache if there is one
+
+        Args:
+            workers (int): Number of workers used to hash the leaves. Default: 1.
+            executor (str): Kind of pool used to hash the leaves. Default: "thread".
+
+        Returns:
+            list. Hex digests.
+        """
+        parts = self.get_parts()
+        with self.metrics.stage("hash"):
+            if self.cache is not None or workers <= 1:
+                digests = []
+                for part in parts:
+                    digests.append(self._hash_part(part))
+                    self.metrics.add("hash", items=1, nbytes=memoryview(part).nbytes)
+                    self.metrics.report("hash", len(parts))
+                return digests
+
+            digests = hash_parts(parts, hash_type=self.hash_type, workers=workers, executor=executor)
+            self.metrics.add(
+                "hash",
+                items=len(parts),
+                nbytes=sum(memoryview(part).nbytes for part in parts)
+            )
+            return digests
+
     def _export_proofs(self, output_file):
         """Export all proofs to a file
 
+        The proofs are written one at a time, so they are never all in memory at once.
+
         Args:
             output_file (str): Output file.
         """
-        info = {
-            "merkle_root": self.tree.rootHash.decode(),
-            "proofs": self.proofs
-        }
-
         with open(output_file, "w") as f:
-            f.write(json.dumps(info, indent=2))
+            f.write("{\n")
+            f.write(f'  "merkle_root": {json.dumps(self.tree.rootHash.decode())},\n')
+            f.write('  "proofs": [')
+            for i, proof in enumerate(self.proofs):
+                f.write(",\n" if i else "\n")
+                f.write(textwrap.indent(json.dumps(proof, indent=2), "    "))
+            f.write("\n  ]\n}" if self.proofs else "]\n}")
 
     def _export_tree(self, output_file):
         """Export tree
@@ -54,11 +143,14 @@ class BaseSplitter(object):
         """
         self.tree.export(f"{output_file}")
 
-    def _write_parts(self, output_folder=tempfile.gettempdir()):
+    def _write_parts(self, output_folder=tempfile.gettempdir(), first_part=1, packed=False):
         """Writes a file for each part
 
         Args:
             output_folder (str): The folder where the parts will be written.
+            first_part (int): Number of the first part. Default: 1.
+            packed (bool): Whether to write all the parts in a single pack instead. Their
+                proofs are then only available in the binary container. Default: False.
         """
         if not os.path.exists(output_folder):
             logging.info(f"Creating parts folder at '{output_folder}'...")
@@ -66,58 +158,280 @@ class BaseSplitter(object):
 
         ext = os.path.splitext(self.file_path)[-1]
 
-        for i, part in enumerate(self._parts):
-            output_file = os.path.join(
+        if packed:
+            if self._parts_folder and os.path.samefile(self._parts_folder, output_folder):
+                # The pack was already written while streaming
+                return
+            logging.info(f"Writing {len(self._parts)} parts in a pack at '{output_folder}'...")
+            with self.metrics.stage("write"), PackWriter(output_folder, extension=ext) as pack:
+                for part in self._parts:
+                    pack.add(part)
+                    self.metrics.add("write", items=1, nbytes=memoryview(part).nbytes)
+                    self.metrics.report("write", len(self._parts))
+            return
+
+        if self._parts_folder and os.path.samefile(self._parts_folder, output_folder):
+            # The parts were already written while streaming
+            with self.metrics.stage("write"):
+                for i in range(len(self._digests)):
+                    output_file_proof = os.path.join(
+                        output_folder,
+                        f"part-{i+first_part}-proof.json"
+                    )
+                    logging.debug(f"Writing proof for part {i+first_part} at '{output_file_proof}'...")
+                    with open(output_file_proof, "w") as f:
+                        f.write(json.dumps(self.proofs[i], indent=2))
+                    self.metrics.add("write", items=1)
+                    self.metrics.report("write", len(self._digests))
+            return
+
+        with self.metrics.stage("write"):
+            for i, part in enumerate(self._parts):
+                output_file = os.path.join(
+                    output_folder,
+                    f"part-{i+first_part}{ext}"
+                )
+
+                logging.debug(f"Writing part {i+first_part} at '{output_file}'...")
+                with open(output_file, "wb") as f:
+                    f.write(self._parts[i])
+
+                output_file_proof = output_file.replace(ext, "-proof.json")
+                logging.debug(f"Writing proof for part {i+first_part} at '{output_file_proof}'...")
+                with open(output_file_proof, "w") as f:
+                    f.write(json.dumps(self.proofs[i], indent=2))
+
+                self.metrics.add("write", items=1, nbytes=memoryview(part).nbytes)
+                self.metrics.report("write", len(self._parts))
+
+    def _check_file(self, data_file, proof_file, merkle_root):
+        """Check a file against its proof without logging each step
+
+        Args:
+            data_file (str): Path to the data file to verify.
+            proof_file (str): Path to the proof file.
+            merkle_root (bytes): The merkle root to proof.
+
+        Returns:
+            bool.
+        """
+        try:
+            with open(proof_file) as f:
+                proof_data = json.load(f)
+            proof_index = proof_data["body"]["proof_index"]
+            proof_digest = proof_data["body"]["proof_path"][proof_index][1]
+            hash_type = proof_data["header"]["hash_type"]
+            if hash_type not in available_backends():
+                raise ValueError(f"unknown hash type '{hash_type}'")
+            calculated_digest = hash_file(data_file, hash_type)
+        except (OSError, ValueError, KeyError, IndexError, TypeError, AttributeError) as e:
+            logging.debug(f"Could not read '{data_file}' or '{proof_file}': {e}")
+            return False
+
+        if proof_digest != calculated_digest:
+            return False
+        return self.verify_proof(proof_data, merkle_root)
+
+    def append(self, output_folder, workers=1, executor="thread"):
+        """Append the parts to a previous export without rebuilding its tree
+
+        Only the state of the previous tree is loaded, so the cost depends on the number of
+        new parts and not on the size of the previous export. The new parts and their proofs
+        are written after the previous ones, together with a consistency proof showing
+        that the previous tree is a prefix of the new one. The previous proofs remain valid
+        against the previous root, and tree.json and all_proofs.json are not rewritten.
+
+        Args:
+            output_folder (str): Folder of the previous export.
+            workers (int): Number of workers used to hash the leaves. Default: 1.
+            executor (str): Kind of pool used to hash the leaves. Default: "thread".
+        """
+        state_file = os.path.join(output_folder, "tree-state.json")
+        self.tree = AppendOnlyTree.load(state_file)
+        first_part = self.tree.length + 1
+
+        if not self._parts and self._digests:
+            if self.hash_type != self.tree.hash_type:
+                raise ValueError(
+                    f"The parts were hashed with '{self.hash_type}' but the tree uses "
+                    f"'{self.tree.hash_type}'."
+                )
+        else:
+            self.hash_type = self.tree.hash_type
+            self._digests = self._hash_parts(workers=workers, executor=executor)
+
+        with self.metrics.stage("tree"):
+            self.proofs, consistency = self.tree.extend(self._digests)
+            self.metrics.add("tree", items=len(self._digests))
+
+        parts_folder = os.path.join(output_folder, "parts")
+        if os.path.exists(os.path.join(parts_folder, "parts.idx")):
+            raise ValueError("Parts cannot be appended to a packed export.")
+        logging.info(f"Appending parts from {first_part} at '{parts_folder}/'...")
+        self._write_parts(parts_folder, first_part=first_part)
+
+        if consistency:
+            consistency_file = os.path.join(
                 output_folder,
-                f"part-{i+1}{ext}"
+                f"consistency-{consistency['old_length']}-{consistency['new_length']}.json"
             )
+            logging.info(f"Creating consistency proof at '{consistency_file}'...")
+            with open(consistency_file, "w") as f:
+                f.write(json.dumps(consistency, indent=2))
 
-            logging.info(f"Writing part {i+1} at '{output_file}'...")
-            with open(output_file, "wb") as f:
-                f.write(self._parts[i])
+        logging.info(f"Updating tree state file at '{state_file}'...")
+        self.tree.export(state_file)
 
-            output_file_proof = output_file.replace(ext, "-proof.json")
-            logging.info(f"Writing proof for part {i+1} at '{output_file_proof}'...")
-            with open(output_file_proof, "w") as f:
-                f.write(json.dumps(self.proofs[i], indent=2))
-
-    def create_tree(self):
+    def create_tree(self, workers=1, executor="thread", digests=None):
         """Create the tree
 
         Args:
-            output_folder (str): The folder where the parts will be written.
+            workers (int): Number of workers used to hash the leaves. Default: 1.
+            executor (str): Kind of pool used to hash the leaves. One of the following:
+                "thread", "process". Default: "thread".
+            digests (list): Known digests of the parts, e.g. from pruvi.cache.LeafCache.get_file.
+                The parts are then not hashed. Default: None.
         """
-        self.tree = MerkleTree(hash_type=self.hash_type, security=False, raw_bytes=True)
-
         # Creating tree
-        for i, f in enumerate(self.get_parts()):
-            x = self.tree.update(f)
+        if digests is not None:
+            if self._parts and len(digests) != len(self._parts):
+                raise ValueError(f"Expected {len(self._parts)} digests, got {len(digests)}.")
+        elif not self._parts and self._digests:
+            digests = self._digests
+        else:
+            # Leaves are hashed here so that buffer-protocol parts are never copied
+            digests = self._hash_parts(workers=workers, executor=executor)
+
+        if self.engine != "disk":
+            self._digests = list(digests)
+        elif digests is not self._digests:
+            self._digests = self._new_digests()
+            self._digests.extend(digests)
+
+        with self.metrics.stage("tree"):
+            if self.engine == "disk":
+                self.tree = self._digests
+                self.tree.build()
+                self._levels = self.tree.levels
+            elif self.engine == "native":
+                self.tree = ArrayMerkleTree(hash_type=self.hash_type)
+                self.tree.extend(self._digests)
+                self._levels = self.tree.levels
+            else:
+                # pymerkle is only loaded when it is used, which keeps `pruvi validate` fast
+                from pymerkle import MerkleTree
+                from pymerkle.exceptions import UnsupportedHashType
+
+                try:
+                    self.tree = MerkleTree(hash_type=self.hash_type, security=False, raw_bytes=True)
+                except UnsupportedHashType:
+                    raise ValueError(
+                        f"pymerkle does not support '{self.hash_type}'. Use the native engine."
+                    )
+                for digest in self._digests:
+                    self.tree.update(digest=digest)
+                self._levels = []
+            self.metrics.add("tree", items=len(self._digests))
+
+        if self.engine == "pymerkle":
+            # The proofs are asked to the tree itself, so it is the only structure built
+            self.proofs = AuditProofList(self.tree)
+            return
 
-        # Creating proofs
-        for i, f in enumerate(self._parts):
-            self.proofs.append(self.tree.auditProof(i).serialize())
+        # Creating proofs from the levels of the tree, built once for all of them
+        self.proofs = generate_proofs(
+            self._levels,
+            hash_type=self.hash_type,
+            provider=self.tree.uuid,
+            cache=self.engine != "disk"
+        )
 
-    def export(self, output_folder):
+    def merge_shards(self, output_folder):
+        """Use the tree merged from the shards built in an output folder
+
+        The parts of the shards were already written to the parts folder of the export, so
+        only the proofs are written by the export that follows. The tree is stored on disk
+        and the proofs are read from it, like with the disk engine.
+
+        Args:
+            output_folder (str): Output folder of the shards (see pruvi.shards.build_shard).
+        """
+        with self.metrics.stage("tree"):
+            self.tree = merge_shards(output_folder, memory_budget=self.memory_budget)
+            self.metrics.add("tree", items=len(self.tree))
+
+        self.hash_type = self.tree.hash_type
+        self._parts = []
+        self._digests = self.tree
+        self._levels = self.tree.levels
+        self._parts_folder = os.path.join(output_folder, "parts")
+        self.proofs = generate_proofs(
+            self._levels,
+            hash_type=self.hash_type,
+            provider=self.tree.uuid,
+            cache=False
+        )
+
+    def export(self, output_folder, format="json", packed=False):
         """Export the splitted information
 
         Args:
             output_folder (str): Output folder.
+            format (str): Format of the tree and proofs. One of the following: "json",
+                "binary". Default: "json".
+            packed (bool): Whether to write the parts in a single indexed pack instead of
+                a file and a proof per part. It implies the binary format. Default: False.
         """
+        if packed:
+            format = "binary"
+
         if not os.path.exists(output_folder):
             logging.info(f"Creating export folder at '{output_folder}'...")
             os.makedirs(output_folder)
 
-        tree_file = os.path.join(output_folder, "tree.json")
-        logging.info(f"Creating tree file at '{tree_file}'...")
-        self._export_tree(tree_file)
-
-        proof_file = os.path.join(output_folder, "all_proofs.json")
-        logging.info(f"Creating proofs file at '{proof_file}'...")
-        self._export_proofs(proof_file)
+        if format == "binary":
+            container_file = os.path.join(output_folder, "tree.bin")
+            logging.info(f"Creating binary tree and proofs file at '{container_file}'...")
+            with self.metrics.stage("proofs"):
+                if not self._levels:
+                    # A pymerkle tree is not stored by levels
+                    self._levels = build_levels(self._digests, self.hash_type)
+                write_container(
+                    container_file,
+                    self._levels,
+                    hash_type=self.hash_type,
+                    provider=self.tree.uuid
+                )
+                self.metrics.add("proofs", items=len(self._digests), nbytes=os.path.getsize(container_file))
+        else:
+            tree_file = os.path.join(output_folder, "tree.json")
+            logging.info(f"Creating tree file at '{tree_file}'...")
+            self._export_tree(tree_file)
+
+            proof_file = os.path.join(output_folder, "all_proofs.json")
+            logging.info(f"Creating proofs file at '{proof_file}'...")
+            with self.metrics.stage("proofs"):
+                self._export_proofs(proof_file)
+                self.metrics.add("proofs", items=len(self.proofs), nbytes=os.path.getsize(proof_file))
+
+        state_file = os.path.join(output_folder, "tree-state.json")
+        logging.info(f"Creating tree state file at '{state_file}'...")
+        if self._levels:
+            frontier = frontier_from_levels(self._levels, len(self._levels[-1]))
+        else:
+            frontier = [
+                binascii.unhexlify(node.digest)
+                for _, node in self.tree.principal_subroots(self.tree.length)
+            ]
+        AppendOnlyTree(
+            hash_type=self.hash_type,
+            length=len(self._digests),
+            frontier=frontier
+        ).export(state_file)
 
         parts_folder = os.path.join(output_folder, "parts")
         logging.info(f"Creating parts at '{parts_folder}/'...")
-        self._write_parts(parts_folder)
+        self._write_parts(parts_folder, packed=packed)
 
     def get_parts(self):
         """Set parts appropiately
@@ -133,9 +447,20 @@ class BaseSplitter(object):
         else:
             raise NoPartsException
 
+    def get_digests(self):
+        """Get the hex digests of the leaves
+
+        Returns:
+            list.
+        """
+        return self._digests
+
     def set_parts(self, parts, codification="utf-8"):
         """Set parts appropiately
 
+        Buffer-protocol objects (bytes, bytearray, memoryview, mmap) are stored without
+        copying them.
+
         Args:
             parts (list): List of parts to process.
             codification (str): The codification of the charset.
@@ -146,11 +471,84 @@ class BaseSplitter(object):
             elif isinstance(p, list) or isinstance(p, dict):
                 element = json.dumps(p)
                 self._parts.append(element.encode(codification))
-            elif isinstance(p, bytes) or isinstance(p, bytearray):
+            elif isinstance(p, (bytes, bytearray, memoryview)):
                 self._parts.append(p)
+            elif isinstance(p, mmap.mmap):
+                self._parts.append(memoryview(p))
             else:
                 self._parts.append(str(p).encode(codification))
 
+    def stream_parts(self, parts, output_folder, first_part=1, packed=False, digests=None,
+                     queue_size=0):
+        """Hash and write each part as soon as it is produced
+
+        Only the leaf digests are kept in memory, so the memory used does not
+        depend on the size of the document being split.
+
+        Args:
+            parts (iterable): Iterable of parts to process.
+            output_folder (str): The folder where the parts will be written.
+            first_part (int): Number of the first part. Default: 1.
+            packed (bool): Whether to write all the parts in a single pack. Default: False.
+            digests (list): Known digests of the parts, e.g. from pruvi.cache.LeafCache.get_file.
+                The parts are then written without hashing them. Default: None.
+            queue_size (int): If positive, the parts are produced, hashed and written by
+                three overlapping stages connected by queues of this many batches of
+                parts (see pruvi.pipeline.Pipeline). Default: 0, one part after another.
+        """
+        if not os.path.exists(output_folder):
+            logging.info(f"Creating parts folder at '{output_folder}'...")
+            os.makedirs(output_folder)
+
+        ext = os.path.splitext(self.file_path)[-1]
+
+        self._parts = []
+        self._digests = self._new_digests()
+        if digests is not None:
+            known = iter(digests)
+
+            def digest_part(part):
+                return next(known)
+        else:
+            digest_part = self._hash_part
+
+        metrics = self.metrics
+        parts = metrics.track("split", parts)
+
+        def hash_part(part):
+            with metrics.stage("hash"):
+                digest = digest_part(part)
+            metrics.add("hash", items=1, nbytes=memoryview(part).nbytes)
+            return digest
+
+        with contextlib.ExitStack() as stack:
+            if packed:
+                pack = stack.enter_context(PackWriter(output_folder, extension=ext))
+
+                def write_part(part):
+                    with metrics.stage("write"):
+                        pack.add(part)
+                    metrics.add("write", items=1, nbytes=memoryview(part).nbytes)
+            else:
+                numbers = itertools.count(first_part)
+
+                def write_part(part):
+                    number = next(numbers)
+                    output_file = os.path.join(output_folder, f"part-{number}{ext}")
+                    logging.debug(f"Writing part {number} at '{output_file}'...")
+                    with metrics.stage("write"), open(output_file, "wb") as f:
+                        f.write(part)
+                    metrics.add("write", items=1, nbytes=memoryview(part).nbytes)
+
+            if queue_size > 0:
+                Pipeline(queue_size=queue_size).run(parts, hash_part, write_part, digests=self._digests)
+            else:
+                for part in parts:
+                    self._digests.append(hash_part(part))
+                    write_part(part)
+
+        self._parts_folder = output_folder
+
     def verify_file(self, data_file, proof_file, merkle_root=None):
         """Verify a file
 
@@ -162,15 +560,18 @@ class BaseSplitter(object):
         Returns:
             bool.
         """
-        logging.info(f"Step 1/3: Hashing the file: '{data_file}'")
-        with open(data_file, "rb") as f:
-            data = f.read()
-        calculated_digest = hash_bytes(data)
+        with open(proof_file) as f:
+            proof_data = json.load(f)
+        hash_type = proof_data["header"]["hash_type"]
+        if hash_type not in available_backends():
+            logging.error(f"\t✕ Verification failed! The proof uses an unknown hash type: '{hash_type}'.")
+            return False
+
+        logging.info(f"Step 1/3: Hashing the file: '{data_file}' with {hash_type}")
+        calculated_digest = hash_file(data_file, hash_type)
         logging.info(f"\tFile hash: '{calculated_digest}'")
 
         logging.info(f"Step 2/3: Verifying if the hash matches with that of the proof...")
-        with open(proof_file) as f:
-            proof_data = json.load(f)
         proof_index = proof_data["body"]["proof_index"]
         proof_digest = proof_data["body"]["proof_path"][proof_index][1]
         if proof_digest == calculated_digest:
@@ -187,6 +588,89 @@ class BaseSplitter(object):
             logging.error("\t✕ Verification failed!")
             return False
 
+    def verify_files(self, pairs, merkle_root, workers=1):
+        """Verify several files against the same Merkle root
+
+        Args:
+            pairs (list): Tuples with the path to a data file and the path to its proof.
+            merkle_root (str): The merkle root to proof.
+            workers (int): Number of files verified in parallel. Default: 1.
+
+        Returns:
+            list. Tuples with the data file, the proof file and the verification result.
+        """
+        if isinstance(merkle_root, str):
+            merkle_root = merkle_root.encode()
+
+        start = time.time()
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            results = list(
+                pool.map(
+                    lambda pair: self._check_file(pair[0], pair[1], merkle_root),
+                    pairs
+                )
+            )
+        elapsed = time.time() - start
+
+        total_bytes = 0
+        for (data_file, proof_file), result in zip(pairs, results):
+            if result:
+                logging.info(f"\t✔️ '{data_file}'")
+            else:
+                logging.error(f"\t✕ '{data_file}'")
+            if os.path.exists(data_file):
+                total_bytes += os.path.getsize(data_file)
+
+        passed = sum(results)
+        logging.info(
+            f"{passed}/{len(pairs)} files verified in {elapsed:.3f}s "
+            f"({len(pairs) / elapsed if elapsed else 0:.1f} files/s, "
+            f"{total_bytes / 2**20 / elapsed if elapsed else 0:.2f} MB/s)."
+        )
+        return [(d, p, r) for (d, p), r in zip(pairs, results)]
+
+    def verify_multiproof(self, data_files, proof_file, merkle_root, workers=1):
+        """Verify several files against a single multi-proof
+
+        Each file is hashed and compared with its leaf in the multi-proof, and the root is
+        then rebuilt once for all of them.
+
+        Args:
+            data_files (list): Paths to the data files, in the order of the leaves of the
+                multi-proof.
+            proof_file (str): Path to the multi-proof.
+            merkle_root (str): The merkle root to proof.
+            workers (int): Number of files hashed in parallel. Default: 1.
+
+        Returns:
+            bool.
+        """
+        with open(proof_file) as f:
+            proof_data = json.load(f)
+        hash_type = proof_data["header"]["hash_type"]
+        leaves = proof_data["body"]["leaves"]
+        if hash_type not in available_backends():
+            logging.error(f"\t✕ Verification failed! The multi-proof uses an unknown hash type: '{hash_type}'.")
+            return False
+
+        start = time.time()
+        if len(data_files) != len(leaves):
+            logging.error(f"\t✕ Expected {len(leaves)} files, got {len(data_files)}.")
+            return False
+
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            digests = list(pool.map(lambda data_file: hash_file(data_file, hash_type), data_files))
+        for data_file, digest, leaf in zip(data_files, digests, leaves):
+            if digest != leaf:
+                logging.error(f"\t✕ '{data_file}' does not match its leaf.")
+                return False
+
+        if not validate_multiproof(proof_data, merkle_root):
+            logging.error("\t✕ Verification failed!")
+            return False
+        logging.info(f"\t✔️ {len(data_files)} files verified in {time.time() - start:.3f}s.")
+        return True
+
     def verify_proof(self, data, merkle_root=None):
         """Verify a proof
 
@@ -203,5 +687,4 @@ class BaseSplitter(object):
             if isinstance(merkle_root, str):
                 merkle_root = merkle_root.encode()
 
-        p = Proof(from_dict=data)
-        return validateProof(target=merkle_root, proof=p)
+        return validate_proof(data, merkle_root)
@@ -1,21 +1,88 @@
+import itertools
+
 from pruvi.splitters.file import FileSplitter
 
 
 class BinaryFileSplitter(FileSplitter):
     """Binary File Splitter object
     """
-    def split_document(self, **kwargs):
-        """Split a binary file
+    def iter_parts(self, **kwargs):
+        """Iterate over the chunks of a binary file
 
         Kwargs:
             size (int): Number of bytes in which to split the contents
+            mmap (bool): Whether to map the file in memory and yield views of it instead of
+                copying each chunk. Default: False.
+            offset (int): Position in the file of the first chunk. Default: 0.
+
+        Yields:
+            bytes or memoryview.
         """
-        self._parts = []
+        if kwargs.get("mmap"):
+            view = self._map_file()
+            size = kwargs.get("size")
+            for offset in range(kwargs.get("offset", 0), len(view), size):
+                with self.metrics.stage("read"):
+                    content = view[offset:offset + size]
+                self.metrics.add("read", items=1, nbytes=len(content))
+                yield content
+            return
 
         with open(self.file_path, 'rb') as f:
+            f.seek(kwargs.get("offset", 0))
             while 1:
-               content = f.read(kwargs.get("size"))
+               with self.metrics.stage("read"):
+                   content = f.read(kwargs.get("size"))
                if content:
-                   self._parts.append(content)
+                   self.metrics.add("read", items=1, nbytes=len(content))
+                   yield content
                else:
                    break
+
+    def iter_range(self, start, end, **kwargs):
+        """Iterate over the chunks of a range of parts, seeking straight to the first one
+
+        Args:
+            start (int): Zero-based index of the first part.
+            end (int): Index past the last part.
+
+        Kwargs:
+            size (int): Number of bytes in which to split the contents
+            mmap (bool): Whether to map the file in memory. Default: False.
+
+        Returns:
+            iterator.
+        """
+        size = kwargs.get("size")
+        return itertools.islice(
+            self.iter_parts(**dict(kwargs, offset=start * size)),
+            max(0, end - start)
+        )
+
+    def split_document(self, **kwargs):
+        """Split a binary file
+
+        Kwargs:
+            size (int): Number of bytes in which to split the contents
+            mmap (bool): Whether to use memory-mapped zero-copy chunks. Default: False.
+            output_folder (str): If provided, the parts are streamed to this folder as they are
+                read and only their digests are kept in memory.
+            first_part (int): Number of the first part streamed. Default: 1.
+            packed (bool): Whether to stream the parts to a single pack. Default: False.
+            digests (list): Known digests of the streamed parts, which are not hashed again.
+            queue_size (int): If positive, the streamed parts are read, hashed and written by
+                overlapping stages connected by queues of this many batches. Default: 0.
+        """
+        self._parts = []
+
+        if kwargs.get("output_folder"):
+            self.stream_parts(
+                self.iter_parts(**kwargs),
+                kwargs["output_folder"],
+                first_part=kwargs.get("first_part", 1),
+                packed=kwargs.get("packed", False),
+                digests=kwargs.get("digests"),
+                queue_size=kwargs.get("queue_size", 0)
+            )
+        else:
+            self._parts = list(self.metrics.track("split", self.iter_parts(**kwargs)))
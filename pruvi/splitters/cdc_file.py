@@ -0,0 +1,243 @@
+import hashlib
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from pruvi.splitters.file import FileSplitter
+
+GEAR = [
+    int.from_bytes(hashlib.sha256(bytes([i])).digest()[:8], "little")
+    for i in range(256)
+]
+"""Random 64-bit values added to the rolling hash for each byte value"""
+
+_MASK64 = (1 << 64) - 1
+
+_GEAR_NP = np.array(GEAR, dtype=np.uint64) if np is not None else None
+
+
+def _mask(bits):
+    """Get a mask selecting the highest bits of the rolling hash
+
+    The highest bits depend on the last 64 bytes read, which is the window of the hash.
+    """
+    return ((1 << bits) - 1) << (64 - bits)
+
+
+def _masks(avg_size):
+    """Get the stricter and the looser masks used before and after the average size"""
+    bits = max(avg_size.bit_length() - 1, 2)
+    return _mask(bits + 1), _mask(bits - 1)
+
+
+def _scan(data, fp, start, stop, mask):
+    """Roll the hash over data[start:stop] until the masked bits are zero
+
+    Bits above the 64th never reach the lower ones, so they are only cleared every few
+    bytes instead of after each one.
+
+    Returns:
+        tuple. The offset after the byte where the masked bits are zero, or None, and the
+            rolling hash.
+    """
+    gear = GEAR
+    for offset in range(start, stop, 32):
+        for i, b in enumerate(data[offset:min(offset + 32, stop)], offset + 1):
+            fp = (fp << 1) + gear[b]
+            if not fp & mask:
+                return i, fp & _MASK64
+        fp &= _MASK64
+    return None, fp
+
+
+def _cut_points_python(data, min_size, avg_size, max_size):
+    """Find the boundaries of the chunks rolling the hash one byte at a time"""
+    mask_s, mask_l = _masks(avg_size)
+    length = len(data)
+    start = 0
+    while start < length:
+        remaining = length - start
+        if remaining <= min_size:
+            yield length
+            return
+
+        end = start + min(remaining, max_size)
+        normal = min(start + avg_size, end)
+        cut, fp = _scan(data, 0, start + min_size, normal, mask_s)
+        if cut is None:
+            cut, fp = _scan(data, fp, normal, end, mask_l)
+        cut = cut or end
+        yield cut
+        start = cut
+
+
+class _Candidates(object):
+    """Positions where the masked bits of the Gear hash of a 64-byte window are zero
+
+    The hash of every position of a block is computed with numpy in log2(64) vectorized
+    steps, each one adding the sums of the previous step shifted by their length.
+    """
+    def __init__(self, data, mask_s, mask_l, block_size):
+        self.data = data
+        self.mask_s = np.uint64(mask_s)
+        self.mask_l = np.uint64(mask_l)
+        self.block_size = block_size
+        self.positions = np.empty(0, dtype=np.int64)
+        self.strict = np.empty(0, dtype=bool)
+        self.stop = 0
+        # Small blocks and reused buffers keep the arrays in the CPU cache
+        self._fp = np.empty(block_size + 63, dtype=np.uint64)
+        self._shifted = np.empty(block_size + 63, dtype=np.uint64)
+
+    def extend(self, stop, start):
+        """Compute the candidates up to stop, dropping the ones before start"""
+        keep = np.searchsorted(self.positions, start)
+        positions = [self.positions[keep:]]
+        strict = [self.strict[keep:]]
+        fp = self._fp
+        shifted = self._shifted
+        while self.stop < stop:
+            lo = max(0, self.stop - 63)
+            hi = min(len(self.data), self.stop + self.block_size)
+            n = hi - lo
+            np.take(_GEAR_NP, np.frombuffer(self.data[lo:hi], dtype=np.uint8), out=fp[:n])
+            m = 1
+            while m < 64:
+                np.left_shift(fp[:n - m], m, out=shifted[:n - m])
+                np.add(fp[m:n], shifted[:n - m], out=fp[m:n])
+                m <<= 1
+            window = fp[self.stop - lo:n]
+            found = np.flatnonzero((window & self.mask_l) == 0)
+            positions.append(found + self.stop)
+            strict.append((window[found] & self.mask_s) == 0)
+            self.stop = hi
+        self.positions = np.concatenate(positions)
+        self.strict = np.concatenate(strict)
+
+    def first(self, start, stop, strict):
+        """Get the first candidate in [start, stop), or None"""
+        lo, hi = np.searchsorted(self.positions, (start, stop))
+        if strict:
+            found = np.flatnonzero(self.strict[lo:hi])
+            return int(self.positions[lo + found[0]]) if len(found) else None
+        return int(self.positions[lo]) if lo < hi else None
+
+
+def _cut_points_numpy(data, min_size, avg_size, max_size):
+    """Find the boundaries of the chunks from the candidates computed with numpy"""
+    mask_s, mask_l = _masks(avg_size)
+    candidates = _Candidates(data, mask_s, mask_l, 2**14)
+    length = len(data)
+    start = 0
+    while start < length:
+        remaining = length - start
+        if remaining <= min_size:
+            yield length
+            return
+
+        end = start + min(remaining, max_size)
+        normal = min(start + avg_size, end)
+        i = start + min_size
+        # The hash only covers a whole window 64 bytes after it was reset
+        full = min(i + 63, end)
+        cut, fp = _scan(data, 0, i, min(full, normal), mask_s)
+        if cut is None and full > normal:
+            cut, fp = _scan(data, fp, normal, full, mask_l)
+        if cut is None and full < end:
+            if end > candidates.stop:
+                candidates.extend(end, start)
+            j = candidates.first(full, normal, True) if full < normal else None
+            if j is None:
+                j = candidates.first(max(full, normal), end, False)
+            cut = j + 1 if j is not None else None
+        cut = cut or end
+        yield cut
+        start = cut
+
+
+def cut_points(data, min_size=2048, avg_size=8192, max_size=65536):
+    """Find the boundaries of content-defined chunks with FastCDC
+
+    A Gear rolling hash is computed from `min_size` bytes after the previous boundary and
+    a boundary is set where its masked bits are all zero. A stricter mask is used before
+    `avg_size` and a looser one after it (normalized chunking), so that the chunk sizes
+    concentrate around `avg_size`. As boundaries only depend on the nearby bytes, an edit
+    only changes the chunks around it.
+
+    If numpy is installed, the hash of every position is computed by blocks in vectorized
+    steps, which finds the boundaries at about 50 MB/s instead of the 9 MB/s of the byte
+    loop used otherwise (sha3_512 hashes about 170 MB/s on the same machine). Both give
+    the same boundaries.
+
+    Args:
+        data (bytes): Any bytes-like object.
+        min_size (int): Minimum size of a chunk.
+        avg_size (int): Expected size of a chunk. It should be a power of two.
+        max_size (int): Maximum size of a chunk.
+
+    Yields:
+        int. The end offset of each chunk.
+    """
+    # The vectorized steps do not pay off for the smallest chunks
+    if np is not None and avg_size >= 256:
+        return _cut_points_numpy(data, min_size, avg_size, max_size)
+    return _cut_points_python(data, min_size, avg_size, max_size)
+
+
+class CDCFileSplitter(FileSplitter):
+    """Content-defined chunking File Splitter object
+
+    Unlike fixed-size chunks, inserting or removing bytes only changes the chunks around
+    the edit, so most leaves are shared between two versions of a file.
+    """
+    def iter_parts(self, **kwargs):
+        """Iterate over the content-defined chunks of a file
+
+        Kwargs:
+            avg_size (int): Expected size of a chunk. Default: 8192.
+            min_size (int): Minimum size of a chunk. Default: avg_size // 4.
+            max_size (int): Maximum size of a chunk. Default: avg_size * 8.
+
+        Yields:
+            memoryview.
+        """
+        avg_size = kwargs.get("avg_size") or 8192
+        min_size = kwargs.get("min_size") or avg_size // 4
+        max_size = kwargs.get("max_size") or avg_size * 8
+
+        view = self._map_file()
+        start = 0
+        for end in cut_points(view, min_size, avg_size, max_size):
+            yield view[start:end]
+            start = end
+
+    def split_document(self, **kwargs):
+        """Split a file in content-defined chunks
+
+        Kwargs:
+            avg_size (int): Expected size of a chunk. Default: 8192.
+            min_size (int): Minimum size of a chunk. Default: avg_size // 4.
+            max_size (int): Maximum size of a chunk. Default: avg_size * 8.
+            output_folder (str): If provided, the parts are streamed to this folder as they are
+                found and only their digests are kept in memory.
+            first_part (int): Number of the first part streamed. Default: 1.
+            packed (bool): Whether to stream the parts to a single pack. Default: False.
+            digests (list): Known digests of the streamed parts, which are not hashed again.
+            queue_size (int): If positive, the streamed parts are read, hashed and written by
+                overlapping stages connected by queues of this many batches. Default: 0.
+        """
+        self._parts = []
+
+        if kwargs.get("output_folder"):
+            self.stream_parts(
+                self.iter_parts(**kwargs),
+                kwargs["output_folder"],
+                first_part=kwargs.get("first_part", 1),
+                packed=kwargs.get("packed", False),
+                digests=kwargs.get("digests"),
+                queue_size=kwargs.get("queue_size", 0)
+            )
+        else:
+            self._parts = list(self.metrics.track("split", self.iter_parts(**kwargs)))
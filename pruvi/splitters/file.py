@@ -1,6 +1,11 @@
+import itertools
+import logging
+import mmap
 import os
 import tempfile
 
+from pruvi.incremental import AppendOnlyTree, frontier_from_digests
+from pruvi.shards import build_shards
 from pruvi.splitters.base import BaseSplitter
 
 
@@ -10,23 +15,161 @@ class FileSplitter(BaseSplitter):
     Attributes:
         file_path (str): The file to split.
     """
-    def __init__(self, file_path, parts=[], hash_type="sha3_512"):
+    def __init__(self, file_path, parts=[], hash_type="sha3_512", engine="pymerkle", cache=None,
+                 metrics=None, memory_budget=2**26):
         """Constructor
 
         Args:
             file_path (str): The file to split.
             parts (list): List of elements to proof.
             hash_type (str): The hash type to be used.
+            engine (str): The Merkle Tree implementation to be used.
+            cache (pruvi.cache.LeafCache): Cache of leaf digests. Default: None.
+            metrics (pruvi.metrics.Metrics): Timers and counters of the pipeline. Default: None.
+            memory_budget (int): Approximate maximum number of bytes used by the disk engine.
+                Default: 64 MiB.
         """
-        BaseSplitter.__init__(self, parts=parts, hash_type=hash_type)
+        BaseSplitter.__init__(
+            self,
+            parts=parts,
+            hash_type=hash_type,
+            engine=engine,
+            cache=cache,
+            metrics=metrics,
+            memory_budget=memory_budget
+        )
         self.file_path = file_path
 
+    def _map_file(self):
+        """Map the file into memory
+
+        The mapping is kept open while the splitter is alive so that the slices taken from
+        it remain valid until they have been hashed and written.
+
+        Returns:
+            memoryview. A read-only view of the whole file.
+        """
+        with open(self.file_path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return memoryview(b"")
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return memoryview(self._mmap)
+
     def _get_file_path(self, part):
         return os.path.join(
             tempfile.gettempdir(),
             f"document-part{part}"
         )
 
+    def iter_range(self, start, end, **kwargs):
+        """Iterate over a range of the parts of the file
+
+        This is how a shard gets its parts (see pruvi.shards). The parts before the range
+        are produced and skipped, so subclasses that can seek to a part override it.
+
+        Args:
+            start (int): Zero-based index of the first part.
+            end (int): Index past the last part.
+
+        Kwargs:
+            Arguments of the iter_parts method.
+
+        Returns:
+            iterator.
+        """
+        return itertools.islice(self.iter_parts(**kwargs), start, end)
+
+    def append_document(self, output_folder, workers=1, executor="thread", stream=False,
+                        queue_size=0, **kwargs):
+        """Append the parts of the file that follow the ones of a previous export
+
+        The file must start with the parts already exported, as a log file that kept
+        growing does. Those parts are hashed again to check that the tree they give has the
+        same frontier as the export, but they are not written again. Only the parts after
+        them are appended (see pruvi.splitters.base.BaseSplitter.append).
+
+        Args:
+            output_folder (str): Folder of the previous export.
+            workers (int): Number of workers used to hash the new leaves. Default: 1.
+            executor (str): Kind of pool used to hash the new leaves. Default: "thread".
+            stream (bool): Whether to write the new parts as they are read. Default: False.
+            queue_size (int): If positive, the streamed parts are read, hashed and written
+                by overlapping stages connected by queues of this many batches. Default: 0.
+
+        Kwargs:
+            Arguments of the iter_parts method.
+
+        Raises:
+            ValueError: if the export is packed or if the file does not start with its parts.
+        """
+        # Checked before anything is streamed to the export
+        if os.path.exists(os.path.join(output_folder, "parts", "parts.idx")):
+            raise ValueError("Parts cannot be appended to a packed export.")
+
+        state = AppendOnlyTree.load(os.path.join(output_folder, "tree-state.json"))
+        self.hash_type = state.hash_type
+
+        parts = self.iter_parts(**kwargs)
+        with self.metrics.stage("check"):
+            length, frontier = frontier_from_digests(
+                (self._hash_part(part) for part in itertools.islice(parts, state.length)),
+                state.hash_type
+            )
+        if length != state.length or frontier != state.frontier:
+            raise ValueError(
+                f"The first {state.length} parts of '{self.file_path}' are not the ones of the export."
+            )
+
+        self._parts = []
+        if stream:
+            self.stream_parts(
+                parts,
+                os.path.join(output_folder, "parts"),
+                first_part=state.length + 1,
+                queue_size=queue_size
+            )
+        else:
+            self._parts = list(self.metrics.track("split", parts))
+            if not self._parts:
+                self._digests = []
+
+        if not self._parts and not self._digests:
+            logging.info(f"No parts after the {state.length} parts of the export.")
+            self.tree = state
+            return
+        self.append(output_folder, workers=workers, executor=executor)
+
+    def split_sharded(self, output_folder, shard_size, workers=1, backend="process", **kwargs):
+        """Split the file in shards built in a pool and merge their trees
+
+        Each shard streams its parts to the parts folder of the export and builds the tree
+        of its own range of parts. The merged tree has the same root and proofs as a tree
+        built from all the parts at once.
+
+        Args:
+            output_folder (str): Output folder.
+            shard_size (int): Number of parts of each shard. It must be a power of two.
+            workers (int): Number of shards built at once. Default: 1.
+            backend (str): Kind of pool. One of the following: "process", "thread".
+                Default: "process".
+
+        Kwargs:
+            Arguments of the iter_parts method.
+        """
+        with self.metrics.stage("split"):
+            shards = build_shards(
+                type(self),
+                self.file_path,
+                shard_size,
+                output_folder,
+                hash_type=self.hash_type,
+                options=kwargs,
+                workers=workers,
+                backend=backend
+            )
+            self.metrics.add("split", items=sum(shard["length"] for shard in shards))
+        self.merge_shards(output_folder)
+
     def split_document(self, text, method="lines"):
         """Split a text
 
@@ -1,36 +1,134 @@
+import collections
+import io
+from concurrent.futures import ProcessPoolExecutor
+
 from PyPDF2 import PdfFileWriter, PdfFileReader
 
 from pruvi.splitters.file import FileSplitter
 
 
+def _iter_pages(inputpdf, start, end):
+    """Serialize a range of pages as standalone PDF documents in memory
+
+    Args:
+        inputpdf (PyPDF2.PdfFileReader): The source document.
+        start (int): First page, included.
+        end (int): Last page, excluded.
+
+    Yields:
+        bytes.
+    """
+    for i in range(start, end):
+        output = PdfFileWriter()
+        output.addPage(inputpdf.getPage(i))
+
+        buffer = io.BytesIO()
+        output.write(buffer)
+        yield buffer.getvalue()
+
+
+def _render_pages(file_path, start, end):
+    """Serialize a range of pages in a worker process
+
+    The source document is parsed once per range instead of once per page.
+
+    Args:
+        file_path (str): The PDF file.
+        start (int): First page, included.
+        end (int): Last page, excluded.
+
+    Returns:
+        list. The bytes of each page.
+    """
+    with open(file_path, "rb") as f:
+        return list(_iter_pages(PdfFileReader(f), start, end))
+
+
 class PDFFileSplitter(FileSplitter):
     """PDF File Splitter object
     """
-    def split_document(self, **kwargs):
-        """Split a PDF file
+    def iter_parts(self, **kwargs):
+        """Iterate over the pages of a PDF file
+
+        Pages are rendered in memory. With several workers, ranges of pages are rendered in
+        a process pool and yielded in order as soon as each range is ready. At most two
+        ranges per worker are submitted ahead of the one being yielded.
 
         Kwargs:
-            method (str): Splitting method. One of the following: "pages".
+            workers (int): Number of processes used to render the pages. Default: 1.
+
+        Yields:
+            bytes.
         """
-        parts = []
+        workers = kwargs.get("workers", 1)
+        with open(self.file_path, "rb") as f:
+            inputpdf = PdfFileReader(f)
+            num_pages = inputpdf.numPages
+            if workers <= 1:
+                yield from _iter_pages(inputpdf, 0, num_pages)
+                return
 
-        if kwargs.get("method", "pages") == "pages":
-            inputpdf = PdfFileReader(open(self.file_path, "rb"))
+        chunk = max(1, min(64, num_pages // (workers * 4)))
+        starts = iter(range(0, num_pages, chunk))
+        # Only a window of ranges is submitted at once, so rendered pages waiting to be
+        # consumed are bounded whatever the number of pages
+        window = 2 * workers
+        pending = collections.deque()
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            while 1:
+                while len(pending) < window:
+                    start = next(starts, None)
+                    if start is None:
+                        break
+                    pending.append(
+                        executor.submit(_render_pages, self.file_path, start, min(start + chunk, num_pages))
+                    )
+                if not pending:
+                    break
+                yield from pending.popleft().result()
 
-            for i in range(inputpdf.numPages):
-                output = PdfFileWriter()
-                output.addPage(inputpdf.getPage(i))
+    def iter_range(self, start, end, **kwargs):
+        """Iterate over a range of pages, rendering only those
 
-                part_file = self._get_file_path(i)
+        Args:
+            start (int): Zero-based index of the first page.
+            end (int): Index past the last page.
 
-                with open(part_file, "wb") as outputStream:
-                    output.write(outputStream)
+        Yields:
+            bytes.
+        """
+        with open(self.file_path, "rb") as f:
+            inputpdf = PdfFileReader(f)
+            num_pages = inputpdf.numPages
+            yield from _iter_pages(inputpdf, min(start, num_pages), min(end, num_pages))
 
-                with open(part_file, "rb") as f:
-                    pdf_data = bytearray(f.read())
-                parts.append(pdf_data)
-        else:
-            with open(self.file_path, 'rb') as f:
-                parts = [f.read()]
+    def split_document(self, **kwargs):
+        """Split a PDF file
 
-        self.set_parts(parts)
+        Kwargs:
+            method (str): Splitting method. One of the following: "pages".
+            workers (int): Number of processes used to render the pages. Default: 1.
+            output_folder (str): If provided, the pages are streamed to this folder as they
+                are rendered and only their digests are kept in memory.
+            first_part (int): Number of the first part streamed. Default: 1.
+            packed (bool): Whether to stream the parts to a single pack. Default: False.
+            digests (list): Known digests of the streamed parts, which are not hashed again.
+            queue_size (int): If positive, the streamed parts are read, hashed and written by
+                overlapping stages connected by queues of this many batches. Default: 0.
+        """
+        self._parts = []
+
+        if kwargs.get("method", "pages") == "pages":
+            if kwargs.get("output_folder"):
+                self.stream_parts(
+                    self.iter_parts(**kwargs),
+                    kwargs["output_folder"],
+                    first_part=kwargs.get("first_part", 1),
+                    packed=kwargs.get("packed", False),
+                    digests=kwargs.get("digests"),
+                    queue_size=kwargs.get("queue_size", 0)
+                )
+            else:
+                self.set_parts(self.metrics.track("split", self.iter_parts(**kwargs)))
+        else:
+            self.set_parts([self._map_file()])
@@ -1,27 +1,125 @@
 from pruvi.splitters.file import FileSplitter
 
+LINE_BREAKS = frozenset("\n\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029")
+"""Characters at which `str.splitlines` breaks lines"""
+
 
 class TextFileSplitter(FileSplitter):
     """Text File Splitter object
     """
-    def split_document(self, **kwargs):
-        """Split a binary file
+    def _iter_tokens(self, f, method, block_size):
+        """Iterate over the tokens of a text read in blocks
+
+        Only the block just read is scanned for separators. The pieces of a token that
+        continues in the next blocks are kept in a list and joined once the token is known
+        to be complete, so a long token is not scanned again for every block. The tokens are
+        the same as the ones produced by `splitlines()`, `split()` or `split("\\n\\n")`
+        on the whole text.
+
+        Args:
+            f (file): A file opened in text mode with universal newlines.
+            method (str): One of the following: "lines", "paragraphs", "words".
+            block_size (int): Number of characters read at once.
+
+        Yields:
+            str.
+        """
+        pending = []
+        while 1:
+            with self.metrics.stage("read"):
+                block = f.read(block_size)
+            self.metrics.add("read", items=1, nbytes=len(block))
+            if not block:
+                break
+
+            if method == "lines":
+                # Newlines have already been translated, so each separator is one character
+                for line in block.splitlines(True):
+                    if line[-1] in LINE_BREAKS:
+                        yield "".join(pending) + line[:-1]
+                        pending = []
+                    else:
+                        pending.append(line)
+            elif method == "words":
+                words = block.split()
+                if pending and (not words or block[0].isspace()):
+                    yield "".join(pending)
+                    pending = []
+                last = None if not words or block[-1].isspace() else words.pop()
+                if words:
+                    words[0] = "".join(pending) + words[0]
+                    pending = []
+                    yield from words
+                if last is not None:
+                    pending.append(last)
+            else:
+                # A separator split between two blocks starts at the end of the pending
+                # paragraph, which has no separator of its own
+                if block[0] == "\n" and pending and pending[-1][-1] == "\n":
+                    pending[-1] = pending[-1][:-1]
+                    yield "".join(pending)
+                    pending = []
+                    block = block[1:]
+                paragraphs = block.split("\n\n")
+                last = paragraphs.pop()
+                if paragraphs:
+                    paragraphs[0] = "".join(pending) + paragraphs[0]
+                    pending = []
+                    yield from paragraphs
+                if last:
+                    pending.append(last)
+
+        # A text always ends with a paragraph, even an empty one
+        if pending or method == "paragraphs":
+            yield "".join(pending)
+
+    def iter_parts(self, **kwargs):
+        """Iterate over the encoded tokens of a text file
 
         Kwargs:
             method (str): Splitting method. One of the following: "lines", "paragraphs",
                 "words".
+            block_size (int): Number of characters read at once. Default: 2**20.
+            codification (str): The codification of the parts. Default: "utf-8".
+
+        Yields:
+            bytes.
         """
-        parts = []
+        method = kwargs.get("method")
+        codification = kwargs.get("codification", "utf-8")
 
         with open(self.file_path, 'r') as f:
-            text = f.read()
-            if kwargs.get("method") == "lines":
-                parts = text.splitlines()
-            elif kwargs.get("method") == "words":
-                parts = text.split()
-            elif kwargs.get("method") == "paragraphs":
-                parts = text.split("\n\n")
+            if method in ("lines", "paragraphs", "words"):
+                for token in self._iter_tokens(f, method, kwargs.get("block_size", 2**20)):
+                    yield token.encode(codification)
             else:
-                parts = [text]
+                yield f.read().encode(codification)
+
+    def split_document(self, **kwargs):
+        """Split a text file
+
+        Kwargs:
+            method (str): Splitting method. One of the following: "lines", "paragraphs",
+                "words".
+            block_size (int): Number of characters read at once. Default: 2**20.
+            output_folder (str): If provided, the parts are streamed to this folder as they are
+                read and only their digests are kept in memory.
+            first_part (int): Number of the first part streamed. Default: 1.
+            packed (bool): Whether to stream the parts to a single pack. Default: False.
+            digests (list): Known digests of the streamed parts, which are not hashed again.
+            queue_size (int): If positive, the streamed parts are read, hashed and written by
+                overlapping stages connected by queues of this many batches. Default: 0.
+        """
+        self._parts = []
 
-        self.set_parts(parts)
+        if kwargs.get("output_folder"):
+            self.stream_parts(
+                self.iter_parts(**kwargs),
+                kwargs["output_folder"],
+                first_part=kwargs.get("first_part", 1),
+                packed=kwargs.get("packed", False),
+                digests=kwargs.get("digests"),
+                queue_size=kwargs.get("queue_size", 0)
+            )
+        else:
+            self._parts = list(self.metrics.track("split", self.iter_parts(**kwargs)))
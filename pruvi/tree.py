@@ -0,0 +1,429 @@
+import binascii
+import json
+import os
+import shutil
+import tempfile
+import textwrap
+import uuid
+import weakref
+
+from pruvi.exceptions import EmptyTreeException
+from pruvi.hashing import get_hasher, hash_bytes
+from pruvi.proofs import audit_steps, build_levels, hash_level, serialize_proof, signed_path
+
+
+class ArrayMerkleTree(object):
+    """Merkle tree storing each level as a contiguous buffer of fixed-width digests
+
+    It produces the same root and proofs as a pymerkle tree created with
+    `security=False, raw_bytes=True`, without creating a Python object per node.
+
+    Attributes:
+        uuid (str): Identifier of the tree.
+        hash_type (str): The hash type to be used.
+        levels (list): Buffers of raw digests, from the leaves to the root.
+    """
+    def __init__(self, hash_type="sha3_512"):
+        """Constructor
+
+        Args:
+            hash_type (str): The hash type to be used.
+        """
+        self.uuid = str(uuid.uuid1())
+        self.hash_type = hash_type
+        self.levels = []
+        self._hasher = get_hasher(hash_type)
+        self._width = self._hasher().digest_size
+
+    @property
+    def length(self):
+        """Number of leaves of the tree"""
+        return len(self.levels[0]) // self._width if self.levels else 0
+
+    @property
+    def rootHash(self):
+        """Root of the tree as an hex digest
+
+        Returns:
+            bytes.
+
+        Raises:
+            pruvi.exceptions.EmptyTreeException.
+        """
+        if not self.levels:
+            raise EmptyTreeException
+        return binascii.hexlify(self.levels[-1])
+
+    def extend(self, digests):
+        """Append several leaves to the tree
+
+        An empty tree is built level by level in bulk. Otherwise, each leaf is appended on
+        its own.
+
+        Args:
+            digests (list): Hex digests of the leaves.
+        """
+        if self.levels:
+            for digest in digests:
+                self.update(digest=digest)
+        elif digests:
+            self.levels = [bytearray(level) for level in build_levels(digests, self.hash_type)]
+
+    def update(self, record=None, digest=None):
+        """Append a leaf to the tree
+
+        Only the nodes in the right edge of the tree are recalculated.
+
+        Args:
+            record (bytes): The record whose digest is to be stored in the new leaf.
+            digest (str): The hex digest to be stored in the new leaf.
+        """
+        if digest is None:
+            digest = hash_bytes(record, self.hash_type)
+
+        width = self._width
+        if not self.levels:
+            self.levels = [bytearray()]
+        self.levels[0] += binascii.unhexlify(digest)
+
+        k = 0
+        while 1:
+            count = len(self.levels[k]) // width
+            if count == 1 and k == len(self.levels) - 1:
+                break
+
+            if count % 2:
+                node = self.levels[k][-width:]
+            else:
+                node = self._hasher(binascii.hexlify(self.levels[k][-2 * width:])).digest()
+
+            if k + 1 == len(self.levels):
+                self.levels.append(bytearray())
+            parent = (count - 1) // 2
+            self.levels[k + 1][parent * width:(parent + 1) * width] = node
+            k += 1
+
+    def get_leaves(self):
+        """Get the hex digests of the leaves
+
+        Returns:
+            list.
+        """
+        h = binascii.hexlify(self.levels[0]).decode() if self.levels else ""
+        step = 2 * self._width
+        return [h[i:i + step] for i in range(0, len(h), step)]
+
+    def serialize(self):
+        """Serialize the tree with the same layout as a pymerkle export
+
+        Returns:
+            dict.
+        """
+        return {
+            "header": {
+                "hash_type": self.hash_type,
+                "encoding": "utf_8",
+                "raw_bytes": True,
+                "security": False
+            },
+            "hashes": self.get_leaves()
+        }
+
+    def export(self, file_path):
+        """Export the tree to a JSON file
+
+        Args:
+            file_path (str): Output file.
+        """
+        with open(file_path, "w") as f:
+            json.dump(self.serialize(), f, indent=4)
+
+    @classmethod
+    def load(cls, file_path):
+        """Load a tree exported either by pruvi or by pymerkle
+
+        Args:
+            file_path (str): Path to the exported tree.
+
+        Returns:
+            pruvi.tree.ArrayMerkleTree.
+        """
+        with open(file_path) as f:
+            data = json.load(f)
+        tree = cls(hash_type=data["header"]["hash_type"])
+        tree.extend(data["hashes"])
+        return tree
+
+
+class LevelFile(object):
+    """Read-only view of a level file
+
+    It supports `len` and slicing like the level buffers of an in-memory tree, but each
+    slice is read from the file with a positioned read, so only the nodes requested are
+    ever loaded in memory.
+    """
+    def __init__(self, file_path):
+        """Constructor
+
+        Args:
+            file_path (str): Path to the level file.
+        """
+        self._fd = os.open(file_path, os.O_RDONLY)
+        self._size = os.fstat(self._fd).st_size
+
+    def __len__(self):
+        return self._size
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            raise TypeError("level files can only be sliced")
+        start, stop, _ = key.indices(self._size)
+        return os.pread(self._fd, max(0, stop - start), start)
+
+    def close(self):
+        """Close the level file"""
+        os.close(self._fd)
+
+
+class DiskMerkleTree(object):
+    """Merkle tree whose levels are stored in files
+
+    The leaf digests are streamed to a file and each upper level is built with a
+    sequential pass over the level below, reading and hashing it in chunks. The memory
+    used depends on the budget and not on the number of leaves, so trees with far more
+    leaves than fit in memory can be built. Proofs are served by reading the few nodes
+    they need from the level files.
+
+    The tree has the same shape and hashing rules as pruvi.tree.ArrayMerkleTree. Until it
+    is built, it behaves as the sequence of its leaf digests, so it can collect them as
+    they are computed.
+
+    Attributes:
+        uuid (str): Identifier of the tree.
+        hash_type (str): The hash type to be used.
+        folder (str): The folder of the level files.
+        memory_budget (int): Approximate maximum number of bytes used to build the tree.
+        levels (list): Views of the level files, from the leaves to the root, once built.
+    """
+    def __init__(self, folder=None, hash_type="sha3_512", memory_budget=2**26):
+        """Constructor
+
+        Args:
+            folder (str): The folder of the level files. Default: a temporary folder
+                removed with the tree.
+            hash_type (str): The hash type to be used.
+            memory_budget (int): Approximate maximum number of bytes used to build the
+                tree. Default: 64 MiB.
+        """
+        self.uuid = str(uuid.uuid1())
+        self.hash_type = hash_type
+        self.memory_budget = memory_budget
+        self.levels = []
+        self._width = get_hasher(hash_type)().digest_size
+        # Chunks hold an even number of digests, so pairs are never split between two chunks
+        self._chunk_size = max(2 * self._width, memory_budget // 8 // (2 * self._width) * 2 * self._width)
+
+        if folder is None:
+            folder = tempfile.mkdtemp(prefix="pruvi-tree-")
+            self._cleanup = weakref.finalize(self, shutil.rmtree, folder, True)
+        else:
+            os.makedirs(folder, exist_ok=True)
+            self._cleanup = None
+        self.folder = folder
+
+        self._length = 0
+        self._buffer = bytearray()
+        self._leaves = None
+
+    @classmethod
+    def load(cls, folder, hash_type="sha3_512", memory_budget=2**26):
+        """Load a tree from the level files of a folder
+
+        Args:
+            folder (str): The folder of the level files.
+            hash_type (str): The hash type used by the tree.
+            memory_budget (int): Approximate maximum number of bytes used. Default: 64 MiB.
+
+        Returns:
+            pruvi.tree.DiskMerkleTree.
+        """
+        tree = cls(folder, hash_type=hash_type, memory_budget=memory_budget)
+        tree.open_levels()
+        return tree
+
+    def _level_path(self, k):
+        return os.path.join(self.folder, f"level-{k}.bin")
+
+    def open_levels(self):
+        """Use the level files already written in the folder of the tree
+
+        This is how trees built elsewhere, such as a merge of shards, are served.
+
+        Raises:
+            pruvi.exceptions.EmptyTreeException: if there is no leaf file.
+        """
+        levels = []
+        while os.path.exists(self._level_path(len(levels))):
+            levels.append(LevelFile(self._level_path(len(levels))))
+        if not levels or not len(levels[0]):
+            raise EmptyTreeException
+        self.levels = levels
+        self._length = len(levels[0]) // self._width
+
+    def __len__(self):
+        return self._length
+
+    @property
+    def length(self):
+        """Number of leaves of the tree"""
+        return self._length
+
+    def append(self, digest):
+        """Append a leaf
+
+        Args:
+            digest (str): The hex digest of the leaf.
+        """
+        if self.levels:
+            raise ValueError("Leaves cannot be added to a tree already built.")
+        self._buffer += binascii.unhexlify(digest)
+        self._length += 1
+        if len(self._buffer) >= self._chunk_size:
+            self._flush()
+
+    def extend(self, digests):
+        """Append several leaves
+
+        Args:
+            digests (iterable): Hex digests of the leaves.
+        """
+        for digest in digests:
+            self.append(digest)
+
+    def __iter__(self):
+        """Iterate over the hex digests of the leaves, reading them in chunks"""
+        if self.levels:
+            leaves = self.levels[0]
+        else:
+            self._flush()
+            leaves = LevelFile(self._level_path(0))
+
+        step = 2 * self._width
+        try:
+            for start in range(0, len(leaves), self._chunk_size):
+                h = binascii.hexlify(leaves[start:start + self._chunk_size]).decode()
+                for i in range(0, len(h), step):
+                    yield h[i:i + step]
+        finally:
+            if isinstance(leaves, LevelFile) and not self.levels:
+                leaves.close()
+
+    def _flush(self):
+        if self._leaves is None:
+            self._leaves = open(self._level_path(0), "wb")
+        self._leaves.write(self._buffer)
+        self._leaves.flush()
+        self._buffer = bytearray()
+
+    def build(self):
+        """Build the upper levels with a sequential pass over each level
+
+        Raises:
+            pruvi.exceptions.EmptyTreeException: if the tree has no leaves.
+        """
+        if self.levels:
+            return
+        if not self._length:
+            raise EmptyTreeException
+
+        self._flush()
+        self._leaves.close()
+
+        k = 0
+        count = self._length
+        chunk = bytearray(self._chunk_size)
+        while count > 1:
+            with open(self._level_path(k), "rb", buffering=0) as f, \
+                    open(self._level_path(k + 1), "wb") as g:
+                while 1:
+                    n = f.readinto(chunk)
+                    if not n:
+                        break
+                    g.write(hash_level(memoryview(chunk)[:n], self.hash_type))
+            k += 1
+            count = (count + 1) // 2
+
+        self.levels = [LevelFile(self._level_path(i)) for i in range(k + 1)]
+
+    @property
+    def rootHash(self):
+        """Root of the tree as an hex digest
+
+        Returns:
+            bytes.
+
+        Raises:
+            pruvi.exceptions.EmptyTreeException.
+        """
+        if not self.levels:
+            raise EmptyTreeException
+        return binascii.hexlify(self.levels[-1][:self._width])
+
+    def get_leaves(self):
+        """Iterate over the hex digests of the leaves
+
+        Returns:
+            iterator.
+        """
+        return iter(self)
+
+    def get_proof(self, index):
+        """Get the proof of a leaf
+
+        Args:
+            index (int): Zero-based index of the leaf.
+
+        Returns:
+            dict.
+
+        Raises:
+            IndexError: if there is no such leaf.
+        """
+        if not 0 <= index < self._length:
+            raise IndexError("proof index out of range")
+        leaf = binascii.hexlify(self.levels[0][index * self._width:(index + 1) * self._width]).decode()
+        proof_index, proof_path = signed_path(leaf, audit_steps(self.levels, index, self._width))
+        return serialize_proof(proof_index, proof_path, self.hash_type, self.uuid)
+
+    def export(self, file_path):
+        """Export the tree to a JSON file with the same layout as ArrayMerkleTree.export
+
+        The leaves are written as they are read, so they are never all in memory at once.
+
+        Args:
+            file_path (str): Output file.
+        """
+        header = {
+            "hash_type": self.hash_type,
+            "encoding": "utf_8",
+            "raw_bytes": True,
+            "security": False
+        }
+        with open(file_path, "w") as f:
+            f.write('{\n    "header": ')
+            f.write(textwrap.indent(json.dumps(header, indent=4), "    ").lstrip())
+            f.write(',\n    "hashes": [')
+            for i, leaf in enumerate(self):
+                f.write(",\n" if i else "\n")
+                f.write(f'        "{leaf}"')
+            f.write("\n    ]\n}" if self._length else "]\n}")
+
+    def close(self):
+        """Close the level files and remove them if they are temporary"""
+        for level in self.levels:
+            level.close()
+        self.levels = []
+        if self._leaves is not None:
+            self._leaves.close()
+        if self._cleanup is not None:
+            self._cleanup()
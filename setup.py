@@ -39,5 +39,9 @@ setup(
     install_requires=[
         'pydub',
         'pymerkle>=5.0'
-    ]
+    ],
+    extras_require={
+        # Vectorized content-defined chunking
+        'numpy': ['numpy']
+    }
 )
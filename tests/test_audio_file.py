@@ -0,0 +1,67 @@
+import os
+import shutil
+import struct
+import tempfile
+import unittest
+import wave
+
+from pruvi.splitters.audio_file import AudioFileSplitter
+
+
+def write_wav(file_path, channels, sample_width, frame_rate, frames, trailer=b""):
+    """Write a PCM WAV file, followed by extra chunks"""
+    with wave.open(file_path, "wb") as w:
+        w.setnchannels(channels)
+        w.setsampwidth(sample_width)
+        w.setframerate(frame_rate)
+        w.writeframes(frames)
+
+    if trailer:
+        with open(file_path, "r+b") as f:
+            f.seek(0, 2)
+            f.write(trailer)
+            size = f.tell() - 8
+            f.seek(4)
+            f.write(struct.pack("<L", size))
+
+
+def info_chunk(text):
+    """Build a LIST/INFO chunk with a comment"""
+    comment = text + b"\x00" * (len(text) % 2)
+    body = b"INFO" + b"ICMT" + struct.pack("<L", len(comment)) + comment
+    return b"LIST" + struct.pack("<L", len(body)) + body
+
+
+class AudioFileSplitterTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def assert_same_parts(self, file_path, **kwargs):
+        splitter = AudioFileSplitter(file_path=file_path, engine="native")
+        expected = list(splitter._iter_pydub_parts(**kwargs))
+        self.assertEqual([bytes(part) for part in splitter.iter_parts(**kwargs)], expected)
+        self.assertEqual([bytes(part) for part in splitter.iter_parts(mmap=True, **kwargs)], expected)
+
+    def test_fast_path_matches_pydub(self):
+        for channels, sample_width, frame_rate in ((1, 1, 8000), (2, 2, 11025), (1, 4, 4000)):
+            frames = os.urandom(channels * sample_width * int(frame_rate * 2.3))
+            for trailer in (b"", info_chunk(b"recorded by pruvi")):
+                with self.subTest(channels=channels, sample_width=sample_width, trailer=bool(trailer)):
+                    file_path = os.path.join(self.folder, f"audio-{channels}-{sample_width}.wav")
+                    write_wav(file_path, channels, sample_width, frame_rate, frames, trailer)
+                    self.assert_same_parts(file_path, seconds=1)
+
+    def test_trailing_chunk_is_not_audio(self):
+        file_path = os.path.join(self.folder, "audio.wav")
+        frames = os.urandom(2 * 12000)
+        write_wav(file_path, 1, 2, 8000, frames, info_chunk(b"x" * 1000))
+
+        parts = list(AudioFileSplitter(file_path=file_path, engine="native").iter_parts(seconds=1))
+        self.assertEqual(b"".join(part[44:] for part in parts), frames)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,42 @@
+import os
+import random
+import unittest
+
+from pruvi.splitters import cdc_file
+
+
+@unittest.skipIf(cdc_file.np is None, "numpy is not installed")
+class NumpyCutPointsTest(unittest.TestCase):
+    def assert_same_cut_points(self, data, min_size, avg_size, max_size):
+        self.assertEqual(
+            list(cdc_file._cut_points_numpy(data, min_size, avg_size, max_size)),
+            list(cdc_file._cut_points_python(data, min_size, avg_size, max_size))
+        )
+
+    def test_random_data(self):
+        rng = random.Random(0)
+        for trial in range(40):
+            avg_size = 2 ** rng.randrange(8, 14)
+            min_size = avg_size // rng.choice([2, 4, 8])
+            max_size = avg_size * rng.choice([2, 4, 8])
+            data = os.urandom(rng.randrange(0, 200000))
+            with self.subTest(trial=trial, avg_size=avg_size, length=len(data)):
+                self.assert_same_cut_points(data, min_size, avg_size, max_size)
+
+    def test_low_entropy_data(self):
+        # Data without boundaries is cut at the maximum size
+        pattern = os.urandom(37)
+        for data in (bytes(100000), pattern * 3000, bytes(50000) + os.urandom(50000)):
+            with self.subTest(length=len(data)):
+                self.assert_same_cut_points(data, 2048, 8192, 65536)
+
+    def test_dispatch(self):
+        data = os.urandom(100000)
+        self.assertEqual(
+            list(cdc_file.cut_points(data)),
+            list(cdc_file._cut_points_python(data, 2048, 8192, 65536))
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
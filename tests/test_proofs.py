@@ -0,0 +1,70 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from pruvi.proofs import validate_proof
+from pruvi.splitters.binary_file import BinaryFileSplitter
+
+# Fields of a proof header that change from one proof to another
+VOLATILE = ("uuid", "timestamp", "creation_moment", "provider")
+
+
+def export(file_path, output_folder, engine, size=10):
+    splitter = BinaryFileSplitter(file_path=file_path, engine=engine)
+    splitter.split_document(size=size)
+    splitter.create_tree()
+    splitter.export(output_folder)
+    with open(os.path.join(output_folder, "all_proofs.json")) as f:
+        return json.load(f)
+
+
+class EngineCompatibilityTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_native_proofs_match_pymerkle(self):
+        for length in (1, 2, 3, 4, 5, 6, 7, 8, 9, 16, 17, 31):
+            with self.subTest(length=length):
+                file_path = os.path.join(self.folder, f"data-{length}.bin")
+                with open(file_path, "wb") as f:
+                    f.write(os.urandom(10 * length))
+
+                native = export(file_path, os.path.join(self.folder, f"native-{length}"), "native")
+                reference = export(file_path, os.path.join(self.folder, f"pymerkle-{length}"), "pymerkle")
+
+                self.assertEqual(native["merkle_root"], reference["merkle_root"])
+                self.assertEqual(len(native["proofs"]), length)
+                self.assertEqual(len(reference["proofs"]), length)
+                for proof, expected in zip(native["proofs"], reference["proofs"]):
+                    self.assertEqual(proof["body"], expected["body"])
+                    for key in set(expected["header"]) - set(VOLATILE):
+                        self.assertEqual(proof["header"][key], expected["header"][key])
+                    self.assertTrue(validate_proof(proof, reference["merkle_root"]))
+
+                for name in ("tree-state.json", "tree.json"):
+                    with open(os.path.join(self.folder, f"native-{length}", name)) as f:
+                        state = json.load(f)
+                    with open(os.path.join(self.folder, f"pymerkle-{length}", name)) as f:
+                        self.assertEqual(state, json.load(f))
+
+    def test_identical_parts_get_their_own_proofs(self):
+        file_path = os.path.join(self.folder, "repeated.bin")
+        with open(file_path, "wb") as f:
+            f.write(b"0123456789" * 5)
+
+        native = export(file_path, os.path.join(self.folder, "native"), "native")
+        reference = export(file_path, os.path.join(self.folder, "pymerkle"), "pymerkle")
+        self.assertEqual(
+            [proof["body"] for proof in native["proofs"]],
+            [proof["body"] for proof in reference["proofs"]]
+        )
+        self.assertEqual(len({json.dumps(proof["body"]) for proof in reference["proofs"]}), 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
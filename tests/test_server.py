@@ -0,0 +1,146 @@
+import asyncio
+import base64
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from pruvi.server import ExportIndex, VerificationServer
+from pruvi.splitters.binary_file import BinaryFileSplitter
+
+
+def make_export(folder, data, size=100, first_length=None):
+    """Export a file, appending its last parts in a second run if first_length is given"""
+    file_path = os.path.join(folder, "data.bin")
+    output_folder = os.path.join(folder, "export")
+    os.makedirs(folder)
+
+    with open(file_path, "wb") as f:
+        f.write(data[:first_length * size] if first_length else data)
+    splitter = BinaryFileSplitter(file_path=file_path, engine="native")
+    splitter.split_document(size=size)
+    splitter.create_tree()
+    splitter.export(output_folder)
+
+    if first_length:
+        with open(file_path, "wb") as f:
+            f.write(data)
+        splitter = BinaryFileSplitter(file_path=file_path, engine="native")
+        splitter.append_document(output_folder, size=size)
+    return output_folder
+
+
+class VerificationServerTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.data = os.urandom(500)
+        self.export_folder = make_export(os.path.join(self.folder, "logs"), self.data, first_length=3)
+        self.socket_path = os.path.join(self.folder, "pruvi.sock")
+        self.server = VerificationServer([self.export_folder], workers=2)
+
+    def tearDown(self):
+        self.server.close()
+        shutil.rmtree(self.folder)
+
+    def exchange(self, *lines):
+        """Send some request lines to the server and return the decoded responses"""
+        async def run():
+            server = await self.server.start(socket_path=self.socket_path)
+            async with server:
+                reader, writer = await asyncio.open_unix_connection(self.socket_path, limit=2**24)
+                responses = []
+                for line in lines:
+                    writer.write(line + b"\n")
+                    await writer.drain()
+                    response = await reader.readline()
+                    if not response:
+                        break
+                    responses.append(json.loads(response))
+                writer.close()
+                await writer.wait_closed()
+                return responses
+
+        return asyncio.run(run())
+
+    def request(self, **request):
+        return self.exchange(json.dumps(request).encode())[0]
+
+    def test_roots(self):
+        response = self.request(op="roots", id=1)
+        self.assertEqual(response["id"], 1)
+        self.assertEqual(response["roots"], {"export": self.server.exports["export"].merkle_root})
+
+    def test_verify(self):
+        # The part was appended, so its proof is against the current root
+        part = self.data[300:400]
+        response = self.request(op="verify", tree="export", part=4, data=base64.b64encode(part).decode())
+        self.assertTrue(response["verified"])
+        self.assertEqual(response["merkle_root"], self.server.exports["export"].merkle_root)
+
+        tampered = b"X" + part[1:]
+        response = self.request(op="verify", tree="export", part=4, data=base64.b64encode(tampered).decode())
+        self.assertFalse(response["verified"])
+        self.assertIsNone(response["merkle_root"])
+
+    def test_extract(self):
+        response = self.request(op="extract", tree="export", part=4)
+        self.assertEqual(base64.b64decode(response["data"]), self.data[300:400])
+        self.assertEqual(response["proof"], self.server.exports["export"].get_proof(4))
+
+    def test_data_file_is_not_read(self):
+        response = self.request(
+            op="verify",
+            tree="export",
+            part=1,
+            data_file=os.path.join(self.export_folder, "parts", "part-1.bin")
+        )
+        self.assertIn("error", response)
+        self.assertNotIn("verified", response)
+
+    def test_malformed_requests(self):
+        lines = [
+            {"op": "verify", "tree": [1], "part": 1, "data": ""},
+            {"op": "verify", "tree": {"name": "export"}, "part": 1, "data": ""},
+            {"op": "verify", "tree": "export", "part": 1, "data": 5},
+            {"op": "verify", "tree": "export", "part": [1], "data": ""},
+            {"op": "verify", "tree": "export", "proof": "proof", "data": ""},
+            {"op": "extract", "tree": "export", "part": None},
+            {"op": "extract", "tree": "missing", "part": 1},
+            {"op": "extract", "tree": "export", "part": 99},
+        ]
+        requests = [json.dumps(line).encode() for line in lines] + [b"[1, 2]", b"{"]
+        responses = self.exchange(*requests, json.dumps({"op": "roots"}).encode())
+        self.assertEqual(len(responses), len(requests) + 1)
+        for response in responses[:-1]:
+            self.assertFalse(response.get("verified"))
+        for response in responses[:4] + responses[5:-1]:
+            self.assertIn("error", response)
+        # The connection goes on with the next request
+        self.assertIn("roots", responses[-1])
+
+    def test_long_request(self):
+        line = json.dumps({"op": "verify", "tree": "export", "part": 1, "data": "A" * 2**17}).encode()
+        responses = self.exchange(line, json.dumps({"op": "roots"}).encode())
+        self.assertIn("longer than", responses[0]["error"])
+        # The connection goes on with the next request
+        self.assertIn("roots", responses[1])
+
+    def test_unchained_consistency_proofs(self):
+        index = ExportIndex(self.export_folder)
+        self.assertEqual(len(index.roots), 2)
+        index.close()
+
+        # A valid proof of another export does not lead to the root of this one
+        other_folder = make_export(os.path.join(self.folder, "other"), os.urandom(500), first_length=2)
+        shutil.copyfile(
+            os.path.join(other_folder, "consistency-2-5.json"),
+            os.path.join(self.export_folder, "consistency-2-5.json")
+        )
+        index = ExportIndex(self.export_folder)
+        self.assertEqual(len(index.roots), 2)
+        index.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from pruvi.proofs import validate_proof
+from pruvi.shards import build_shard, merge_shards
+from pruvi.splitters.binary_file import BinaryFileSplitter
+
+
+def read_export(output_folder):
+    with open(os.path.join(output_folder, "all_proofs.json")) as f:
+        return json.load(f)
+
+
+def read_parts(output_folder):
+    parts_folder = os.path.join(output_folder, "parts")
+    parts = {}
+    for name in os.listdir(parts_folder):
+        if name.endswith("-proof.json"):
+            continue
+        with open(os.path.join(parts_folder, name), "rb") as f:
+            parts[name] = f.read()
+    return parts
+
+
+class ShardsTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def single_build(self, file_path, name):
+        output_folder = os.path.join(self.folder, name)
+        splitter = BinaryFileSplitter(file_path=file_path, engine="native")
+        splitter.split_document(size=10)
+        splitter.create_tree()
+        splitter.export(output_folder)
+        return output_folder
+
+    def assert_same_export(self, sharded_folder, single_folder):
+        sharded, single = read_export(sharded_folder), read_export(single_folder)
+        self.assertEqual(sharded["merkle_root"], single["merkle_root"])
+        self.assertEqual(
+            [proof["body"] for proof in sharded["proofs"]],
+            [proof["body"] for proof in single["proofs"]]
+        )
+        for proof in sharded["proofs"]:
+            self.assertTrue(validate_proof(proof, single["merkle_root"]))
+        self.assertEqual(read_parts(sharded_folder), read_parts(single_folder))
+
+    def test_sharded_build_matches_single_build(self):
+        for length in (1, 3, 4, 5, 8, 9, 13, 16, 17, 31):
+            for shard_size, workers in ((1, 1), (4, 3), (8, 2)):
+                with self.subTest(length=length, shard_size=shard_size, workers=workers):
+                    file_path = os.path.join(self.folder, f"data-{length}.bin")
+                    with open(file_path, "wb") as f:
+                        f.write(os.urandom(10 * length - 3))
+                    single_folder = self.single_build(file_path, f"single-{length}")
+
+                    sharded_folder = os.path.join(self.folder, f"sharded-{length}-{shard_size}")
+                    splitter = BinaryFileSplitter(file_path=file_path, engine="native")
+                    splitter.split_sharded(sharded_folder, shard_size, workers=workers, backend="thread", size=10)
+                    splitter.export(sharded_folder)
+                    self.assert_same_export(sharded_folder, single_folder)
+
+    def test_shards_built_apart(self):
+        # Shards built one by one, e.g. on several machines, and merged afterwards
+        file_path = os.path.join(self.folder, "data.bin")
+        with open(file_path, "wb") as f:
+            f.write(os.urandom(10 * 21))
+        single_folder = self.single_build(file_path, "single")
+
+        sharded_folder = os.path.join(self.folder, "sharded")
+        for index in reversed(range(3)):
+            info = build_shard(BinaryFileSplitter, file_path, index, 8, sharded_folder, options={"size": 10})
+            self.assertEqual(info["length"], min(8, 21 - 8 * index))
+
+        tree = merge_shards(sharded_folder)
+        self.assertEqual(tree.rootHash.decode(), read_export(single_folder)["merkle_root"])
+        tree.close()
+
+        splitter = BinaryFileSplitter(file_path=file_path, engine="native")
+        splitter.merge_shards(sharded_folder)
+        splitter.export(sharded_folder)
+        self.assert_same_export(sharded_folder, single_folder)
+
+    def test_process_backend(self):
+        file_path = os.path.join(self.folder, "data.bin")
+        with open(file_path, "wb") as f:
+            f.write(os.urandom(10 * 11))
+        single_folder = self.single_build(file_path, "single")
+
+        sharded_folder = os.path.join(self.folder, "sharded")
+        splitter = BinaryFileSplitter(file_path=file_path, engine="native")
+        splitter.split_sharded(sharded_folder, 4, workers=2, backend="process", size=10)
+        splitter.export(sharded_folder)
+        self.assert_same_export(sharded_folder, single_folder)
+
+
+if __name__ == "__main__":
+    unittest.main()
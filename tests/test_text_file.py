@@ -0,0 +1,56 @@
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+from pruvi.splitters.text_file import TextFileSplitter
+
+# Separators of the three methods, with line breaks other than "\n" and runs of them
+ALPHABET = ["a", "b", "c", " ", "\t", "\n", "\n", "\n\n", "\x0c", " ", "\x85", "é"]
+
+
+class TextFileSplitterTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.file_path = os.path.join(self.folder, "text.txt")
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def tokens(self, method, block_size):
+        splitter = TextFileSplitter(file_path=self.file_path, engine="native")
+        with open(self.file_path) as f:
+            return list(splitter._iter_tokens(f, method, block_size))
+
+    def test_blocks_give_the_tokens_of_the_whole_text(self):
+        rng = random.Random(0)
+        expected = {
+            "lines": lambda text: text.splitlines(),
+            "words": lambda text: text.split(),
+            "paragraphs": lambda text: text.split("\n\n")
+        }
+        for trial in range(300):
+            text = "".join(rng.choice(ALPHABET) for _ in range(rng.randrange(0, 80)))
+            with open(self.file_path, "w", encoding="utf-8") as f:
+                f.write(text)
+            with open(self.file_path, encoding="utf-8") as f:
+                text = f.read()
+
+            block_size = rng.choice([1, 2, 3, 5, 8, 64])
+            for method, split in expected.items():
+                with self.subTest(trial=trial, method=method, block_size=block_size):
+                    self.assertEqual(self.tokens(method, block_size), split(text))
+
+    def test_long_token_spans_many_blocks(self):
+        text = "x" * 10000 + "\n\n" + "y" * 5000
+        with open(self.file_path, "w") as f:
+            f.write(text)
+
+        self.assertEqual(self.tokens("paragraphs", 7), text.split("\n\n"))
+        self.assertEqual(self.tokens("lines", 7), text.splitlines())
+        self.assertEqual(self.tokens("words", 7), text.split())
+
+
+if __name__ == "__main__":
+    unittest.main()
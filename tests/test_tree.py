@@ -0,0 +1,116 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from pruvi.hashing import hash_bytes
+from pruvi.proofs import audit_steps, serialize_proof, signed_path, validate_proof
+from pruvi.splitters.binary_file import BinaryFileSplitter
+from pruvi.tree import ArrayMerkleTree, DiskMerkleTree
+
+# Fields of a proof header that change from one proof to another
+VOLATILE = ("uuid", "timestamp", "creation_moment", "provider")
+
+LENGTHS = (1, 2, 3, 4, 5, 6, 7, 8, 9, 15, 16, 17, 31, 33, 100)
+
+
+def array_proof(tree, index):
+    """Get the proof of a leaf of an ArrayMerkleTree"""
+    width = len(tree.levels[-1])
+    leaf = tree.get_leaves()[index]
+    proof_index, proof_path = signed_path(leaf, audit_steps(tree.levels, index, width))
+    return serialize_proof(proof_index, proof_path, tree.hash_type, tree.uuid)
+
+
+class DiskMerkleTreeTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def assert_same_tree(self, disk, array):
+        self.assertEqual(disk.rootHash, array.rootHash)
+        self.assertEqual(disk.length, array.length)
+        self.assertEqual(list(disk.get_leaves()), array.get_leaves())
+        self.assertEqual(len(disk.levels), len(array.levels))
+        for level, expected in zip(disk.levels, array.levels):
+            self.assertEqual(level[:len(level)], bytes(expected))
+
+        for index in range(array.length):
+            proof, expected = disk.get_proof(index), array_proof(array, index)
+            self.assertEqual(proof["body"], expected["body"])
+            for key in set(expected["header"]) - set(VOLATILE):
+                self.assertEqual(proof["header"][key], expected["header"][key])
+            self.assertTrue(validate_proof(proof, array.rootHash.decode()))
+
+        disk_file = os.path.join(self.folder, "disk.json")
+        array_file = os.path.join(self.folder, "array.json")
+        disk.export(disk_file)
+        array.export(array_file)
+        with open(disk_file) as f, open(array_file) as g:
+            self.assertEqual(json.load(f), json.load(g))
+
+    def test_same_root_and_proofs_as_array_tree(self):
+        for hash_type in ("sha256", "sha3_512"):
+            for length in LENGTHS:
+                # The smallest budget makes every level be hashed in many chunks
+                for memory_budget in (1, 2**26):
+                    with self.subTest(hash_type=hash_type, length=length, memory_budget=memory_budget):
+                        digests = [hash_bytes(os.urandom(8), hash_type) for _ in range(length)]
+                        array = ArrayMerkleTree(hash_type=hash_type)
+                        array.extend(digests)
+
+                        disk = DiskMerkleTree(hash_type=hash_type, memory_budget=memory_budget)
+                        disk.extend(digests)
+                        disk.build()
+                        try:
+                            self.assert_same_tree(disk, array)
+                        finally:
+                            disk.close()
+
+    def test_loaded_tree(self):
+        digests = [hash_bytes(os.urandom(8), "sha256") for _ in range(13)]
+        array = ArrayMerkleTree(hash_type="sha256")
+        array.extend(digests)
+
+        folder = os.path.join(self.folder, "levels")
+        disk = DiskMerkleTree(folder, hash_type="sha256")
+        disk.extend(digests)
+        disk.build()
+        disk.close()
+
+        disk = DiskMerkleTree.load(folder, hash_type="sha256")
+        try:
+            self.assert_same_tree(disk, array)
+        finally:
+            disk.close()
+
+    def test_disk_engine_export_matches_native(self):
+        for length in (1, 2, 7, 16, 17):
+            with self.subTest(length=length):
+                file_path = os.path.join(self.folder, f"data-{length}.bin")
+                with open(file_path, "wb") as f:
+                    f.write(os.urandom(10 * length))
+
+                exports = {}
+                for engine in ("native", "disk"):
+                    output_folder = os.path.join(self.folder, f"{engine}-{length}")
+                    splitter = BinaryFileSplitter(file_path=file_path, engine=engine)
+                    splitter.split_document(size=10)
+                    splitter.create_tree()
+                    splitter.export(output_folder)
+                    with open(os.path.join(output_folder, "all_proofs.json")) as f:
+                        exports[engine] = json.load(f)
+
+                native, disk = exports["native"], exports["disk"]
+                self.assertEqual(disk["merkle_root"], native["merkle_root"])
+                self.assertEqual(
+                    [proof["body"] for proof in disk["proofs"]],
+                    [proof["body"] for proof in native["proofs"]]
+                )
+
+
+if __name__ == "__main__":
+    unittest.main()